@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+"""
+Benchmarks of the backend's hot paths against a Firebird server.
+
+    $ python benchmarks/bench_backend.py [--rows 10000] [--json out.json] [crud bulk scan fetch trunc migrate]
+
+Each benchmark reports its best wall time of --repeat runs, the round
+trips to the server and the bytes received of one run and the peak memory
+allocated by Python during a run (traced in a separate run). The server and database are taken
+from DJFIREBIRDSQL_BENCH_HOST, DJFIREBIRDSQL_BENCH_DATABASE,
+DJFIREBIRDSQL_BENCH_USER and DJFIREBIRDSQL_BENCH_PASSWORD; the database is
+created if it doesn't exist.
+
+--record DIR saves what the server sent for each benchmark and --replay DIR
+runs the benchmarks from the recording without a server (see wire.py), which
+measures the client side only. --compare old.json prints the changes from a
+previous --json output. --option KEY=VALUE sets a connection option, e.g.
+
+    $ python benchmarks/bench_backend.py --json plain.json fetch
+    $ python benchmarks/bench_backend.py --option wire_compression=true --compare plain.json fetch
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import django                                                      # NOQA isort:skip
+import firebirdsql                                                 # NOQA isort:skip
+from django.conf import settings                                   # NOQA isort:skip
+
+settings.configure(
+    DATABASES={
+        'default': {
+            'ENGINE': 'djfirebirdsql',
+            'NAME': os.environ.get('DJFIREBIRDSQL_BENCH_DATABASE', '/tmp/djfirebirdsql_bench.fdb'),
+            'HOST': os.environ.get('DJFIREBIRDSQL_BENCH_HOST', 'localhost'),
+            'USER': os.environ.get('DJFIREBIRDSQL_BENCH_USER', 'sysdba'),
+            'PASSWORD': os.environ.get('DJFIREBIRDSQL_BENCH_PASSWORD', 'masterkey'),
+        },
+    },
+    INSTALLED_APPS=[],
+    USE_TZ=True,
+)
+django.setup()
+
+from django.db import connection, models                          # NOQA isort:skip
+from django.db.models import Count, F                              # NOQA isort:skip
+from django.db.models.functions import (                           # NOQA isort:skip
+    ExtractHour, TruncDay, TruncMonth, TruncYear,
+)
+from django.utils import timezone                                  # NOQA isort:skip
+from wire import Wire                                              # NOQA isort:skip
+
+START = datetime.datetime(2020, 1, 1, tzinfo=timezone.utc)
+
+
+class Author(models.Model):
+    name = models.CharField(max_length=100)
+
+    class Meta:
+        app_label = 'bench'
+
+
+class Book(models.Model):
+    author = models.ForeignKey(Author, models.CASCADE)
+    title = models.CharField(max_length=200, db_index=True)
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+    published = models.DateTimeField()
+
+    class Meta:
+        app_label = 'bench'
+
+
+class Page(models.Model):
+    title = models.CharField(max_length=200)
+    body = models.CharField(max_length=4000)
+
+    class Meta:
+        app_label = 'bench'
+
+
+WORDS = (
+    'firebird django database backend wire protocol compression network '
+    'bandwidth result set query server client page index transaction'
+).split()
+
+
+def new_books(author, rows):
+    return [
+        Book(
+            author=author, title='Book %d' % i, price=Decimal(i % 1000) / 10,
+            published=START + datetime.timedelta(hours=i),
+        ) for i in range(rows)
+    ]
+
+
+class Benchmark:
+    """setup() and teardown() run once around the runs of run()."""
+    models = [Author, Book]
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def setup(self):
+        with connection.schema_editor() as editor:
+            for model in self.models:
+                editor.create_model(model)
+
+    def teardown(self):
+        with connection.schema_editor() as editor:
+            for model in reversed(self.models):
+                editor.delete_model(model)
+
+    def run(self):
+        raise NotImplementedError
+
+    # Operations of a run, to report the time per operation
+    def operations(self):
+        return self.rows
+
+
+class CRUD(Benchmark):
+    """Single row create, get, update and delete."""
+    def operations(self):
+        return self.rows // 10 * 4
+
+    def run(self):
+        for i in range(self.rows // 10):
+            author = Author.objects.create(name='Author %d' % i)
+            author = Author.objects.get(pk=author.pk)
+            author.name = 'Renamed %d' % i
+            author.save()
+            author.delete()
+
+
+class Bulk(Benchmark):
+    """bulk_create(), a queryset update(), bulk_update() and delete()."""
+    def setup(self):
+        super().setup()
+        self.author = Author.objects.create(name='Author')
+
+    def run(self):
+        Book.objects.bulk_create(new_books(self.author, self.rows), batch_size=1000)
+        Book.objects.update(price=F('price') + 1)
+        books = list(Book.objects.all())
+        for book in books:
+            book.title = book.title.upper()
+        Book.objects.bulk_update(books, ['title'], batch_size=1000)
+        Book.objects.all().delete()
+
+
+class Scan(Benchmark):
+    """Large result sets with type conversions."""
+    def setup(self):
+        super().setup()
+        Book.objects.bulk_create(new_books(Author.objects.create(name='Author'), self.rows), batch_size=1000)
+
+    def run(self):
+        list(Book.objects.values_list('id', 'title', 'price', 'published'))
+        for book in Book.objects.iterator():
+            pass
+
+
+class Fetch(Benchmark):
+    """Large result sets of text, bound by the network."""
+    models = [Page]
+
+    def setup(self):
+        super().setup()
+        rng = random.Random(0)
+        Page.objects.bulk_create([
+            Page(title='Page %d' % i, body=' '.join(rng.choice(WORDS) for j in range(300)))
+            for i in range(self.rows)
+        ], batch_size=500)
+
+    def run(self):
+        list(Page.objects.values_list('id', 'title', 'body'))
+
+
+class Trunc(Scan):
+    """Aggregation by truncated datetimes."""
+    def operations(self):
+        return 4
+
+    def run(self):
+        for trunc in (TruncDay, TruncMonth, TruncYear):
+            list(Book.objects.annotate(t=trunc('published')).values('t').annotate(c=Count('id')).order_by('t'))
+        list(Book.objects.annotate(h=ExtractHour('published')).values('h').annotate(c=Count('id')).order_by('h'))
+
+
+class Migrate(Benchmark):
+    """Creating, introspecting and dropping tables linked by foreign keys."""
+    tables = 20
+    models = []
+
+    def setup(self):
+        if not Migrate.models:
+            previous = None
+            for i in range(self.tables):
+                attrs = {
+                    '__module__': __name__,
+                    'Meta': type('Meta', (), {'app_label': 'bench'}),
+                    'name': models.CharField(max_length=50, db_index=True),
+                    'code': models.IntegerField(unique=True),
+                }
+                if previous is not None:
+                    attrs['parent'] = models.ForeignKey(previous, models.CASCADE)
+                previous = type('Table%d' % i, (models.Model,), attrs)
+                Migrate.models.append(previous)
+
+    def teardown(self):
+        pass
+
+    def operations(self):
+        return self.tables
+
+    def run(self):
+        with connection.schema_editor() as editor:
+            for model in self.models:
+                editor.create_model(model)
+        introspection = connection.introspection
+        with connection.cursor() as cursor:
+            for model in self.models:
+                table = model._meta.db_table
+                introspection.get_table_description(cursor, table)
+                introspection.get_constraints(cursor, table)
+                introspection.get_relations(cursor, table)
+        with connection.schema_editor() as editor:
+            for model in reversed(self.models):
+                editor.delete_model(model)
+
+
+BENCHMARKS = {
+    'crud': CRUD,
+    'bulk': Bulk,
+    'scan': Scan,
+    'fetch': Fetch,
+    'trunc': Trunc,
+    'migrate': Migrate,
+}
+
+
+def run_benchmark(benchmark, wire, repeat):
+    connection.close()
+    benchmark.setup()
+    try:
+        tracemalloc.start()
+        benchmark.run()
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        walls = []
+        for i in range(repeat):
+            round_trips = wire.round_trips
+            bytes_received = wire.bytes_received
+            start = time.perf_counter()
+            benchmark.run()
+            walls.append(time.perf_counter() - start)
+            round_trips = wire.round_trips - round_trips
+            bytes_received = wire.bytes_received - bytes_received
+    finally:
+        benchmark.teardown()
+        connection.close()
+    wall = min(walls)
+    return {
+        'wall': wall,
+        'walls': walls,
+        'operations': benchmark.operations(),
+        'per_operation': wall / benchmark.operations(),
+        'round_trips': round_trips,
+        'bytes_received': bytes_received,
+        'peak_memory': peak_memory,
+    }
+
+
+def ensure_database():
+    name = connection.settings_dict['NAME']
+    if not connection.creation._database_exists(name):
+        connection.creation._create_database(name, 0)
+
+
+def parse_option(option):
+    key, sep, value = option.partition('=')
+    if not sep:
+        raise argparse.ArgumentTypeError('expected KEY=VALUE: %r' % option)
+    try:
+        value = json.loads(value)
+    except ValueError:
+        pass
+    return key, value
+
+
+def metadata(args, mode):
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        'time': datetime.datetime.now(timezone.utc).isoformat(),
+        'commit': commit,
+        'mode': mode,
+        'rows': args.rows,
+        'repeat': args.repeat,
+        'options': dict(args.option),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'firebirdsql': firebirdsql.__version__,
+        'platform': platform.platform(),
+    }
+
+
+def compare(results, path):
+    with open(path) as f:
+        old = json.load(f)['results']
+    print('\nchanges from %s' % path)
+    for name, result in results.items():
+        if name not in old:
+            continue
+        print('%-8s wall x%.2f  round trips %+d  received x%.2f  peak memory x%.2f' % (
+            name,
+            result['wall'] / old[name]['wall'],
+            result['round_trips'] - old[name]['round_trips'],
+            result['bytes_received'] / max(old[name].get('bytes_received', 0), 1),
+            result['peak_memory'] / max(old[name]['peak_memory'], 1),
+        ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('benchmarks', nargs='*', metavar='benchmark', help=', '.join(BENCHMARKS))
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--json', metavar='FILE', help='Save the results as JSON.')
+    parser.add_argument('--compare', metavar='FILE', help='Compare with the JSON of a previous run.')
+    parser.add_argument(
+        '--option', action='append', default=[], type=parse_option, metavar='KEY=VALUE',
+        help='Set a connection option (JSON value), e.g. wire_compression=true. Can be used multiple times.',
+    )
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--record', metavar='DIR', help='Record the server responses.')
+    group.add_argument('--replay', metavar='DIR', help='Replay recorded server responses.')
+    args = parser.parse_args()
+    for name in args.benchmarks:
+        if name not in BENCHMARKS:
+            parser.error('unknown benchmark %r' % name)
+
+    connection.settings_dict['OPTIONS'].update(args.option)
+    mode = 'record' if args.record else 'replay' if args.replay else 'live'
+    if mode != 'replay':
+        ensure_database()
+    if args.record:
+        os.makedirs(args.record, exist_ok=True)
+
+    results = {}
+    for name in args.benchmarks or list(BENCHMARKS):
+        data = b''
+        if args.replay:
+            with open(os.path.join(args.replay, '%s.wire' % name), 'rb') as f:
+                data = f.read()
+        wire = Wire(mode, data)
+        with wire.installed():
+            result = run_benchmark(BENCHMARKS[name](args.rows), wire, args.repeat)
+        if args.record:
+            with open(os.path.join(args.record, '%s.wire' % name), 'wb') as f:
+                f.write(wire.recorded())
+        results[name] = result
+        print('%-8s %8.3f sec %10.1f usec/op %7d round trips %9d KiB received %8d KiB peak' % (
+            name, result['wall'], result['per_operation'] * 1e6,
+            result['round_trips'], result['bytes_received'] // 1024, result['peak_memory'] // 1024,
+        ))
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'meta': metadata(args, mode), 'results': results}, f, indent=2)
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
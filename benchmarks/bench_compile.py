@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark of SQL compilation.
+
+Compiles a mix of ORM queries (joins, filters, annotations, aggregates,
+datetime truncation and string functions) to SQL the way the query
+compiler does before execution, without a Firebird server, and reports
+the time per query.
+
+    $ python benchmarks/bench_compile.py [--number 200] [--repeat 5]
+"""
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import django                                                      # NOQA isort:skip
+from django.conf import settings                                   # NOQA isort:skip
+
+settings.configure(
+    DATABASES={'default': {'ENGINE': 'djfirebirdsql', 'NAME': 'bench.fdb'}},
+    INSTALLED_APPS=[],
+    USE_TZ=True,
+    TIME_ZONE='Asia/Tokyo',
+)
+django.setup()
+
+from django.db import connections, models                         # NOQA isort:skip
+from django.db.models import Avg, Count, F, Max, Q, Sum, Value    # NOQA isort:skip
+from django.db.models.functions import (                           # NOQA isort:skip
+    Coalesce, Concat, Greatest, Least, Length, Lower, LTrim, MD5, Ord, Substr,
+    TruncDay, TruncHour, TruncMonth, TruncWeek, TruncYear,
+)
+
+
+class Publisher(models.Model):
+    name = models.CharField(max_length=100)
+    country = models.CharField(max_length=50)
+
+    class Meta:
+        app_label = 'bench'
+
+
+class Author(models.Model):
+    name = models.CharField(max_length=100)
+    publisher = models.ForeignKey(Publisher, models.CASCADE)
+    born = models.DateField(null=True)
+
+    class Meta:
+        app_label = 'bench'
+
+
+class Book(models.Model):
+    author = models.ForeignKey(Author, models.CASCADE)
+    title = models.CharField(max_length=200)
+    isbn = models.CharField(max_length=13)
+    pages = models.IntegerField()
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+    rating = models.FloatField()
+    published = models.DateTimeField()
+
+    class Meta:
+        app_label = 'bench'
+
+
+def querysets():
+    books = Book.objects.all()
+    return [
+        books.filter(pk=1),
+        books.filter(title__icontains='django', pages__gt=100).order_by('-published')[:20],
+        books.filter(author__publisher__country='JP').select_related('author__publisher'),
+        books.filter(Q(price__lt=10) | Q(rating__gte=4.5), published__year=2020),
+        books.exclude(author__name__startswith='A').values('title', 'author__name'),
+        books.values('author').annotate(n=Count('id'), avg=Avg('price'), top=Max('rating')),
+        books.annotate(day=TruncDay('published')).values('day').annotate(n=Count('id')).order_by('day'),
+        books.annotate(week=TruncWeek('published')).values('week').annotate(n=Count('id')),
+        books.annotate(month=TruncMonth('published'), year=TruncYear('published')).values('month', 'year'),
+        books.annotate(hour=TruncHour('published')).filter(hour__isnull=False),
+        books.annotate(
+            length=Length('title'), lower=Lower('title'), first=Ord('title'),
+            trimmed=LTrim('isbn'), digest=MD5('isbn'),
+        ),
+        books.annotate(
+            best=Greatest('pages', Value(100)), worst=Least('pages', Value(100)),
+            label=Concat('title', Value(' / '), 'isbn'), prefix=Substr('isbn', 1, 3),
+        ),
+        books.annotate(total=F('pages') * 2, name=Coalesce('author__name', Value(''))),
+        books.values('author__publisher').annotate(n=Count('id'), pages=Sum('pages')).filter(n__gt=2),
+        Author.objects.filter(publisher__name__in=['a', 'b', 'c']).distinct().order_by('name'),
+    ]
+
+
+def compile_all(queries):
+    for query in queries:
+        query.get_compiler(connection=connections['default']).as_sql()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--number', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    queries = [queryset.query for queryset in querysets()]
+    compile_all(queries)
+    times = timeit.repeat(lambda: compile_all(queries), number=args.number, repeat=args.repeat)
+    print('%d queries: %.1f usec/query' % (len(queries), min(times) / args.number / len(queries) * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark of FirebirdCursorWrapper result buffering.
+
+Fetches 1M buffered rows in GET_ITERATOR_CHUNK_SIZE chunks, the way
+Django's cursor_iter() does, without a Firebird server.
+
+    $ python benchmarks/bench_fetch.py
+"""
+import collections
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from django.db.models.sql.constants import GET_ITERATOR_CHUNK_SIZE  # NOQA isort:skip
+from djfirebirdsql.cursor import FirebirdCursorWrapper              # NOQA isort:skip
+
+ROWS = 1000000
+
+
+class DequeBuffer:
+    """The previous popleft() based buffering, for comparison."""
+    def __init__(self, rows):
+        self._rows = collections.deque(rows)
+
+    def fetchone(self):
+        if len(self._rows):
+            return self._rows.popleft()
+        return None
+
+    def fetchmany(self, size=1):
+        rs = []
+        for i in range(size):
+            r = self.fetchone()
+            if not r:
+                break
+            rs.append(r)
+        return rs
+
+
+def new_cursor(rows):
+    cursor = FirebirdCursorWrapper.__new__(FirebirdCursorWrapper)
+    cursor._set_rows(rows)
+    return cursor
+
+
+def fetch_chunks(cursor):
+    n = 0
+    for rows in iter(lambda: cursor.fetchmany(GET_ITERATOR_CHUNK_SIZE), []):
+        n += len(rows)
+    assert n == ROWS
+
+
+def main():
+    rows = [(i, 'name %d' % i, i * 0.5) for i in range(ROWS)]
+    for name, factory in (('deque', DequeBuffer), ('offset', new_cursor)):
+        t = min(timeit.repeat(lambda: fetch_chunks(factory(list(rows))), number=1, repeat=5))
+        print('%-8s fetchmany(%d) x %d rows: %.3f sec' % (name, GET_ITERATOR_CHUNK_SIZE, ROWS, t))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""
+Recorded wire protocol stand-in for the benchmarks.
+
+RecordingSocketStream saves the bytes received from a Firebird server
+(after wire decryption) and ReplaySocketStream serves them back without a
+server, so a benchmark recorded once can be replayed anywhere. Replay only
+works as long as the client sends the same sequence of operations: record
+again after changing what goes over the wire.
+
+Both count round trips (a send() after data was received starts one) and
+the bytes received.
+"""
+import contextlib
+
+import firebirdsql.fbcore
+from firebirdsql.socketstream import SocketStream
+
+
+class CountingMixin:
+    def _count_send(self):
+        if self._received or not self.round_trips:
+            self.round_trips += 1
+        self._received = False
+
+    def _count_recv(self, b):
+        self._received = True
+        self.bytes_received += len(b)
+
+
+class RecordingSocketStream(CountingMixin):
+    def __init__(self, recording, *args, **kwargs):
+        self._stream = SocketStream(*args, **kwargs)
+        self._sock = self._stream._sock
+        self.recording = recording
+        self.round_trips = 0
+        self.bytes_received = 0
+        self._received = False
+
+    def recv(self, nbytes):
+        b = self._stream.recv(nbytes)
+        self.recording.append(b)
+        self._count_recv(b)
+        return b
+
+    def send(self, b):
+        self._count_send()
+        self._stream.send(b)
+
+    def close(self):
+        self._stream.close()
+
+    def set_translator(self, read_translator, write_translator):
+        self._stream.set_translator(read_translator, write_translator)
+
+
+class ReplaySocketStream(CountingMixin):
+    def __init__(self, data, offset):
+        self._sock = None
+        self.data = data
+        self.offset = offset
+        self.round_trips = 0
+        self.bytes_received = 0
+        self._received = False
+
+    def recv(self, nbytes):
+        start = self.offset[0]
+        b = self.data[start:start + nbytes]
+        if not b:
+            raise EOFError('The recording is exhausted, record the benchmark again')
+        self.offset[0] = start + len(b)
+        self._count_recv(b)
+        return b
+
+    def send(self, b):
+        self._count_send()
+
+    def close(self):
+        pass
+
+    def set_translator(self, read_translator, write_translator):
+        pass
+
+
+class Wire:
+    """
+    Install a socket stream factory in firebirdsql for the connections
+    opened in the block. mode is 'live', 'record' or 'replay'.
+    """
+    def __init__(self, mode, data=b''):
+        self.mode = mode
+        self.recording = []
+        self.data = data
+        self.offset = [0]
+        self.streams = []
+
+    def factory(self, *args, **kwargs):
+        if self.mode == 'replay':
+            stream = ReplaySocketStream(self.data, self.offset)
+        else:
+            stream = RecordingSocketStream(self.recording, *args, **kwargs)
+        self.streams.append(stream)
+        return stream
+
+    @property
+    def round_trips(self):
+        return sum(stream.round_trips for stream in self.streams)
+
+    @property
+    def bytes_received(self):
+        return sum(stream.bytes_received for stream in self.streams)
+
+    def recorded(self):
+        return b''.join(self.recording)
+
+    @contextlib.contextmanager
+    def installed(self):
+        socket_stream = firebirdsql.fbcore.SocketStream
+        firebirdsql.fbcore.SocketStream = self.factory
+        try:
+            yield self
+        finally:
+            firebirdsql.fbcore.SocketStream = socket_stream
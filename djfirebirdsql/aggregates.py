@@ -0,0 +1,37 @@
+"Firebird aggregate functions."
+from django.db import NotSupportedError
+from django.db.models import Aggregate, TextField, Value
+
+
+class List(Aggregate):
+    """
+    LIST(): the values of the group joined by delimiter on the server.
+    Takes the arguments of django.contrib.postgres' StringAgg, but Firebird
+    doesn't order the values of a LIST, so ordering can't be given.
+    """
+    function = 'LIST'
+    allow_distinct = True
+
+    def __init__(self, expression, delimiter=',', distinct=False, filter=None, ordering=(), **extra):
+        if ordering:
+            raise NotSupportedError('Firebird does not support ordering the values of LIST().')
+        if not hasattr(delimiter, 'resolve_expression'):
+            delimiter = Value(str(delimiter))
+        super().__init__(
+            expression, delimiter, distinct=distinct, filter=filter,
+            output_field=extra.pop('output_field', TextField()), **extra
+        )
+
+    def convert_value(self, value, expression, connection):
+        if not value:
+            return ''
+        return value
+
+
+def _string_agg_as_sql(self, compiler, connection, **extra_context):
+    # StringAgg of django.contrib.postgres as LIST()
+    if self.ordering:
+        raise NotSupportedError('Firebird does not support ordering the values of LIST().')
+    return Aggregate.as_sql(
+        self, compiler, connection, function=List.function, template=List.template, **extra_context
+    )
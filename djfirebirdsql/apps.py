@@ -0,0 +1,27 @@
+from django.apps import AppConfig
+from django.db import connections
+from django.db.models.signals import post_migrate
+
+
+def update_statistics(sender, using, plan=None, **kwargs):
+    """
+    Recompute the index statistics of the tables of a migrated app when
+    OPTIONS['update_statistics'] of the database is set.
+    """
+    connection = connections[using]
+    if connection.vendor != 'firebirdsql' or not connection.settings_dict['OPTIONS'].get('update_statistics'):
+        return
+    if not plan or sender.label not in {migration.app_label for migration, backwards in plan}:
+        return
+    models = [model for model in sender.get_models() if model._meta.managed and not model._meta.proxy]
+    if models:
+        with connection.schema_editor() as editor:
+            editor.update_statistics(*models)
+
+
+class FirebirdConfig(AppConfig):
+    name = 'djfirebirdsql'
+    verbose_name = 'Firebird'
+
+    def ready(self):
+        post_migrate.connect(update_statistics, dispatch_uid='djfirebirdsql.update_statistics')
@@ -3,6 +3,9 @@ Firebird database backend for Django.
 
 Requires firebirdsql: http://github.com/nakagami/pyfirebirdsql
 """
+import threading
+from contextlib import contextmanager
+
 from django.conf import settings
 from django.core.exceptions import ImproperlyConfigured
 from django.db.backends.base.base import BaseDatabaseWrapper
@@ -23,6 +26,9 @@ from .operations import DatabaseOperations                  # NOQA isort:skip
 from .schema import DatabaseSchemaEditor                    # NOQA isort:skip
 from .validation import DatabaseValidation                  # NOQA isort:skip
 from .cursor import FirebirdCursorWrapper, _quote_value     # NOQA isort:skip
+from .connection import BACKEND_OPTIONS, FirebirdConnection # NOQA isort:skip
+from .identity import IdentityAllocator                      # NOQA isort:skip
+from .querycache import QueryCache                           # NOQA isort:skip
 
 
 class DatabaseWrapper(BaseDatabaseWrapper):
@@ -120,6 +126,9 @@ class DatabaseWrapper(BaseDatabaseWrapper):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        self.statement_timeout = None
+        self.identity_allocator = IdentityAllocator(self)
+        self.query_cache = None
 
     def get_connection_params(self):
         settings_dict = self.settings_dict
@@ -130,6 +139,16 @@ class DatabaseWrapper(BaseDatabaseWrapper):
         conn_params = {'charset': 'UTF8'}
         conn_params['database'] = settings_dict['NAME']
         conn_params.update(settings_dict['OPTIONS'])
+        for option in BACKEND_OPTIONS:
+            conn_params.pop(option, None)
+        if settings_dict['OPTIONS'].get('replica_of'):
+            conn_params.setdefault('read_only', True)
+        for option in ('wire_crypt', 'wire_compression', 'tcp_nodelay', 'read_only', 'pipelining'):
+            if not isinstance(conn_params.get(option, False), bool):
+                raise ImproperlyConfigured("OPTIONS['%s'] must be True or False." % option)
+        socket_buffer_size = conn_params.get('socket_buffer_size')
+        if socket_buffer_size is not None and (not isinstance(socket_buffer_size, int) or socket_buffer_size <= 0):
+            raise ImproperlyConfigured("OPTIONS['socket_buffer_size'] must be a positive number of bytes.")
         if settings_dict['USER']:
             conn_params['user'] = settings_dict['USER']
         if settings_dict['PASSWORD']:
@@ -142,11 +161,45 @@ class DatabaseWrapper(BaseDatabaseWrapper):
 
     @async_unsafe
     def get_new_connection(self, conn_params):
-        connection = Database.connect(**conn_params)
+        connection = FirebirdConnection(**conn_params)
         return connection
 
     def init_connection_state(self):
         self._set_autocommit(self.get_autocommit())
+        self.statement_timeout = None
+        statement_timeout = self.settings_dict['OPTIONS'].get('statement_timeout')
+        if statement_timeout is not None:
+            self._set_statement_timeout(statement_timeout)
+
+    def _set_statement_timeout(self, timeout):
+        """Set the statement timeout of the attachment in milliseconds, 0 means no timeout."""
+        with self.wrap_database_errors:
+            with self.connection.cursor(factory=FirebirdCursorWrapper) as cursor:
+                cursor.execute('SET STATEMENT TIMEOUT %d MILLISECOND' % int(timeout))
+        self.statement_timeout = timeout
+
+    @contextmanager
+    def timeouts(self, statement_timeout=None, lock_timeout=None):
+        """
+        Context manager which overrides the statement timeout (milliseconds)
+        and the lock timeout (seconds) inside the block. The lock timeout
+        applies to the transactions started in the block.
+        """
+        self.ensure_connection()
+        old_statement_timeout = self.statement_timeout
+        old_lock_timeout = self.connection.lock_timeout
+        if statement_timeout is not None:
+            self._set_statement_timeout(statement_timeout)
+        if lock_timeout is not None:
+            self.connection.lock_timeout = lock_timeout
+        try:
+            yield
+        finally:
+            if self.connection is not None:
+                if statement_timeout is not None:
+                    self._set_statement_timeout(old_statement_timeout or 0)
+                    self.statement_timeout = old_statement_timeout
+                self.connection.lock_timeout = old_lock_timeout
 
     def _set_autocommit(self, autocommit):
         with self.wrap_database_errors:
@@ -154,7 +207,56 @@ class DatabaseWrapper(BaseDatabaseWrapper):
 
     @async_unsafe
     def create_cursor(self, name=None):
-        return self.connection.cursor(factory=FirebirdCursorWrapper)
+        cursor = self.connection.cursor(factory=FirebirdCursorWrapper)
+        cursor.db = self
+        return cursor
+
+    def _rollback(self):
+        if self.query_cache is not None:
+            self.query_cache.clear()
+        super()._rollback()
+
+    @contextmanager
+    def cache_queries(self, max_entries=None, max_rows=None):
+        """
+        Serve the SELECTs repeated in the block from the results of their
+        first execution, see djfirebirdsql.querycache. The limits default to
+        OPTIONS['query_cache_size'] (100) results of at most
+        OPTIONS['query_cache_max_rows'] (100) rows.
+        """
+        if self.query_cache is not None:
+            yield self.query_cache
+            return
+        options = self.settings_dict['OPTIONS']
+        self.query_cache = QueryCache(
+            options.get('query_cache_size', 100) if max_entries is None else max_entries,
+            options.get('query_cache_max_rows', 100) if max_rows is None else max_rows,
+            lambda table: [r[1] for r in self.introspection._get_references(table)],
+        )
+        try:
+            yield self.query_cache
+        finally:
+            self.query_cache = None
+
+    def cancel(self):
+        """
+        Cancel the statement running on this connection. It's safe to call
+        from another thread, the statement raises QueryCancelled.
+        """
+        connection = self.connection
+        if connection is not None:
+            connection.cancel()
+
+    @contextmanager
+    def cancel_after(self, seconds):
+        """Cancel the statement still running after `seconds` in the block."""
+        timer = threading.Timer(seconds, self.cancel)
+        timer.daemon = True
+        timer.start()
+        try:
+            yield
+        finally:
+            timer.cancel()
 
     def is_usable(self):
         return not self.connection.is_disconnect()
@@ -0,0 +1,306 @@
+"Firebird database cache backend."
+import base64
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.db import DatabaseCache as BaseDatabaseCache
+from django.db import DatabaseError, connections, router
+
+from .cursor import convert_sql
+
+
+class DatabaseCache(BaseDatabaseCache):
+    """
+    DatabaseCache which runs every operation in one statement.
+
+    set(), add(), touch() and set_many() are one EXECUTE BLOCK which also
+    culls the table when it holds more than MAX_ENTRIES rows. Culling deletes
+    the expired entries and then the entries which expire first, walking the
+    index createcachetable creates on expires.
+
+    OPTIONS['L1_TIMEOUT'] (seconds) enables a per process memory tier of at
+    most OPTIONS['L1_MAX_ENTRIES'] entries in front of the table.
+    """
+    def __init__(self, table, params):
+        super().__init__(table, params)
+        options = params.get('OPTIONS', {})
+        self._l1_timeout = options.get('L1_TIMEOUT', 0)
+        self._l1_max_entries = options.get('L1_MAX_ENTRIES', 1000)
+        self._l1 = OrderedDict()
+        self._l1_lock = threading.Lock()
+
+    def _l1_get_many(self, keys):
+        found = {}
+        if not self._l1_timeout:
+            return found
+        now = time.time()
+        with self._l1_lock:
+            for key in keys:
+                entry = self._l1.get(key)
+                if entry is None:
+                    continue
+                if entry[0] <= now:
+                    del self._l1[key]
+                    continue
+                self._l1.move_to_end(key)
+                found[key] = entry[1]
+        return {key: pickle.loads(pickled) for key, pickled in found.items()}
+
+    def _l1_set(self, key, pickled, timeout):
+        if not self._l1_timeout:
+            return
+        expires = time.time() + self._l1_timeout
+        if timeout is not None:
+            expires = min(expires, timeout)
+        with self._l1_lock:
+            self._l1[key] = (expires, pickled)
+            self._l1.move_to_end(key)
+            while len(self._l1) > self._l1_max_entries:
+                self._l1.popitem(last=False)
+
+    def _l1_delete_many(self, keys):
+        if not self._l1_timeout:
+            return
+        with self._l1_lock:
+            for key in keys:
+                self._l1.pop(key, None)
+
+    def _now(self):
+        now = datetime.utcnow() if settings.USE_TZ else datetime.now()
+        return now.replace(microsecond=0)
+
+    def _expires(self, timeout):
+        if timeout is None:
+            exp = datetime.max
+        elif settings.USE_TZ:
+            exp = datetime.utcfromtimestamp(timeout)
+        else:
+            exp = datetime.fromtimestamp(timeout)
+        return exp.replace(microsecond=0)
+
+    def _timestamp(self, expires):
+        if expires.year == datetime.max.year:
+            return None
+        if settings.USE_TZ:
+            return (expires - datetime(1970, 1, 1)).total_seconds()
+        return expires.timestamp()
+
+    def _cull_sql(self, connection):
+        quote_name = connection.ops.quote_name
+        table = quote_name(self._table)
+        if self._cull_frequency == 0:
+            cull = 'DELETE FROM %s;' % table
+        else:
+            cull = convert_sql(
+                'DELETE FROM %s WHERE %s < %%s; '
+                'IF (EXISTS (SELECT 1 FROM %s ROWS %d TO %d)) THEN DELETE FROM %s ORDER BY %s ROWS %d;' % (
+                    table,
+                    quote_name('expires'),
+                    table,
+                    self._max_entries + 1,
+                    self._max_entries + 1,
+                    table,
+                    quote_name('expires'),
+                    max(self._max_entries // self._cull_frequency, 1),
+                ),
+                [connection.ops.adapt_datetimefield_value(self._now())]
+            )
+        return 'IF (EXISTS (SELECT 1 FROM %s ROWS %d TO %d)) THEN BEGIN %s END' % (
+            table, self._max_entries + 1, self._max_entries + 1, cull
+        )
+
+    def _set_sql(self, connection, key, b64encoded, exp):
+        quote_name = connection.ops.quote_name
+        return convert_sql(
+            'UPDATE OR INSERT INTO %s (%s, %s, %s) VALUES (%%s, %%s, %%s) MATCHING (%s);' % (
+                quote_name(self._table),
+                quote_name('cache_key'),
+                quote_name('value'),
+                quote_name('expires'),
+                quote_name('cache_key'),
+            ),
+            [key, b64encoded, exp]
+        )
+
+    def _add_sql(self, connection, key, b64encoded, exp):
+        quote_name = connection.ops.quote_name
+        return convert_sql(
+            'MERGE INTO %s C USING RDB$DATABASE ON C.%s = %%s '
+            'WHEN MATCHED AND C.%s < %%s THEN UPDATE SET %s = %%s, %s = %%s '
+            'WHEN NOT MATCHED THEN INSERT (%s, %s, %s) VALUES (%%s, %%s, %%s);' % (
+                quote_name(self._table),
+                quote_name('cache_key'),
+                quote_name('expires'),
+                quote_name('value'),
+                quote_name('expires'),
+                quote_name('cache_key'),
+                quote_name('value'),
+                quote_name('expires'),
+            ),
+            [
+                key, connection.ops.adapt_datetimefield_value(self._now()),
+                b64encoded, exp,
+                key, b64encoded, exp,
+            ]
+        )
+
+    def _touch_sql(self, connection, key, exp):
+        quote_name = connection.ops.quote_name
+        return convert_sql(
+            'UPDATE %s SET %s = %%s WHERE %s = %%s;' % (
+                quote_name(self._table),
+                quote_name('expires'),
+                quote_name('cache_key'),
+            ),
+            [exp, key]
+        )
+
+    def _execute_block(self, connection, statements):
+        """
+        Run the cull and the statements in one EXECUTE BLOCK and return the
+        row count of the last statement.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute('EXECUTE BLOCK RETURNS (N INTEGER) AS BEGIN %s %s N = ROW_COUNT; SUSPEND; END' % (
+                self._cull_sql(connection), ' '.join(statements)
+            ))
+            row = cursor.fetchone()
+        return row[0] if row else 0
+
+    def get_many(self, keys, version=None):
+        if not keys:
+            return {}
+
+        key_map = {}
+        for key in keys:
+            self.validate_key(key)
+            key_map[self.make_key(key, version)] = key
+
+        result = self._l1_get_many(key_map)
+        missing = [key for key in key_map if key not in result]
+        if missing:
+            db = router.db_for_read(self.cache_model_class)
+            connection = connections[db]
+            quote_name = connection.ops.quote_name
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT %s, %s, %s FROM %s WHERE %s IN (%s) AND %s > %%s' % (
+                        quote_name('cache_key'),
+                        quote_name('value'),
+                        quote_name('expires'),
+                        quote_name(self._table),
+                        quote_name('cache_key'),
+                        ', '.join(['%s'] * len(missing)),
+                        quote_name('expires'),
+                    ),
+                    missing + [connection.ops.adapt_datetimefield_value(self._now())],
+                )
+                rows = cursor.fetchall()
+            # Expired entries are left to the cull.
+            for key, value, expires in rows:
+                pickled = base64.b64decode(connection.ops.process_clob(value).encode())
+                if self._l1_timeout:
+                    self._l1_set(key, pickled, self._timestamp(expires))
+                result[key] = pickle.loads(pickled)
+        return {key_map[key]: value for key, value in result.items()}
+
+    def _base_set(self, mode, key, value, timeout=DEFAULT_TIMEOUT):
+        timeout = self.get_backend_timeout(timeout)
+        db = router.db_for_write(self.cache_model_class)
+        connection = connections[db]
+        exp = connection.ops.adapt_datetimefield_value(self._expires(timeout))
+        if mode == 'touch':
+            statement = self._touch_sql(connection, key, exp)
+        else:
+            pickled = pickle.dumps(value, self.pickle_protocol)
+            b64encoded = base64.b64encode(pickled).decode('latin1')
+            if mode == 'set':
+                statement = self._set_sql(connection, key, b64encoded, exp)
+            else:
+                statement = self._add_sql(connection, key, b64encoded, exp)
+        try:
+            count = self._execute_block(connection, [statement])
+        except DatabaseError:
+            # To be threadsafe, updates/inserts are allowed to fail silently
+            self._l1_delete_many([key])
+            return False
+        if mode == 'touch':
+            self._l1_delete_many([key])
+        elif count:
+            self._l1_set(key, pickled, timeout)
+        return bool(count)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        timeout = self.get_backend_timeout(timeout)
+        db = router.db_for_write(self.cache_model_class)
+        connection = connections[db]
+        exp = connection.ops.adapt_datetimefield_value(self._expires(timeout))
+
+        # Chunks of (key, cache key, pickled value, statement) under the statement limit
+        chunks = [[]]
+        length = 0
+        for key, value in data.items():
+            cache_key = self.make_key(key, version=version)
+            self.validate_key(cache_key)
+            pickled = pickle.dumps(value, self.pickle_protocol)
+            statement = self._set_sql(
+                connection, cache_key, base64.b64encode(pickled).decode('latin1'), exp
+            )
+            size = len(statement.encode('utf-8')) + 1
+            if chunks[-1] and length + size > connection.ops.max_statement_length:
+                chunks.append([])
+                length = 0
+            chunks[-1].append((key, cache_key, pickled, statement))
+            length += size
+
+        failed_keys = []
+        for chunk in chunks:
+            if not chunk:
+                continue
+            try:
+                self._execute_block(connection, [entry[3] for entry in chunk])
+            except DatabaseError:
+                self._l1_delete_many([entry[1] for entry in chunk])
+                failed_keys.extend(entry[0] for entry in chunk)
+                continue
+            for key, cache_key, pickled, statement in chunk:
+                self._l1_set(cache_key, pickled, timeout)
+        return failed_keys
+
+    def _base_delete_many(self, keys):
+        if not keys:
+            return False
+
+        self._l1_delete_many(keys)
+        db = router.db_for_write(self.cache_model_class)
+        connection = connections[db]
+        quote_name = connection.ops.quote_name
+        # ROW_COUNT comes back with the statement, cursor.rowcount is another round trip
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'EXECUTE BLOCK RETURNS (N INTEGER) AS BEGIN '
+                'DELETE FROM %s WHERE %s IN (%s); N = ROW_COUNT; SUSPEND; END' % (
+                    quote_name(self._table),
+                    quote_name('cache_key'),
+                    ', '.join(['%s'] * len(keys)),
+                ),
+                keys,
+            )
+            row = cursor.fetchone()
+        return bool(row and row[0])
+
+    def has_key(self, key, version=None):
+        if self._l1_get_many([self.make_key(key, version=version)]):
+            return True
+        return super().has_key(key, version=version)
+
+    def clear(self):
+        if self._l1_timeout:
+            with self._l1_lock:
+                self._l1.clear()
+        super().clear()
@@ -0,0 +1,412 @@
+"""
+Columnar export of query results.
+
+iter_chunks() executes a queryset and reads the rows of each fetch from the
+wire straight into per column buffers, chosen by the sqltype of the
+column: integers, floats, dates and timestamps are copied as raw big endian
+values and converted a whole chunk at a time, NUMERIC and DECIMAL stay
+scaled integers, strings and BLOBs become offsets plus the data in the
+connection charset (Arrow's layout). Rows never become Python tuples
+and the model field converters aren't applied, so memory is proportional
+to chunk_size.
+
+The columns are NumPy arrays when NumPy can be imported, array.array
+otherwise.
+"""
+import struct
+import sys
+from array import array
+from decimal import Decimal
+
+from django.core.exceptions import EmptyResultSet
+from django.db import DEFAULT_DB_ALIAS, NotSupportedError, connections
+
+try:
+    import firebirdsql as Database
+except ImportError as e:
+    from django.core.exceptions import ImproperlyConfigured
+    raise ImproperlyConfigured("Error loading firebirdsql module: %s" % e)
+
+from firebirdsql.consts import (
+    PROTOCOL_VERSION13, isc_info_sql_stmt_select, ptype_lazy_send,
+    SQL_TYPE_BLOB, SQL_TYPE_BOOLEAN, SQL_TYPE_DATE, SQL_TYPE_DOUBLE, SQL_TYPE_FLOAT,
+    SQL_TYPE_INT64, SQL_TYPE_LONG, SQL_TYPE_SHORT, SQL_TYPE_TEXT, SQL_TYPE_TIME,
+    SQL_TYPE_TIME_TZ, SQL_TYPE_TIMESTAMP, SQL_TYPE_TIMESTAMP_TZ, SQL_TYPE_VARYING,
+)
+from firebirdsql.fbcore import Statement
+from firebirdsql.utils import bytes_to_bint, bytes_to_int
+from firebirdsql.wireprotocol import Packer, charset_map
+from firebirdsql.xsqlvar import calc_blr
+
+from .cursor import convert_sql
+from .exceptions import translate_error
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+DEFAULT_CHUNK_SIZE = 65536
+
+# Firebird dates are days since 1858-11-17
+_UNIX_EPOCH_DAY = 40587
+_DAY_MICROSECONDS = 86400 * 1000000
+
+
+class Strings:
+    """
+    Variable length values of a chunk: value i is
+    data[offsets[i]:offsets[i + 1]], in the Python encoding of the
+    connection charset for text columns and bytes when encoding is None.
+    """
+    def __init__(self, offsets, data, encoding):
+        self.offsets = offsets
+        self.data = data
+        self.encoding = encoding
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        value = self.data[self.offsets[i]:self.offsets[i + 1]]
+        return value.decode(self.encoding) if self.encoding else value
+
+    def tolist(self):
+        return [self[i] for i in range(len(self))]
+
+
+class Decimals:
+    """
+    NUMERIC and DECIMAL values of a chunk: value i is
+    unscaled[i] * 10 ** scale, unscaled is int64.
+    """
+    def __init__(self, unscaled, scale):
+        self.unscaled = unscaled
+        self.scale = scale
+
+    def __len__(self):
+        return len(self.unscaled)
+
+    def __getitem__(self, i):
+        return Decimal(int(self.unscaled[i])).scaleb(self.scale)
+
+    def tolist(self):
+        return [self[i] for i in range(len(self))]
+
+
+class Chunk:
+    """
+    Rows of one fetch chunk. columns[i] holds the values of column i and
+    nulls[i] is None when it has no NULL, otherwise a mask of the NULL
+    rows (whose values are undefined).
+    """
+    def __init__(self, names, columns, nulls):
+        self.names = names
+        self.columns = columns
+        self.nulls = nulls
+
+    def __len__(self):
+        return len(self.columns[0]) if self.columns else 0
+
+    def __getitem__(self, name):
+        return self.columns[self.names.index(name)]
+
+
+def _unpack(fmt, buf, n):
+    # Big endian fixed width values as an array.array
+    values = array(fmt)
+    values.frombytes(bytes(buf[:n * values.itemsize]))
+    if sys.byteorder == 'little':
+        values.byteswap()
+    return values
+
+
+class _FixedColumn:
+    "Raw values of a fixed length type, converted when the chunk is full."
+    def __init__(self, xsqlvar, size, encoding=None):
+        self.sqltype = xsqlvar.sqltype
+        self.scale = xsqlvar.sqlscale
+        self.length = xsqlvar.io_length()
+        self.buffer = bytearray(size * self.length)
+        self.nulls = bytearray(size)
+        self.has_null = False
+
+    def put(self, i, raw):
+        self.buffer[i * self.length:(i + 1) * self.length] = raw
+
+    def null(self, i):
+        self.nulls[i] = 1
+        self.has_null = True
+
+    def flush(self, connection, trans_handle):
+        pass
+
+    def values(self, n):
+        sqltype, buf = self.sqltype, self.buffer
+        if numpy is not None:
+            if sqltype in (SQL_TYPE_SHORT, SQL_TYPE_LONG, SQL_TYPE_INT64):
+                values = numpy.frombuffer(buf, '>i%d' % self.length, n).astype(numpy.int64)
+                if self.scale:
+                    return Decimals(values, self.scale)
+                return values
+            if sqltype in (SQL_TYPE_FLOAT, SQL_TYPE_DOUBLE):
+                return numpy.frombuffer(buf, '>f%d' % self.length, n).astype('=f%d' % self.length)
+            if sqltype == SQL_TYPE_BOOLEAN:
+                return numpy.frombuffer(buf, numpy.uint8, n).astype(bool)
+            if sqltype == SQL_TYPE_DATE:
+                days = numpy.frombuffer(buf, '>i4', n).astype(numpy.int64) - _UNIX_EPOCH_DAY
+                return days.astype('datetime64[D]')
+            if sqltype in (SQL_TYPE_TIME, SQL_TYPE_TIME_TZ):
+                # 1/10000 seconds since midnight (UTC for TIME WITH TIME ZONE)
+                times = numpy.ndarray(n, '>u4', buf, 0, (self.length,))
+                return (times.astype(numpy.int64) * 100).astype('timedelta64[us]')
+            # TIMESTAMP, TIMESTAMP WITH TIME ZONE in UTC
+            days = numpy.ndarray(n, '>i4', buf, 0, (self.length,)).astype(numpy.int64) - _UNIX_EPOCH_DAY
+            times = numpy.ndarray(n, '>u4', buf, 4, (self.length,)).astype(numpy.int64)
+            return (days * _DAY_MICROSECONDS + times * 100).astype('datetime64[us]')
+
+        if sqltype in (SQL_TYPE_SHORT, SQL_TYPE_LONG, SQL_TYPE_INT64):
+            values = array('q', _unpack('i' if self.length == 4 else 'q', buf, n))
+            if self.scale:
+                return Decimals(values, self.scale)
+            return values
+        if sqltype in (SQL_TYPE_FLOAT, SQL_TYPE_DOUBLE):
+            return _unpack('f' if self.length == 4 else 'd', buf, n)
+        if sqltype == SQL_TYPE_BOOLEAN:
+            return array('B', buf[:n])
+        if sqltype == SQL_TYPE_DATE:
+            # days since 1970-01-01
+            return array('i', [d - _UNIX_EPOCH_DAY for d in _unpack('i', buf, n)])
+        if sqltype in (SQL_TYPE_TIME, SQL_TYPE_TIME_TZ):
+            # microseconds since midnight
+            return array('q', [t * 100 for (t,) in struct.iter_unpack('>I%dx' % (self.length - 4), buf[:n * self.length])])
+        # microseconds since 1970-01-01
+        return array('q', [
+            (d - _UNIX_EPOCH_DAY) * _DAY_MICROSECONDS + t * 100
+            for d, t in struct.iter_unpack('>iI%dx' % (self.length - 8), buf[:n * self.length])
+        ])
+
+    def null_mask(self, n):
+        if not self.has_null:
+            return None
+        if numpy is not None:
+            return numpy.frombuffer(self.nulls, bool, n).copy()
+        return self.nulls[:n]
+
+
+class _StringColumn(_FixedColumn):
+    "CHAR, VARCHAR and BLOB values as offsets plus data."
+    def __init__(self, xsqlvar, size, encoding=None):
+        self.sqltype = xsqlvar.sqltype
+        self.length = xsqlvar.io_length()
+        # Binary BLOBs and OCTETS strings stay bytes
+        text = xsqlvar.sqlsubtype == 1 if self.sqltype == SQL_TYPE_BLOB else xsqlvar.sqlsubtype != 1
+        self.encoding = encoding if text else None
+        self.offsets = array('q', [0]) * (size + 1)
+        self.data = bytearray()
+        self.nulls = bytearray(size)
+        self.has_null = False
+        # BLOB ids of the last fetch, read after its response
+        self.blob_ids = []
+
+    def put(self, i, raw):
+        if self.sqltype == SQL_TYPE_BLOB:
+            self.blob_ids.append((i, raw))
+            return
+        if self.sqltype == SQL_TYPE_TEXT:
+            raw = raw.rstrip(b' ')
+        self.data += raw
+        self.offsets[i + 1] = len(self.data)
+
+    def null(self, i):
+        super().null(i)
+        if self.sqltype == SQL_TYPE_BLOB:
+            self.blob_ids.append((i, None))
+        else:
+            self.offsets[i + 1] = len(self.data)
+
+    def flush(self, connection, trans_handle):
+        for i, blob_id in self.blob_ids:
+            if blob_id is not None:
+                _read_blob(connection, blob_id, trans_handle, self.data)
+            self.offsets[i + 1] = len(self.data)
+        self.blob_ids = []
+
+    def values(self, n):
+        offsets = self.offsets[:n + 1]
+        if numpy is not None:
+            offsets = numpy.frombuffer(offsets, numpy.int64).copy()
+        return Strings(offsets, bytes(self.data), self.encoding)
+
+
+class _ObjectColumn(_FixedColumn):
+    "INT128 and DECFLOAT values converted by the driver."
+    def __init__(self, xsqlvar, size, encoding=None):
+        self.xsqlvar = xsqlvar
+        self.length = xsqlvar.io_length()
+        self.objects = [None] * size
+        self.nulls = bytearray(size)
+        self.has_null = False
+
+    def put(self, i, raw):
+        self.objects[i] = self.xsqlvar.value(raw)
+
+    def values(self, n):
+        if numpy is not None:
+            values = numpy.empty(n, object)
+            values[:] = self.objects[:n]
+            return values
+        return self.objects[:n]
+
+
+_fixed_types = {
+    SQL_TYPE_SHORT, SQL_TYPE_LONG, SQL_TYPE_INT64, SQL_TYPE_FLOAT, SQL_TYPE_DOUBLE, SQL_TYPE_BOOLEAN,
+    SQL_TYPE_DATE, SQL_TYPE_TIME, SQL_TYPE_TIME_TZ, SQL_TYPE_TIMESTAMP, SQL_TYPE_TIMESTAMP_TZ,
+}
+_string_types = {SQL_TYPE_TEXT, SQL_TYPE_VARYING, SQL_TYPE_BLOB}
+
+
+def _column(xsqlvar, size, encoding):
+    if xsqlvar.sqltype in _fixed_types:
+        return _FixedColumn(xsqlvar, size)
+    if xsqlvar.sqltype in _string_types:
+        return _StringColumn(xsqlvar, size, encoding)
+    return _ObjectColumn(xsqlvar, size)
+
+
+def _read_blob(connection, blob_id, trans_handle, data):
+    connection._op_open_blob(blob_id, trans_handle)
+    h, oid, buf = connection._op_response()
+    n = 1   # 0, 1: more data 2: no more data
+    while n != 2:
+        connection._op_get_segment(h)
+        n, oid, buf = connection._op_response()
+        while buf:
+            ln = bytes_to_int(buf[:2])
+            data += buf[2:ln + 2]
+            buf = buf[ln + 2:]
+    connection._op_close_blob(h)
+    if connection.accept_type == ptype_lazy_send:
+        connection.lazy_response_count += 1
+    else:
+        connection._op_response()
+
+
+def _fetch(connection, stmt_handle, blr, columns, start, count):
+    """
+    Fetch up to count rows into the columns from row start. Return the
+    number of rows read and whether there are more.
+    """
+    p = Packer()
+    p.pack_int(connection.op_fetch)
+    p.pack_int(stmt_handle)
+    p.pack_bytes(blr)
+    p.pack_int(0)
+    p.pack_int(count)
+    connection.sock.send(p.get_buffer())
+
+    recv_channel = connection.recv_channel
+    op_code = bytes_to_bint(recv_channel(4))
+    while op_code == connection.op_dummy:
+        op_code = bytes_to_bint(recv_channel(4))
+    while op_code == connection.op_response and connection.lazy_response_count:
+        connection.lazy_response_count -= 1
+        connection._parse_op_response()
+        op_code = bytes_to_bint(recv_channel(4))
+    if op_code != connection.op_fetch_response:
+        if op_code == connection.op_response:
+            connection._parse_op_response()
+        raise Database.InternalError("op_fetch_response:op_code = %d" % (op_code,))
+
+    b = recv_channel(8)
+    status = bytes_to_bint(b[:4])
+    count = bytes_to_bint(b[4:8])
+    i = start
+    protocol13 = connection.accept_version >= PROTOCOL_VERSION13
+    null_bytes = (len(columns) + 7) // 8
+    while count:
+        if protocol13:
+            null_indicator = int.from_bytes(recv_channel(null_bytes, word_alignment=True), 'little')
+        for j, column in enumerate(columns):
+            if protocol13 and null_indicator & (1 << j):
+                column.null(i)
+                continue
+            ln = column.length
+            if ln < 0:
+                ln = bytes_to_bint(recv_channel(4))
+            raw = recv_channel(ln, word_alignment=True)
+            if not protocol13 and recv_channel(4) != b'\0\0\0\0':
+                column.null(i)
+            else:
+                column.put(i, raw)
+        i += 1
+        b = recv_channel(12)
+        status = bytes_to_bint(b[4:8])
+        count = bytes_to_bint(b[8:])
+    return i - start, status != 100
+
+
+def iter_sql_chunks(sql, params=None, using=DEFAULT_DB_ALIAS, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Execute a SELECT on the `using` database and yield its rows as Chunks of
+    at most chunk_size rows.
+    """
+    wrapper = connections[using]
+    query = convert_sql(sql, params)
+    with wrapper.cursor() as django_cursor:
+        cursor = django_cursor.cursor
+        transaction = cursor.transaction
+        connection = transaction.connection
+        encoding = charset_map.get(connection.charset, connection.charset)
+        connection.running = True
+        stmt = None
+        failed = False
+        try:
+            transaction.check_trans_handle()
+            stmt = Statement(transaction)
+            stmt.prepare(query)
+            if stmt.stmt_type != isc_info_sql_stmt_select:
+                raise NotSupportedError('iter_chunks() only supports SELECT statements.')
+            names = [x.aliasname.lower() for x in stmt.xsqlda]
+            blr = calc_blr(stmt.xsqlda)
+            trans_handle = transaction.trans_handle
+            connection._op_execute(stmt.handle, trans_handle, [])
+            connection._op_response()
+            more = True
+            while more:
+                columns = [_column(x, chunk_size, encoding) for x in stmt.xsqlda]
+                n = 0
+                while more and n < chunk_size:
+                    fetched, more = _fetch(connection, stmt.handle, blr, columns, n, chunk_size - n)
+                    for column in columns:
+                        column.flush(connection, trans_handle)
+                    n += fetched
+                if n:
+                    yield Chunk(names, [c.values(n) for c in columns], [c.null_mask(n) for c in columns])
+        except (Database.OperationalError, Database.IntegrityError, Database.DataError) as e:
+            failed = True
+            e._message = "{}: {}".format(query, e._message)
+            translated = translate_error(e)
+            if translated is not None:
+                raise translated from e
+            raise e
+        finally:
+            # Also when the generator is closed before the last chunk
+            connection.running = False
+            if stmt is not None:
+                stmt.drop()
+            if transaction._autocommit and not failed:
+                transaction._connection.commit()
+
+
+def iter_chunks(queryset, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Yield the rows of a queryset (usually values_list()) as Chunks of at
+    most chunk_size rows, with the columns in the order of its SELECT.
+    """
+    compiler = queryset.query.get_compiler(queryset.db)
+    try:
+        sql, params = compiler.as_sql()
+    except EmptyResultSet:
+        return
+    yield from iter_sql_chunks(sql, params, queryset.db, chunk_size)
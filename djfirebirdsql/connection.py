@@ -0,0 +1,252 @@
+import select
+import socket
+import struct
+import threading
+import zlib
+
+import firebirdsql as Database
+from firebirdsql.consts import (
+    isc_tpb_wait, isc_tpb_nowait, isc_tpb_lock_timeout, isc_tpb_autocommit,
+    isc_tpb_read, isc_tpb_write,
+    PROTOCOL_VERSION12, ptype_lazy_send,
+)
+from firebirdsql.fbcore import transaction_parameter_block
+from firebirdsql.wireprotocol import Packer
+
+# fb_cancel_operation() options
+fb_cancel_disable = 1
+fb_cancel_enable = 2
+fb_cancel_raise = 3
+fb_cancel_abort = 4
+
+# Protocol type flag of the Firebird 3.0 wire protocol for zlib compression
+pflag_compress = 0x100
+ptype_MASK = 0xff
+
+# DATABASES OPTIONS used by the backend, not passed to firebirdsql.connect()
+BACKEND_OPTIONS = (
+    'statement_timeout', 'update_statistics', 'replica_of', 'max_replication_lag',
+    'query_cache_size', 'query_cache_max_rows', 'bulk_insert',
+)
+
+
+def _transaction_parameter_block(isolation_level, autocommit, lock_timeout, read_only=False):
+    tpb = transaction_parameter_block[isolation_level]
+    if read_only:
+        tpb = bytes([isc_tpb_read if b == isc_tpb_write else b for b in tpb])
+    if lock_timeout == 0:
+        tpb = bytes([isc_tpb_nowait if b == isc_tpb_wait else b for b in tpb])
+    elif lock_timeout is not None:
+        tpb += bytes([isc_tpb_lock_timeout, 4]) + int(lock_timeout).to_bytes(4, 'little')
+    if autocommit:
+        tpb += bytes([isc_tpb_autocommit])
+    return tpb
+
+
+class FirebirdTransaction(Database.Transaction):
+    def _begin(self):
+        tpb = _transaction_parameter_block(
+            self.connection.isolation_level, self._autocommit, self.connection.lock_timeout,
+            self.connection.read_only,
+        )
+        self.connection._op_transaction(tpb)
+        (h, oid, buf) = self.connection._op_response()
+        self._trans_handle = None if h < 0 else h
+        self.is_dirty = False
+
+
+class CompressedSocketStream:
+    """
+    firebirdsql SocketStream wrapper which compresses the wire protocol with
+    zlib after start(), from the next packet the client sends: the server
+    starts compressing once the connection is accepted. Wire encryption is
+    applied to the compressed stream.
+    """
+    recv_size = 32768
+
+    def __init__(self, stream):
+        self._stream = stream
+        self._sock = stream._sock
+        self._started = False
+        self._compressor = None
+        self._decompressor = None
+        self._buffer = b''
+        self._offset = 0
+
+    def start(self):
+        self._started = True
+
+    @property
+    def buffered(self):
+        return len(self._buffer) - self._offset
+
+    def recv(self, nbytes):
+        if self._decompressor is None:
+            return self._stream.recv(nbytes)
+        while not self.buffered:
+            b = self._stream.recv(max(nbytes, self.recv_size))
+            if not b:
+                return b
+            self._buffer = self._decompressor.decompress(b)
+            self._offset = 0
+        b = self._buffer[self._offset:self._offset + nbytes]
+        self._offset += len(b)
+        return b
+
+    def send(self, b):
+        if self._started and self._compressor is None:
+            self._compressor = zlib.compressobj()
+            self._decompressor = zlib.decompressobj()
+        if self._compressor is not None:
+            b = self._compressor.compress(b) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+        self._stream.send(b)
+
+    def close(self):
+        self._stream.close()
+
+    def set_translator(self, read_translator, write_translator):
+        self._stream.set_translator(read_translator, write_translator)
+
+
+class FirebirdConnection(Database.Connection):
+    """
+    firebirdsql Connection which starts its transactions with the
+    lock timeout (in seconds) of the connection. 0 means no wait.
+    With read_only the transactions are read only.
+
+    wire_compression asks the server to compress the wire protocol
+    (Firebird 3.0 built with zlib, WireCompression isn't needed on the
+    server); wire_compressed tells whether it does. socket_buffer_size sets
+    the send and receive buffers of the socket and tcp_nodelay=False lets
+    the kernel coalesce small packets.
+
+    With pipelining FirebirdCursorWrapper sends the packets of a statement
+    without waiting for the responses they don't depend on (Firebird 3.0).
+
+    Packets are sent under a lock so that cancel() can be called from
+    another thread while a statement is running.
+    """
+    _sock_stream = None
+    _accept_type = None
+
+    def __init__(self, *args, lock_timeout=None, read_only=False, wire_compression=False,
+                 socket_buffer_size=None, tcp_nodelay=True, pipelining=False, **kwargs):
+        self.lock_timeout = lock_timeout
+        self.read_only = read_only
+        self.pipelining = pipelining
+        self.wire_compression = wire_compression
+        self.wire_compressed = False
+        self.socket_buffer_size = socket_buffer_size
+        self.tcp_nodelay = tcp_nodelay
+        self.running = False
+        self._send_lock = threading.Lock()
+        super().__init__(*args, **kwargs)
+        sock_send = self.sock.send
+
+        def send(b):
+            with self._send_lock:
+                sock_send(b)
+        self.sock.send = send
+
+    @property
+    def sock(self):
+        return self._sock_stream
+
+    @sock.setter
+    def sock(self, stream):
+        # firebirdsql opens the SocketStream in Connection.__init__()
+        if stream is not None:
+            sock = stream._sock
+            if sock is not None:
+                if self.socket_buffer_size:
+                    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.socket_buffer_size)
+                    sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, self.socket_buffer_size)
+                if not self.tcp_nodelay:
+                    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 0)
+            if self.wire_compression:
+                stream = CompressedSocketStream(stream)
+        self._sock_stream = stream
+
+    @property
+    def accept_type(self):
+        return self._accept_type
+
+    @accept_type.setter
+    def accept_type(self, accept_type):
+        # firebirdsql compares accept_type with ptype_lazy_send
+        self._accept_type = accept_type & ptype_MASK
+        self.wire_compressed = bool(accept_type & pflag_compress)
+        if self.wire_compressed:
+            self.sock.start()
+
+    @property
+    def wire_encrypted(self):
+        stream = getattr(self.sock, '_stream', self.sock)
+        return getattr(stream, 'read_translator', None) is not None
+
+    def _op_connect(self, auth_plugin_name, wire_crypt):
+        if not self.wire_compression:
+            return super()._op_connect(auth_plugin_name, wire_crypt)
+        # The protocols of firebirdsql, with compression from version 13 (Firebird 3.0)
+        protocols = b''
+        for version, weight in ((10, 2), (11, 4), (12, 6), (13, 8), (14, 10), (15, 12), (16, 14), (17, 16)):
+            ptype = ptype_lazy_send
+            if version >= 13:
+                ptype |= pflag_compress
+            if version > 10:
+                version |= 0xffff8000
+            protocols += struct.pack('>IIIII', version, 1, 0, ptype, weight)
+        p = Packer()
+        p.pack_int(self.op_connect)
+        p.pack_int(self.op_attach)
+        p.pack_int(3)   # CONNECT_VERSION
+        p.pack_int(1)   # arch_generic
+        p.pack_bytes(self.str_to_bytes(self.filename if self.filename else ''))
+        p.pack_int(8)
+        p.pack_bytes(self.uid(auth_plugin_name, wire_crypt))
+        self.sock.send(p.get_buffer() + protocols)
+
+    def recv_channel(self, nbytes, word_alignment=False):
+        if not self.wire_compressed or self.timeout is None:
+            return super().recv_channel(nbytes, word_alignment)
+        # firebirdsql's, without waiting for the socket while decompressed data is buffered
+        n = nbytes
+        if word_alignment and (n % 4):
+            n += 4 - nbytes % 4
+        r = b''
+        while n:
+            if not self.sock.buffered and select.select([self.sock._sock], [], [], self.timeout)[0] == []:
+                break
+            b = self.sock.recv(n)
+            if not b:
+                break
+            r += b
+            n -= len(b)
+        if len(r) < nbytes:
+            raise Database.OperationalError('Can not recv() packets')
+        return r[:nbytes]
+
+    def cancel(self, kind=fb_cancel_raise):
+        """
+        Send op_cancel. The server stops the running statement and it fails
+        with isc_cancelled. No response is sent for op_cancel.
+        """
+        sock = self.sock
+        if sock is None or self.db_handle is None or not self.running:
+            return
+        if self.accept_version < PROTOCOL_VERSION12:
+            raise Database.NotSupportedError()
+        p = Packer()
+        p.pack_int(self.op_cancel)
+        p.pack_int(kind)
+        sock.send(p.get_buffer())
+
+    def begin(self):
+        if self._transaction is None:
+            self._transaction = FirebirdTransaction(self, self._autocommit)
+        super().begin()
+
+    def execute_immediate(self, query):
+        if self._transaction is None:
+            self._transaction = FirebirdTransaction(self, self._autocommit)
+        super().execute_immediate(query)
@@ -1,10 +1,31 @@
+import os
 import sys
 import firebirdsql as Database
-from django.db.backends.base.creation import BaseDatabaseCreation
+import firebirdsql.services
+from django.db.backends.base.creation import BaseDatabaseCreation, TEST_DATABASE_PREFIX
+
+from .connection import BACKEND_OPTIONS, FirebirdConnection
+
+# isc_io_error, isc_io_open_err: the database file can't be opened
+DATABASE_MISSING_CODES = frozenset([335544344, 335544734])
+
 
 class DatabaseCreation(BaseDatabaseCreation):
     def _get_test_db_name(self):
-        return self.connection.settings_dict['NAME']
+        """
+        TEST['NAME'] or the NAME file with the 'test_' prefix.
+        """
+        test_database_name = self.connection.settings_dict['TEST']['NAME']
+        if test_database_name:
+            return test_database_name
+        dirname, basename = os.path.split(self.connection.settings_dict['NAME'])
+        return os.path.join(dirname, TEST_DATABASE_PREFIX + basename)
+
+    def get_test_db_clone_settings(self, suffix):
+        # /path/to/test_db.fdb -> /path/to/test_db_1.fdb
+        orig_settings_dict = self.connection.settings_dict
+        root, ext = os.path.splitext(orig_settings_dict['NAME'])
+        return {**orig_settings_dict, 'NAME': '{}_{}{}'.format(root, suffix, ext)}
 
     def _get_connection_params(self, **overrides):
         settings_dict = self.connection.settings_dict
@@ -21,6 +42,8 @@ class DatabaseCreation(BaseDatabaseCreation):
         if 'ROLE' in settings_dict:
             conn_params['role'] = settings_dict['ROLE']
         conn_params.update(settings_dict['OPTIONS'])
+        for option in BACKEND_OPTIONS:
+            conn_params.pop(option, None)
         conn_params.update(overrides)
         return conn_params
 
@@ -46,7 +69,7 @@ class DatabaseCreation(BaseDatabaseCreation):
     def _create_database(self, test_database_name, verbosity):
         conn = Database.create_database(
                 host=self.connection.settings_dict['HOST'],
-                database=self.connection.settings_dict['NAME'],
+                database=test_database_name,
                 user=self.connection.settings_dict['USER'],
                 password=self.connection.settings_dict['PASSWORD'],
                 page_size=self.connection.settings_dict.get('PAGE_SIZE', 32768),
@@ -58,10 +81,70 @@ class DatabaseCreation(BaseDatabaseCreation):
         Internal implementation - creates the test db tables.
         """
         test_database_name = self._get_test_db_name()
+        if keepdb and self._database_exists(test_database_name):
+            return test_database_name
+        if not autoclobber and self._database_exists(test_database_name):
+            confirm = input(
+                "Type 'yes' if you would like to try deleting the test "
+                "database '%s', or 'no' to cancel: " % test_database_name)
+            if confirm != 'yes':
+                self.log('Tests cancelled.')
+                sys.exit(1)
+        # create_database() overwrites an existing database
         self._create_database(test_database_name, verbosity)
         return test_database_name
 
+    def _database_exists(self, database_name):
+        try:
+            FirebirdConnection(**self._get_connection_params(database=database_name)).close()
+        except Database.Error as e:
+            # Authentication, lock and other errors aren't a missing database
+            if getattr(e, 'gds_codes', set()) & DATABASE_MISSING_CODES:
+                return False
+            raise
+        return True
+
+    def _is_local_host(self):
+        return self.connection.settings_dict['HOST'] in ('', 'localhost', '127.0.0.1', '::1')
+
+    def _clone_test_db(self, suffix, verbosity, keepdb=False):
+        """
+        Clone the migrated test database with a backup and restore through
+        the services API, which reads a consistent snapshot even while other
+        attachments are open. The server must be local: the backup file is
+        removed with the file system.
+        """
+        source_database_name = self.connection.settings_dict['NAME']
+        target_database_name = self.get_test_db_clone_settings(suffix)['NAME']
+        if keepdb and self._database_exists(target_database_name):
+            return
+        if not self._is_local_host():
+            raise NotImplementedError(
+                "Test databases can only be cloned on a local Firebird server, "
+                "the backup file of a remote clone would be left on the server."
+            )
+        self.connection.close()
+        self._clone_with_backup(source_database_name, target_database_name, verbosity)
+
+    def _clone_with_backup(self, source_database_name, target_database_name, verbosity):
+        settings_dict = self.connection.settings_dict
+        backup_filename = target_database_name + '.fbk'
+        callback = self.log if verbosity >= 3 else None
+        services = firebirdsql.services.connect(
+            host=settings_dict['HOST'] or 'localhost',
+            port=settings_dict['PORT'] or None,
+            user=settings_dict['USER'],
+            password=settings_dict['PASSWORD'],
+        )
+        try:
+            services.backup_database(source_database_name, backup_filename, callback=callback)
+            services.restore_database(backup_filename, target_database_name, replace=True, callback=callback)
+        finally:
+            services.close()
+            if os.path.isfile(backup_filename):
+                os.remove(backup_filename)
+
     def _destroy_test_db(self, test_database_name, verbosity):
-        connection = Database.connect(**self._get_connection_params(database=test_database_name))
+        connection = FirebirdConnection(**self._get_connection_params(database=test_database_name))
         connection.drop_database()
         connection.close()
@@ -1,16 +1,30 @@
 import datetime
+import re
 import uuid
-import collections
 import binascii
 import enum
+from collections import namedtuple
 from django.utils import timezone
 from django.db.utils import InterfaceError
+from . import replication
+from .exceptions import translate_error
 
 try:
     import firebirdsql as Database
 except ImportError as e:
     raise ImproperlyConfigured("Error loading firebirdsql module: %s" % e)
 
+from firebirdsql.consts import (
+    isc_info_sql_stmt_select, isc_info_sql_stmt_exec_procedure, ptype_lazy_send, SQL_TYPE_BLOB,
+)
+from firebirdsql.fbcore import Statement, _fetch_generator
+from firebirdsql.xsqlvar import calc_blr, parse_xsqlda
+
+ColumnDescription = namedtuple(
+    'ColumnDescription', 'name type_code display_size internal_size precision scale null_ok'
+)
+
+
 def _quote_value(value):
     if isinstance(value, enum.Enum):
         value = value.value
@@ -51,26 +65,176 @@ def convert_sql(query, params):
             query = query % tuple(converted_params)
     return query
 
+# Statements without result rows or output parameters, which can be executed
+# without waiting for their prepare
+_execute_only_re = re.compile(r'\s*(INSERT|UPDATE|DELETE|MERGE|CREATE|RECREATE|ALTER|DROP|COMMENT)\b', re.IGNORECASE)
+# Identity restarts, also in the EXECUTE STATEMENTs of sequence_reset_sql()
+_restart_re = re.compile(
+    r'\bALTER\s+TABLE\s+(?:"([^"]+)"|([\w$]+))\s+ALTER\s+(?:COLUMN\s+)?\S+\s+RESTART\b', re.IGNORECASE
+)
+
+
+def _read_responses(readers):
+    """
+    Call the response readers of pipelined packets in order and raise the
+    first error after all of them, so that no response is left unread.
+    """
+    results = []
+    error = None
+    for read in readers:
+        try:
+            results.append(read())
+        except (Database.OperationalError, Database.IntegrityError, Database.DataError) as e:
+            results.append(None)
+            if error is None:
+                error = e
+    if error is not None:
+        raise error
+    return results
+
 
 class FirebirdCursorWrapper(Database.Cursor):
+    # DatabaseWrapper which created the cursor, for its query cache and its
+    # identity blocks which are stale after a RESTART
+    db = None
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self._rows = collections.deque()
+        # Result rows of the last execute(), fetched up to self._offset
+        self._rows = []
+        self._offset = 0
         self.closed = False
         self.query = ''
+        self._description = None
+        self._description_xsqlda = None
+        # Description of a result served by the query cache
+        self._cached_description = None
 
     def execute(self, query, params=None):
         if self.closed:
             raise InterfaceError('Cursor is closed')
         self.query = convert_sql(query, params)
+        self._cached_description = None
+        # The cache of the cache_queries() block running now
+        query_cache = None if self.db is None else self.db.query_cache
+        if query_cache is not None:
+            cached = query_cache.get(self.query)
+            if cached is not None:
+                rows, self._cached_description = cached
+                self._set_rows(list(rows))
+                return
+        connection = self._transaction._connection
+        connection.running = True
         try:
-            super().execute(self.query)
+            if connection.pipelining and connection.accept_type == ptype_lazy_send:
+                self._execute_pipelined(self.query)
+            else:
+                super().execute(self.query)
+                self._set_rows(super().fetchall())
         except (Database.OperationalError, Database.IntegrityError, Database.DataError) as e:
             e._message = "{}: {}".format(self.query, e._message)
+            translated = translate_error(e)
+            if translated is not None:
+                raise translated from e
             raise e
-        self._rows = collections.deque(super().fetchall())
+        finally:
+            connection.running = False
         if self._transaction._autocommit:
             self._transaction._connection.commit()
+        # After the commit: invalidating can query the catalog
+        if query_cache is not None:
+            query_cache.executed(self.query, self._rows, self.description)
+        if self.db is not None:
+            replication.executed(self.query)
+            for quoted, name in _restart_re.findall(self.query):
+                self.db.identity_allocator.invalidate(quoted or name)
+
+    def _execute_pipelined(self, query):
+        """
+        execute() and fetch all rows sending packets without waiting for the
+        responses they don't depend on (Firebird 3.0 lazy send): the execute
+        and the autocommit commit of INSERT, UPDATE, DELETE and DDL with the
+        prepare, the first fetch of a SELECT with its execute.
+        """
+        transaction = self.transaction
+        connection = transaction.connection
+        transaction.check_trans_handle()
+        transaction.is_dirty = True
+        trans_handle = transaction.trans_handle
+        commit = transaction._autocommit and connection._transaction is transaction
+        execute_only = _execute_only_re.match(query) and 'RETURNING' not in query.upper()
+
+        def read_commit():
+            connection._op_response()
+            transaction._trans_handle = None
+            transaction.is_dirty = False
+
+        # The free of the previous statement and the allocate are lazy
+        if self.stmt:
+            self.stmt.drop()
+        self.stmt = stmt = Statement(transaction)
+        connection._op_prepare_statement(stmt.handle, trans_handle, query)
+        readers = [connection._op_response] * (connection.lazy_response_count + 1)
+        connection.lazy_response_count = 0
+        prepared = len(readers) - 1
+        if execute_only:
+            connection._op_execute(stmt.handle, trans_handle, [])
+            readers.append(connection._op_response)
+            if commit:
+                connection._op_commit(trans_handle)
+                readers.append(read_commit)
+        results = _read_responses(readers)
+        # The allocate is the last lazy packet
+        stmt.handle = results[prepared - 1][0]
+        stmt.plan = None
+        stmt.stmt_type, stmt.xsqlda = parse_xsqlda(results[prepared][2], connection, stmt.handle)
+        self._fetch_records = None
+        self._callproc_result = None
+        rows = []
+
+        if execute_only:
+            pass
+        elif stmt.stmt_type == isc_info_sql_stmt_exec_procedure:
+            def read_execute2():
+                row = connection._op_sql_response(stmt.xsqlda)
+                connection._op_response()
+                return row
+            connection._op_execute2(stmt.handle, trans_handle, [], calc_blr(stmt.xsqlda))
+            readers = [read_execute2]
+            if commit:
+                connection._op_commit(trans_handle)
+                readers.append(read_commit)
+            row = _read_responses(readers)[0]
+            if row:
+                rows = [tuple(row)]
+        elif stmt.stmt_type == isc_info_sql_stmt_select:
+            stmt._is_open = True
+            blr = calc_blr(stmt.xsqlda)
+            connection._op_execute(stmt.handle, trans_handle, [])
+            if any(x.sqltype == SQL_TYPE_BLOB for x in stmt.xsqlda):
+                # BLOB values are read row by row
+                connection._op_response()
+                self._fetch_records = _fetch_generator(stmt)
+                rows = super().fetchall()
+            else:
+                connection._op_fetch(stmt.handle, blr)
+                batch, more_data = _read_responses([
+                    connection._op_response,
+                    lambda: connection._op_fetch_response(stmt.handle, stmt.xsqlda),
+                ])[1]
+                rows = [tuple(r) for r in batch]
+                while more_data:
+                    connection._op_fetch(stmt.handle, blr)
+                    batch, more_data = connection._op_fetch_response(stmt.handle, stmt.xsqlda)
+                    rows.extend(tuple(r) for r in batch)
+        else:
+            connection._op_execute(stmt.handle, trans_handle, [])
+            readers = [connection._op_response]
+            if commit:
+                connection._op_commit(trans_handle)
+                readers.append(read_commit)
+            _read_responses(readers)
+        self._set_rows(rows)
 
     def executemany(self, query, param_list):
         if self.closed:
@@ -80,31 +244,41 @@ class FirebirdCursorWrapper(Database.Cursor):
 
     @property
     def description(self):
+        if self._cached_description is not None:
+            return self._cached_description
         if not self.stmt:
             return None
-        return [(
-            x.aliasname.lower(), x.sqltype, x.display_length(), x.io_length(),
-            x.precision(), x.sqlscale, True if x.null_ok else False
-        ) for x in self.stmt.xsqlda]
+        # Built once per prepared statement
+        xsqlda = self.stmt.xsqlda
+        if self._description_xsqlda is not xsqlda:
+            self._description = [ColumnDescription(
+                x.aliasname.lower(), x.sqltype, x.display_length(), x.io_length(),
+                x.precision(), x.sqlscale, True if x.null_ok else False
+            ) for x in xsqlda]
+            self._description_xsqlda = xsqlda
+        return self._description
+
+    def _set_rows(self, rows):
+        self._rows = rows if rows is not None else []
+        self._offset = 0
 
     def fetchone(self):
-        if len(self._rows):
-            return self._rows.popleft()
+        offset = self._offset
+        if offset < len(self._rows):
+            self._offset = offset + 1
+            return self._rows[offset]
         return None
 
     def fetchmany(self, size=1):
-        rs = []
-        for i in range(size):
-            r = self.fetchone()
-            if not r:
-                break
-            rs.append(r)
+        offset = self._offset
+        rs = self._rows[offset:offset + size]
+        self._offset = offset + len(rs)
         return rs
 
     def fetchall(self):
-        r = list(self._rows)
-        self._rows.clear()
-        return r
+        rs = self._rows[self._offset:] if self._offset else self._rows
+        self._set_rows([])
+        return rs
 
     def close(self):
         super().close()
@@ -0,0 +1,36 @@
+from django.db.utils import OperationalError
+
+
+# isc_cfg_stmt_timeout, isc_att_stmt_timeout, isc_req_stmt_timeout
+STATEMENT_TIMEOUT_CODES = frozenset([335545127, 335545128, 335545129])
+# isc_lock_timeout. isc_lock_conflict alone is an update conflict or a
+# conflict in a no wait transaction, not a timeout.
+LOCK_TIMEOUT_CODES = frozenset([335544510])
+# isc_cancelled
+CANCELLED_CODES = frozenset([335544794])
+
+
+class QueryTimeout(OperationalError):
+    """The statement was stopped by the server after its statement timeout."""
+
+
+class LockTimeout(OperationalError):
+    """A lock could not be acquired before the transaction's lock timeout."""
+
+
+class QueryCancelled(OperationalError):
+    """The statement was cancelled by DatabaseWrapper.cancel()."""
+
+
+def translate_error(e):
+    """
+    Return the backend specific exception for a firebirdsql error, or None
+    if the error should be raised as is.
+    """
+    if e.gds_codes & STATEMENT_TIMEOUT_CODES:
+        return QueryTimeout(e._message)
+    if e.gds_codes & LOCK_TIMEOUT_CODES:
+        return LockTimeout(e._message)
+    if e.gds_codes & CANCELLED_CODES:
+        return QueryCancelled(e._message)
+    return None
@@ -15,11 +15,10 @@ class DatabaseFeatures(BaseDatabaseFeatures):
     ignores_table_name_case = True
     truncates_names = True
     bare_select_suffix = " FROM RDB$DATABASE"
-    supports_sequence_reset = False
+    supports_sequence_reset = True
     supports_subqueries_in_group_by = False
     supports_mixed_date_datetime_comparisons = False
     supports_over_clause = True
-    has_bulk_insert = False
     supports_timezones = True
     has_zoneinfo_database = False
     supports_select_intersection = False
@@ -36,6 +35,15 @@ class DatabaseFeatures(BaseDatabaseFeatures):
     connection_persists_old_columns = True
     supports_json_field = False
 
+    @cached_property
+    def has_bulk_insert(self):
+        # INSERT ... SELECT ... UNION ALL, see DatabaseOperations.bulk_insert_sql()
+        return bool(self.connection.settings_dict['OPTIONS'].get('bulk_insert', False))
+
+    @cached_property
+    def can_clone_databases(self):
+        return self.connection.creation._is_local_host()
+
     @cached_property
     def introspected_field_types(self):
         return {
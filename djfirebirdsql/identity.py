@@ -0,0 +1,122 @@
+"""
+Client side primary key allocation.
+
+IdentityAllocator reserves blocks of values of the identity generators of
+primary keys with GEN_ID(generator, n) and hands them out to unsaved
+objects, so that objects and the objects which reference them can be
+bulk_create()d without reading back each key:
+
+    allocate_pks(authors)
+    books = [Book(author=author, ...) for author in authors]
+    allocate_pks(books)
+    Author.objects.bulk_create(authors)
+    Book.objects.bulk_create(books)
+
+Generators aren't transactional: the values of a block are never returned
+by the identity column again, even when the transaction is rolled back,
+and unused values are gaps.
+"""
+from django.db import DEFAULT_DB_ALIAS, NotSupportedError, connections
+from django.db.models.fields import AutoFieldMixin
+
+
+class IdentityAllocator:
+    """
+    Blocks of identity values of a connection, keyed by (table, column).
+    """
+    # Values reserved by a GEN_ID() call at least
+    block_size = 100
+
+    def __init__(self, connection):
+        self.connection = connection
+        # (table, column): identity generator name
+        self._generators = {}
+        # (table, column): [next value, last value]
+        self._blocks = {}
+
+    def invalidate(self, table_name=None):
+        """Forget the generators of a table, or of all tables, e.g. after DDL."""
+        if table_name is None:
+            self._generators.clear()
+            self._blocks.clear()
+            return
+        table_name = table_name.strip().upper()
+        for key in [key for key in self._generators if key[0] == table_name]:
+            del self._generators[key]
+            self._blocks.pop(key, None)
+
+    def _load_generators(self, keys):
+        keys = [key for key in keys if key not in self._generators]
+        if not keys:
+            return
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT TRIM(RDB$RELATION_NAME), TRIM(RDB$FIELD_NAME), TRIM(RDB$GENERATOR_NAME) '
+                'FROM RDB$RELATION_FIELDS WHERE RDB$GENERATOR_NAME IS NOT NULL AND (%s)' % ' OR '.join(
+                    ['(RDB$RELATION_NAME = %s AND RDB$FIELD_NAME = %s)'] * len(keys)
+                ),
+                [name for key in keys for name in key]
+            )
+            for table, column, generator in cursor.fetchall():
+                self._generators[table, column] = generator
+        for key in keys:
+            if key not in self._generators:
+                raise NotSupportedError('%s.%s is not an identity column.' % key)
+
+    def allocate(self, counts):
+        """
+        Take {(table, column): count} values from the blocks, reserving new
+        blocks of all the identity columns which need one in one query, and
+        return {(table, column): [value, ...]}.
+        """
+        self._load_generators(counts)
+        values = {}
+        reserve = {}
+        for key, count in counts.items():
+            next_value, last = self._blocks.get(key, (1, 0))
+            taken = min(count, last - next_value + 1)
+            values[key] = list(range(next_value, next_value + taken))
+            self._blocks[key] = [next_value + taken, last]
+            if taken < count:
+                reserve[key] = max(count - taken, self.block_size)
+        if reserve:
+            keys = list(reserve)
+            quote_name = self.connection.ops.quote_name
+            with self.connection.cursor() as cursor:
+                cursor.execute('SELECT %s FROM RDB$DATABASE' % ', '.join(
+                    'GEN_ID(%s, %d)' % (quote_name(self._generators[key]), reserve[key]) for key in keys
+                ))
+                row = cursor.fetchone()
+            for key, last in zip(keys, row):
+                next_value = last - reserve[key] + 1
+                taken = counts[key] - len(values[key])
+                values[key].extend(range(next_value, next_value + taken))
+                self._blocks[key] = [next_value + taken, last]
+        return values
+
+    def allocate_pks(self, objs):
+        """Set the primary keys of the objects which have none."""
+        pending = {}
+        for obj in objs:
+            if obj.pk is not None:
+                continue
+            opts = obj._meta.concrete_model._meta
+            pk = opts.pk
+            if not isinstance(pk, AutoFieldMixin):
+                raise NotSupportedError('The primary key of %s is not an AutoField.' % opts.label)
+            key = (opts.db_table.upper(), pk.column.upper())
+            pending.setdefault(key, []).append(obj)
+        if not pending:
+            return
+        values = self.allocate({key: len(objs) for key, objs in pending.items()})
+        for key, objs in pending.items():
+            for obj, value in zip(objs, values[key]):
+                obj.pk = value
+
+
+def allocate_pks(objs, using=DEFAULT_DB_ALIAS):
+    """
+    Set the primary keys of the unsaved objects from the identity blocks
+    of the `using` connection.
+    """
+    connections[using].identity_allocator.allocate_pks(objs)
@@ -1,4 +1,5 @@
 from collections import namedtuple
+from contextlib import contextmanager
 from django.db.models import Index
 
 from django.db.backends.base.introspection import (
@@ -6,6 +7,26 @@ from django.db.backends.base.introspection import (
 )
 
 InfoLine = namedtuple('InfoLine', 'col_name data_type max_len num_prec num_scale extra column_default identity_type')
+TableCatalog = namedtuple('TableCatalog', 'description constraints field_indexes')
+IndexInfo = namedtuple('IndexInfo', 'table_name name unique active constraint statistics')
+IndexStatistics = namedtuple('IndexStatistics', 'table_name name unique statistics row_count stale low_selectivity')
+
+
+class Catalog:
+    """
+    Metadata of all tables of the database, keyed by upper case table name.
+    Invalidated tables are fetched again one by one on the next access.
+    """
+    def __init__(self):
+        self.tables = None
+        self.stale = set()
+
+    def invalidate(self, table_name=None):
+        if table_name is None:
+            self.tables = None
+            self.stale.clear()
+        elif self.tables is not None:
+            self.stale.add(table_name.strip().upper())
 
 
 class DatabaseIntrospection(BaseDatabaseIntrospection):
@@ -37,6 +58,102 @@ class DatabaseIntrospection(BaseDatabaseIntrospection):
         # of all of that.
     }
 
+    # get_index_statistics() thresholds
+    stale_statistics_change = 0.5
+    low_selectivity = 0.1
+    low_selectivity_min_rows = 1000
+
+    def __init__(self, connection):
+        super().__init__(connection)
+        self._catalog = None
+
+    @contextmanager
+    def catalog_cache(self):
+        """
+        Serve table descriptions, constraints and references from a catalog
+        of the whole schema inside the block. It's loaded with a few bulk
+        queries on first use and invalidated by invalidate_catalog(), which
+        DatabaseSchemaEditor calls for its DDL.
+        """
+        if self._catalog is not None:
+            yield self._catalog
+            return
+        self._catalog = Catalog()
+        try:
+            yield self._catalog
+        finally:
+            self._catalog = None
+
+    def invalidate_catalog(self, table_name=None):
+        if self._catalog is not None:
+            self._catalog.invalidate(table_name)
+
+    def _get_catalog(self, cursor):
+        catalog = self._catalog
+        if catalog.tables is None:
+            descriptions = self._fetch_descriptions(cursor)
+            constraints, field_indexes = self._fetch_constraints(cursor)
+            catalog.tables = {
+                table: TableCatalog(description, constraints.get(table, {}), field_indexes.get(table, {}))
+                for table, description in descriptions.items()
+            }
+            catalog.stale.clear()
+        while catalog.stale:
+            table = catalog.stale.pop()
+            description = self._fetch_descriptions(cursor, table).get(table)
+            if description:
+                constraints, field_indexes = self._fetch_constraints(cursor, table)
+                catalog.tables[table] = TableCatalog(
+                    description, constraints.get(table, {}), field_indexes.get(table, {})
+                )
+            else:
+                catalog.tables.pop(table, None)
+        return catalog.tables
+
+    def _get_table_catalog(self, cursor, table_name):
+        return self._get_catalog(cursor).get(table_name.strip().upper(), TableCatalog([], {}, {}))
+
+    def _get_all_tables(self, cursor):
+        if self._catalog is not None:
+            return self._get_catalog(cursor)
+        with self.catalog_cache():
+            return self._get_catalog(cursor)
+
+    def get_table_descriptions(self, cursor):
+        """
+        Return {table_name: description} of all tables, see get_table_description().
+        """
+        return {
+            self.identifier_converter(table): list(t.description)
+            for table, t in self._get_all_tables(cursor).items()
+        }
+
+    def get_all_relations(self, cursor):
+        """
+        Return {table_name: relations} of all tables, see get_relations().
+        """
+        return {
+            self.identifier_converter(table): {
+                column: (c['foreign_key'][1], c['foreign_key'][0])
+                for c in t.constraints.values()
+                if c['foreign_key']
+                for column in c['columns']
+            }
+            for table, t in self._get_all_tables(cursor).items()
+        }
+
+    def get_all_constraints(self, cursor):
+        """
+        Return {table_name: constraints} of all tables, see get_constraints().
+        """
+        return {
+            self.identifier_converter(table): {
+                name: dict(c, columns=list(c['columns']), orders=list(c['orders']))
+                for name, c in t.constraints.items()
+            }
+            for table, t in self._get_all_tables(cursor).items()
+        }
+
     def identifier_converter(self, name):
         if name:
             name = name.strip().lower()
@@ -77,14 +194,14 @@ class DatabaseIntrospection(BaseDatabaseIntrospection):
             order by 1 """)
         return [TableInfo(self.identifier_converter(row[0]), row[1]) for row in cursor.fetchall()]
 
-    def get_table_description(self, cursor, table_name):
+    def _fetch_descriptions(self, cursor, table_name=None):
         """
-        Returns a description of the table, with the DB-API cursor.description interface.
-        Must return a 'FieldInfo' struct 'name type_code display_size internal_size precision scale null_ok'
+        Return {table_name: [FieldInfo, ...]} of the table or of all tables
         """
-        cursor.execute("""
+        query = """
             select
-              trim(rf.rdb$field_name)
+              trim(rf.rdb$relation_name)
+              , trim(rf.rdb$field_name)
               , case
                   when (f.rdb$field_type in (7,8,16)) and (f.rdb$field_sub_type > 0) then
                     160 + f.rdb$field_sub_type
@@ -109,16 +226,32 @@ class DatabaseIntrospection(BaseDatabaseIntrospection):
               rdb$relation_fields rf
                 join rdb$fields f on (rf.rdb$field_source = f.rdb$field_name)
                 join rdb$collations c on (rf.rdb$collation_id = c.rdb$collation_id)
+                join rdb$relations r on (rf.rdb$relation_name = r.rdb$relation_name)
             where
-              rf.rdb$relation_name = '%s'
+              %s
             order by
-              rf.rdb$field_position
-            """ % (table_name.strip().upper(),))
-        items = []
+              rf.rdb$relation_name, rf.rdb$field_position
+            """
+        if table_name is None:
+            cursor.execute(query % "r.rdb$system_flag = 0")
+        else:
+            cursor.execute(query % "rf.rdb$relation_name = %s", [table_name.strip().upper()])
+        descriptions = {}
         for r in cursor.fetchall():
             # name type_code display_size internal_size precision scale null_ok, default, collation
-            items.append(FieldInfo(self.identifier_converter(r[0]), r[1], r[2], r[2] or 0, r[3], r[4], not (r[5] == 1), r[6], r[7]))
-        return items
+            descriptions.setdefault(r[0], []).append(
+                FieldInfo(self.identifier_converter(r[1]), r[2], r[3], r[3] or 0, r[4], r[5], not (r[6] == 1), r[7], r[8])
+            )
+        return descriptions
+
+    def get_table_description(self, cursor, table_name):
+        """
+        Returns a description of the table, with the DB-API cursor.description interface.
+        Must return a 'FieldInfo' struct 'name type_code display_size internal_size precision scale null_ok'
+        """
+        if self._catalog is not None:
+            return list(self._get_table_catalog(cursor, table_name).description)
+        return self._fetch_descriptions(cursor, table_name).get(table_name.strip().upper(), [])
 
     def _name_to_index(self, cursor, table_name):
         """Return a dictionary of {field_name: field_index} for the given table.
@@ -132,6 +265,17 @@ class DatabaseIntrospection(BaseDatabaseIntrospection):
         constraint name, table, column, referenecd table, referenced column
         table_name: refernced tbale name
         """
+        if self._catalog is not None:
+            referenced = table_name.strip().lower()
+            with self.connection.cursor() as cursor:
+                tables = self._get_catalog(cursor)
+            return [
+                (name, self.identifier_converter(table), column, c['foreign_key'][0], c['foreign_key'][1])
+                for table, t in tables.items()
+                for name, c in t.constraints.items()
+                if c['foreign_key'] and c['foreign_key'][0] == referenced
+                for column in c['columns']
+            ]
         with self.connection.cursor() as cursor:
             cursor.execute("""
                 select
@@ -163,6 +307,13 @@ class DatabaseIntrospection(BaseDatabaseIntrospection):
         Backends can override this to return a list of (column_name, referenced_table_name,
         referenced_column_name) for all key columns in given table.
         """
+        if self._catalog is not None:
+            return [
+                (column, c['foreign_key'][0], c['foreign_key'][1])
+                for c in self._get_table_catalog(cursor, table_name).constraints.values()
+                if c['foreign_key']
+                for column in c['columns']
+            ]
         key_columns = []
         cursor.execute("""
             select
@@ -213,11 +364,35 @@ class DatabaseIntrospection(BaseDatabaseIntrospection):
         Some backends may return special constraint names that don't exist
         if they don't name constraints of a certain type (e.g. SQLite)
         """
+        if self._catalog is not None:
+            constraints = self._get_table_catalog(cursor, table_name).constraints
+            return {
+                name: dict(c, columns=list(c['columns']), orders=list(c['orders']))
+                for name, c in constraints.items()
+            }
+        constraints, field_indexes = self._fetch_constraints(cursor, table_name)
+        return constraints.get(table_name.strip().upper(), {})
+
+    def _fetch_constraints(self, cursor, table_name=None):
+        """
+        Return ({table_name: constraints}, {table_name: {column: [index names]}})
+        of the table or of all tables. The index names are those of the
+        indexes not created for a constraint.
+        """
         constraints = {}
+        field_indexes = {}
+        if table_name is None:
+            params = None
+            index_where = check_where = "r.RDB$SYSTEM_FLAG = 0"
+        else:
+            params = [table_name.strip().upper()]
+            index_where = "i.RDB$RELATION_NAME = %s"
+            check_where = "c.RDB$RELATION_NAME = %s"
 
         # Indexed constraints
         cursor.execute("""
         SELECT
+          trim(i.RDB$RELATION_NAME),
           case
             when rc.RDB$CONSTRAINT_NAME is not null then rc.RDB$CONSTRAINT_NAME
             else i.RDB$INDEX_NAME
@@ -235,15 +410,17 @@ class DatabaseIntrospection(BaseDatabaseIntrospection):
           i.RDB$INDEX_TYPE
         FROM RDB$INDEX_SEGMENTS s
         LEFT JOIN RDB$INDICES i ON i.RDB$INDEX_NAME = s.RDB$INDEX_NAME
+        LEFT JOIN RDB$RELATIONS r ON r.RDB$RELATION_NAME = i.RDB$RELATION_NAME
         LEFT JOIN RDB$RELATION_CONSTRAINTS rc ON rc.RDB$INDEX_NAME = s.RDB$INDEX_NAME
         LEFT JOIN RDB$REF_CONSTRAINTS refc ON rc.RDB$CONSTRAINT_NAME = refc.RDB$CONSTRAINT_NAME
         LEFT JOIN RDB$RELATION_CONSTRAINTS rc2 ON rc2.RDB$CONSTRAINT_NAME = refc.RDB$CONST_NAME_UQ
         LEFT JOIN RDB$INDICES i2 ON i2.RDB$INDEX_NAME = rc2.RDB$INDEX_NAME
         LEFT JOIN RDB$INDEX_SEGMENTS s2 ON i2.RDB$INDEX_NAME = s2.RDB$INDEX_NAME
-        WHERE i.RDB$RELATION_NAME = '%s'
-        ORDER BY s.RDB$FIELD_POSITION
-        """ % (table_name.strip().upper(),))
-        for constraint_name, constraint_type, column, other_table, other_column, unique, order in cursor.fetchall():
+        WHERE %s
+        ORDER BY i.RDB$RELATION_NAME, s.RDB$FIELD_POSITION
+        """ % index_where, params)
+        for table, constraint_name, constraint_type, column, other_table, other_column, unique, order in cursor.fetchall():
+            table_constraints = constraints.setdefault(table, {})
             primary_key = False
             foreign_key = None
             check = False
@@ -266,9 +443,10 @@ class DatabaseIntrospection(BaseDatabaseIntrospection):
                 foreign_key = (other_table, other_column,)
             elif constraint_type == 'INDEX':
                 index = True
+                field_indexes.setdefault(table, {}).setdefault(column, []).append(constraint_name.strip())
 
-            if constraint not in constraints:
-                constraints[constraint] = {
+            if constraint not in table_constraints:
+                table_constraints[constraint] = {
                     "columns": [],
                     "orders": [],
                     "primary_key": primary_key,
@@ -279,18 +457,19 @@ class DatabaseIntrospection(BaseDatabaseIntrospection):
                     "type": Index.suffix
                 }
             # Record the details
-            constraints[constraint]['columns'].append(column)
-            constraints[constraint]['orders'].append(order)
+            table_constraints[constraint]['columns'].append(column)
+            table_constraints[constraint]['orders'].append(order)
 
         # Check constraints
         cursor.execute("""
-        SELECT c.RDB$CONSTRAINT_NAME
+        SELECT trim(c.RDB$RELATION_NAME), c.RDB$CONSTRAINT_NAME
         FROM RDB$RELATION_CONSTRAINTS c
-        WHERE c.RDB$CONSTRAINT_TYPE='CHECK' AND c.RDB$RELATION_NAME = '%s'
-        """ % (table_name.strip().upper(),))
+        JOIN RDB$RELATIONS r ON r.RDB$RELATION_NAME = c.RDB$RELATION_NAME
+        WHERE c.RDB$CONSTRAINT_TYPE='CHECK' AND %s
+        """ % check_where, params)
 
-        for r in cursor.fetchall():
-            constraints[r[0].strip().lower()] = {
+        for table, name in cursor.fetchall():
+            constraints.setdefault(table, {})[name.strip().lower()] = {
                     "columns": [],
                     "orders": [],
                     "primary_key": False,
@@ -301,12 +480,15 @@ class DatabaseIntrospection(BaseDatabaseIntrospection):
                     "type": "",
             }
 
-        return constraints
+        return constraints, field_indexes
 
     def _get_field_indexes(self, cursor, table_name, field_name):
         """
           Return a list of index names that are not created automatically (ie: Foreign Key)
         """
+        if self._catalog is not None:
+            field_indexes = self._get_table_catalog(cursor, table_name).field_indexes
+            return list(field_indexes.get(field_name.strip().lower(), []))
         table = "'%s'" % table_name.upper()
         field = "'%s'" % field_name.upper()
         cursor.execute("""
@@ -320,3 +502,93 @@ class DatabaseIntrospection(BaseDatabaseIntrospection):
             order by s.rdb$field_position """ % (table, field,))
 
         return [index_name[0].strip() for index_name in cursor.fetchall()]
+
+    def get_index_list(self, cursor, table_name=None):
+        """
+        Return a list of IndexInfo for the indexes of the table or of all
+        tables. constraint is True for the indexes of primary key, unique and
+        foreign key constraints, statistics is the stored selectivity.
+        """
+        if table_name is None:
+            params = None
+            where = "r.RDB$SYSTEM_FLAG = 0"
+        else:
+            params = [table_name.strip().upper()]
+            where = "i.RDB$RELATION_NAME = %s"
+        cursor.execute("""
+        SELECT
+          trim(i.RDB$RELATION_NAME),
+          trim(i.RDB$INDEX_NAME),
+          i.RDB$UNIQUE_FLAG,
+          i.RDB$INDEX_INACTIVE,
+          rc.RDB$CONSTRAINT_NAME,
+          i.RDB$STATISTICS
+        FROM RDB$INDICES i
+        JOIN RDB$RELATIONS r ON r.RDB$RELATION_NAME = i.RDB$RELATION_NAME
+        LEFT JOIN RDB$RELATION_CONSTRAINTS rc ON rc.RDB$INDEX_NAME = i.RDB$INDEX_NAME
+        WHERE %s
+        ORDER BY i.RDB$RELATION_NAME, i.RDB$INDEX_NAME
+        """ % where, params)
+        return [
+            IndexInfo(table.lower(), name.lower(), bool(unique), not inactive, constraint is not None, statistics)
+            for table, name, unique, inactive, constraint, statistics in cursor.fetchall()
+        ]
+
+    def get_index_statistics(self, cursor, table_name=None, count_rows=False):
+        """
+        Return a list of IndexStatistics for the active indexes of the table
+        or of all tables. statistics is the stored selectivity (1 / distinct
+        keys), it is only computed when an index is created or activated and
+        by SET STATISTICS.
+
+        stale is True when the statistics were computed on an empty table
+        which has rows now, or, with count_rows, when the row count changed
+        by more than stale_statistics_change since (as told by the
+        selectivity of the unique indexes). count_rows runs a SELECT COUNT(*)
+        per table, which reads the whole table; row_count is None without it.
+        low_selectivity is True for the non unique indexes with less than
+        1 / low_selectivity distinct keys on tables of at least
+        low_selectivity_min_rows rows (estimated from the unique indexes
+        without count_rows).
+        """
+        indexes = [index for index in self.get_index_list(cursor, table_name) if index.active]
+        quote_name = self.connection.ops.quote_name
+        row_counts = {}
+        if count_rows:
+            for table in sorted({index.table_name for index in indexes}):
+                cursor.execute('SELECT COUNT(*) FROM %s' % quote_name(table))
+                row_counts[table] = cursor.fetchone()[0]
+        # Row counts when the statistics of the unique indexes were computed
+        computed_counts = {}
+        for index in indexes:
+            if index.unique and index.statistics:
+                computed_counts[index.table_name] = max(
+                    computed_counts.get(index.table_name, 0), round(1 / index.statistics)
+                )
+        # Tables with indexes computed empty which have rows, one row read each
+        filled = {table for table, count in row_counts.items() if count > 0}
+        if not count_rows:
+            for table in sorted({index.table_name for index in indexes if not index.statistics}):
+                cursor.execute('SELECT 1 FROM RDB$DATABASE WHERE EXISTS (SELECT 1 FROM %s)' % quote_name(table))
+                if cursor.fetchone() is not None:
+                    filled.add(table)
+
+        index_statistics = []
+        for index in indexes:
+            statistics = index.statistics or 0
+            row_count = row_counts.get(index.table_name)
+            computed = computed_counts.get(index.table_name)
+            stale = (
+                (not statistics and index.table_name in filled) or
+                (computed is not None and row_count is not None and
+                 abs(row_count - computed) > computed * self.stale_statistics_change)
+            )
+            rows = computed if row_count is None else row_count
+            low_selectivity = (
+                not index.unique and (rows or 0) >= self.low_selectivity_min_rows and
+                statistics >= self.low_selectivity
+            )
+            index_statistics.append(IndexStatistics(
+                index.table_name, index.name, index.unique, statistics, row_count, stale, low_selectivity
+            ))
+        return index_statistics
@@ -0,0 +1,74 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = (
+        "Reports stale and low selectivity indexes of a Firebird database and "
+        "recomputes index statistics (SET STATISTICS INDEX)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'args', metavar='app_label[.ModelName]', nargs='*',
+            help='Restricts the indexes to the specified app_label or app_label.ModelName.',
+        )
+        parser.add_argument(
+            '--database', default=DEFAULT_DB_ALIAS,
+            help='Nominates a database. Defaults to the "default" database.',
+        )
+        parser.add_argument(
+            '--update', action='store_true',
+            help='Recompute the statistics of the indexes.',
+        )
+        parser.add_argument(
+            '--stale', action='store_true',
+            help='Only the indexes with stale statistics.',
+        )
+        parser.add_argument(
+            '--count-rows', action='store_true',
+            help='Count the rows of each table (a full scan) to report the row counts '
+                 'and the statistics computed at another row count as stale.',
+        )
+
+    def get_models(self, labels):
+        models = []
+        for label in labels:
+            try:
+                if '.' in label:
+                    models.append(apps.get_model(label))
+                else:
+                    models.extend(apps.get_app_config(label).get_models())
+            except LookupError as e:
+                raise CommandError(str(e))
+        return [model for model in models if model._meta.managed and not model._meta.proxy]
+
+    def handle(self, *app_labels, **options):
+        connection = connections[options['database']]
+        if connection.vendor != 'firebirdsql':
+            raise CommandError('indexstatistics only supports Firebird databases.')
+        models = self.get_models(app_labels)
+        if app_labels and not models:
+            return
+
+        if options['update']:
+            with connection.schema_editor() as editor:
+                for name in editor.update_statistics(
+                    *models, stale_only=options['stale'], count_rows=options['count_rows']
+                ):
+                    if options['verbosity'] >= 1:
+                        self.stdout.write('SET STATISTICS INDEX %s' % name)
+            return
+
+        tables = sorted({model._meta.db_table.upper() for model in models}) or [None]
+        with connection.cursor() as cursor:
+            for table in tables:
+                for s in connection.introspection.get_index_statistics(cursor, table, options['count_rows']):
+                    if options['stale'] and not s.stale:
+                        continue
+                    flags = [flag for flag, on in (('stale', s.stale), ('low selectivity', s.low_selectivity)) if on]
+                    rows = '' if s.row_count is None else ' rows=%d' % s.row_count
+                    self.stdout.write('%s %s statistics=%g%s %s' % (
+                        s.table_name, s.name, s.statistics, rows, ', '.join(flags)
+                    ))
@@ -0,0 +1,16 @@
+from django.core.management.commands import inspectdb
+from django.db import connections
+
+
+class Command(inspectdb.Command):
+    """
+    inspectdb which introspects a Firebird database from the catalog cache,
+    so the whole schema is read with a constant number of queries.
+    """
+    def handle_inspection(self, options):
+        connection = connections[options['database']]
+        if connection.vendor != 'firebirdsql':
+            yield from super().handle_inspection(options)
+            return
+        with connection.introspection.catalog_cache():
+            yield from super().handle_inspection(options)
@@ -0,0 +1,214 @@
+import os
+import warnings
+
+from django.apps import apps
+from django.core import serializers
+from django.core.management.base import CommandError
+from django.core.management.commands import loaddata
+from django.db import DatabaseError, IntegrityError, connections, router
+
+from djfirebirdsql.cursor import convert_sql
+from djfirebirdsql.utils import bulk_load
+
+
+class Command(loaddata.Command):
+    """
+    loaddata which can deactivate the plain indexes of the given models while
+    the fixtures are loaded (--bulk-load app_label.ModelName), and insert the
+    objects of a fixture in batches instead of saving them one by one (--fast).
+    """
+    # Rows per EXECUTE BLOCK of --fast, under the 255 contexts of a statement
+    fast_batch_size = 200
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            '--bulk-load', action='append', default=[], metavar='APP_LABEL.MODELNAME',
+            help='Deactivate the indexes of this model while loading and rebuild them afterwards. '
+                 'Can be used multiple times.',
+        )
+        parser.add_argument(
+            '--fast', action='store_true',
+            help='Insert the objects of each model of a fixture in batched statements, '
+                 'referenced models first. pre_save and post_save signals are not sent.',
+        )
+
+    def handle(self, *fixture_labels, **options):
+        self.fast = options['fast']
+        if not options['bulk_load'] and not self.fast:
+            return super().handle(*fixture_labels, **options)
+        if connections[options['database']].vendor != 'firebirdsql':
+            raise CommandError('--bulk-load and --fast are only supported on Firebird databases.')
+        if not options['bulk_load']:
+            return super().handle(*fixture_labels, **options)
+        try:
+            models = [apps.get_model(label) for label in options['bulk_load']]
+        except (LookupError, ValueError) as e:
+            raise CommandError(str(e))
+        with bulk_load(*models, using=options['database']):
+            return super().handle(*fixture_labels, **options)
+
+    def load_label(self, fixture_label):
+        if not self.fast:
+            return super().load_label(fixture_label)
+        show_progress = self.verbosity >= 3
+        for fixture_file, fixture_dir, fixture_name in self.find_fixtures(fixture_label):
+            _, ser_fmt, cmp_fmt = self.parse_name(os.path.basename(fixture_file))
+            open_method, mode = self.compression_formats[cmp_fmt]
+            fixture = open_method(fixture_file, mode)
+            try:
+                self.fixture_count += 1
+                objects_in_fixture = 0
+                loaded_objects_in_fixture = 0
+                if self.verbosity >= 2:
+                    self.stdout.write(
+                        "Installing %s fixture '%s' from %s."
+                        % (ser_fmt, fixture_name, loaddata.humanize(fixture_dir))
+                    )
+
+                objects = serializers.deserialize(
+                    ser_fmt, fixture, using=self.using, ignorenonexistent=self.ignore,
+                    handle_forward_references=True,
+                )
+                # The objects of each model in fixture order
+                objects_by_model = {}
+                for obj in objects:
+                    objects_in_fixture += 1
+                    if (obj.object._meta.app_config in self.excluded_apps or
+                            type(obj.object) in self.excluded_models):
+                        continue
+                    if router.allow_migrate_model(self.using, obj.object.__class__):
+                        loaded_objects_in_fixture += 1
+                        self.models.add(obj.object.__class__)
+                        objects_by_model.setdefault(obj.object._meta.concrete_model, []).append(obj)
+                    if obj.deferred_fields:
+                        self.objs_with_deferred_fields.append(obj)
+
+                self._insert_objects(objects_by_model, show_progress)
+                self.loaded_object_count += loaded_objects_in_fixture
+                self.fixture_object_count += objects_in_fixture
+            except Exception as e:
+                if not isinstance(e, CommandError):
+                    e.args = ("Problem installing fixture '%s': %s" % (fixture_file, e),)
+                raise
+            finally:
+                fixture.close()
+
+            # Warn if the fixture we loaded contains 0 objects.
+            if objects_in_fixture == 0:
+                warnings.warn(
+                    "No fixture data found for '%s'. (File format may be "
+                    "invalid.)" % fixture_name,
+                    RuntimeWarning
+                )
+
+    def _insert_order(self, models):
+        # Firebird checks foreign keys at each statement: referenced tables first
+        connection = connections[self.using]
+        by_table = {model._meta.db_table.upper(): model for model in models}
+        tables = connection.ops._flush_order([model._meta.db_table for model in models])
+        return [by_table[table.upper()] for table in reversed(tables)]
+
+    def _insert_objects(self, objects_by_model, show_progress):
+        """
+        Insert the objects of each model in batches, then the many-to-many
+        relations of all of them.
+        """
+        connection = connections[self.using]
+        m2m = []
+        inserted = 0
+        for model in self._insert_order(objects_by_model):
+            statements = []
+            for obj in objects_by_model[model]:
+                if obj.m2m_data:
+                    m2m.append((obj.object, obj.m2m_data))
+                if obj.object.pk is None:
+                    # The primary key is generated, save() reads it back
+                    self._execute_batched(model, statements)
+                    statements = []
+                    try:
+                        obj.save(using=self.using, save_m2m=False)
+                    except (DatabaseError, IntegrityError, ValueError) as e:
+                        e.args = ("Could not load %s(pk=None): %s" % (model._meta.label, e),)
+                        raise
+                else:
+                    statements.append(self._insert_sql(model, obj.object))
+                    obj.object._state.adding = False
+                    obj.object._state.db = self.using
+                    obj.m2m_data = None
+            self._execute_batched(model, statements)
+            inserted += len(objects_by_model[model])
+            if show_progress:
+                self.stdout.write('\rProcessed %i object(s).' % inserted, ending='')
+        if inserted and show_progress:
+            self.stdout.write()  # Add a newline after progress indicator.
+
+        # The rows of the through tables replace the existing ones like set()
+        through_rows = {}
+        for obj, m2m_data in m2m:
+            for field_name, values in m2m_data.items():
+                field = obj._meta.get_field(field_name)
+                through = field.remote_field.through
+                source = through._meta.get_field(field.m2m_field_name())
+                target = through._meta.get_field(field.m2m_reverse_field_name())
+                sources, rows = through_rows.setdefault((through, source, target), ([], []))
+                sources.append(obj.pk)
+                rows.extend((obj.pk, value) for value in values)
+        quote_name = connection.ops.quote_name
+        for (through, source, target), (sources, rows) in through_rows.items():
+            table = quote_name(through._meta.db_table)
+            self._execute_batched(through, [convert_sql(
+                'DELETE FROM %s WHERE %s = %%s;' % (table, quote_name(source.column)), [pk]
+            ) for pk in sources] + [convert_sql(
+                'INSERT INTO %s (%s, %s) VALUES (%%s, %%s);' % (
+                    table, quote_name(source.column), quote_name(target.column),
+                ),
+                [source.get_db_prep_save(s, connection), target.get_db_prep_save(t, connection)]
+            ) for s, t in rows])
+
+    def _insert_sql(self, model, obj):
+        """
+        UPDATE OR INSERT of the raw save() of obj, which overwrites the row
+        with the same primary key.
+        """
+        connection = connections[self.using]
+        quote_name = connection.ops.quote_name
+        opts = model._meta
+        fields = opts.local_concrete_fields
+        return convert_sql('UPDATE OR INSERT INTO %s (%s) VALUES (%s) MATCHING (%s);' % (
+            quote_name(opts.db_table),
+            ', '.join(quote_name(f.column) for f in fields),
+            ', '.join(['%s'] * len(fields)),
+            quote_name(opts.pk.column),
+        ), [f.get_db_prep_save(getattr(obj, f.attname), connection) for f in fields])
+
+    def _execute_batched(self, model, statements):
+        """
+        Execute the statements in EXECUTE BLOCKs of at most fast_batch_size
+        statements under the statement text limit.
+        """
+        if not statements:
+            return
+        connection = connections[self.using]
+        block_length = len('EXECUTE BLOCK AS BEGIN  END')
+        batches = [[]]
+        length = block_length
+        for statement in statements:
+            size = len(statement.encode('utf-8')) + 1
+            if batches[-1] and (
+                len(batches[-1]) >= self.fast_batch_size or length + size > connection.ops.max_statement_length
+            ):
+                batches.append([])
+                length = block_length
+            batches[-1].append(statement)
+            length += size
+        with connection.cursor() as cursor:
+            for batch in batches:
+                try:
+                    if len(batch) == 1:
+                        cursor.execute(batch[0].rstrip(';'))
+                    else:
+                        cursor.execute('EXECUTE BLOCK AS BEGIN %s END' % ' '.join(batch))
+                except (DatabaseError, IntegrityError, ValueError) as e:
+                    e.args = ("Could not load %s objects: %s" % (model._meta.label, e),)
+                    raise
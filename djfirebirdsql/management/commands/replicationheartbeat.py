@@ -0,0 +1,51 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from djfirebirdsql.replication import beat, create_heartbeat_table, replication_lag
+
+
+class Command(BaseCommand):
+    help = (
+        "Writes the replication heartbeat row of a Firebird primary database "
+        "every --interval seconds, or reports the lag of its replicas."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database', default=DEFAULT_DB_ALIAS,
+            help='Nominates the primary database. Defaults to the "default" database.',
+        )
+        parser.add_argument(
+            '--interval', type=float, default=1.0,
+            help='Seconds between heartbeats. Defaults to 1.',
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Write one heartbeat and exit.',
+        )
+        parser.add_argument(
+            '--lag', action='store_true',
+            help='Report the age of the heartbeat row of each replica and exit.',
+        )
+
+    def handle(self, **options):
+        using = options['database']
+        if connections[using].vendor != 'firebirdsql':
+            raise CommandError('replicationheartbeat only supports Firebird databases.')
+
+        if options['lag']:
+            for alias, settings_dict in connections.databases.items():
+                if settings_dict.get('OPTIONS', {}).get('replica_of') != using:
+                    continue
+                lag = replication_lag(alias)
+                self.stdout.write('%s %s' % (alias, 'no heartbeat' if lag is None else '%.3f sec' % lag))
+            return
+
+        create_heartbeat_table(using)
+        while True:
+            beat(using)
+            if options['once']:
+                return
+            time.sleep(options['interval'])
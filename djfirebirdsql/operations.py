@@ -1,5 +1,6 @@
 import uuid
 import datetime
+import functools
 import pytz
 import math
 import firebirdsql as Database
@@ -10,11 +11,21 @@ from django.db.backends.base.operations import BaseDatabaseOperations
 from django.utils import timezone
 from django.utils.encoding import force_str
 from django.db.utils import DatabaseError
+from django.db.models.aggregates import Avg
+from django.db.models.expressions import Value
 from django.db.models.functions import (
     ConcatPair, Substr, StrIndex, Repeat, Degrees, Radians,
     MD5, SHA1, SHA224, SHA256, SHA384, SHA512,
+    Greatest, Least, Length, Chr, LTrim, RTrim, Ord,
 )
 
+from .aggregates import _string_agg_as_sql
+
+try:
+    from django.contrib.postgres.aggregates import StringAgg
+except ImportError:
+    StringAgg = None
+
 
 def _substr_as_sql(self, compiler, connection, function=None, template=None, arg_joiner=None, **extra_context):
     connection.ops.check_expression_support(self)
@@ -57,6 +68,58 @@ Substr.as_firebirdsql = _substr_as_sql
 StrIndex.as_firebirdsql = _str_index_as_sql
 Repeat.as_firebirdsql = Repeat.as_oracle
 Radians.as_firebirdsql = Radians.as_oracle
+if StringAgg is not None:
+    StringAgg.as_firebirdsql = _string_agg_as_sql
+
+
+def _set_attribute(name, value):
+    def handler(expression):
+        setattr(expression, name, value)
+    return handler
+
+
+def _value_handler(expression):
+    if isinstance(expression.value, datetime.datetime):
+        expression.value = str(expression.value)[:24]
+
+
+_hash_template = 'LOWER(HEX_ENCODE(Hash(%(expressions)s using %(function)s)))'
+
+# check_expression_support() handlers by expression class
+_expression_handlers = {
+    Avg: _set_attribute('template', '%(function)s(CAST(%(expressions)s as double precision))'),
+    Greatest: _set_attribute('function', 'MAXVALUE'),
+    Least: _set_attribute('function', 'MINVALUe'),
+    Length: _set_attribute('function', 'CHARACTER_LENGTH'),
+    Chr: _set_attribute('function', 'ASCII_CHAR'),
+    LTrim: _set_attribute('template', 'TRIM(LEADING FROM %(expressions)s)'),
+    RTrim: _set_attribute('template', 'TRIM(TRAILING FROM %(expressions)s)'),
+    Ord: _set_attribute('template', 'ASCII_VAL(LEFT(%(expressions)s, 1))'),
+    Degrees: _set_attribute('template', '(Cast(%%(expressions)s AS DOUBLE PRECISION) * 180 / %s)' % math.pi),
+    MD5: _set_attribute('template', _hash_template),
+    SHA1: _set_attribute('template', _hash_template),
+    SHA224: _set_attribute('template', _hash_template),
+    SHA256: _set_attribute('template', _hash_template),
+    SHA384: _set_attribute('template', _hash_template),
+    SHA512: _set_attribute('template', _hash_template),
+    Value: _value_handler,
+}
+
+
+@functools.lru_cache(maxsize=1024)
+def _expression_handler(cls):
+    # Subclasses get the handler of their nearest handled base class
+    for base in cls.__mro__:
+        if base in _expression_handlers:
+            return _expression_handlers[base]
+    return None
+
+
+@functools.lru_cache(maxsize=4096)
+def _quote_name(name, max_length):
+    if not name.startswith('"') and not name.endswith('"'):
+        name = '"%s"' % truncate_name(name, max_length)
+    return name.replace(' ', '_').upper()
 
 class DatabaseOperations(BaseDatabaseOperations):
     cast_char_field_without_max_length = 'varchar(8191)'
@@ -68,42 +131,12 @@ class DatabaseOperations(BaseDatabaseOperations):
     }
 
     def cache_key_culling_sql(self):
-        return """
-            SELECT cache_key
-              FROM (SELECT cache_key, rank() OVER (ORDER BY cache_key) AS rank FROM %s)
-             WHERE rank = %%s + 1
-        """
+        return "SELECT cache_key FROM %s ORDER BY cache_key OFFSET %%s ROWS FETCH FIRST 1 ROWS ONLY"
 
     def check_expression_support(self, expression):
-        from django.db.models.aggregates import Avg
-        from django.db.models.expressions import Value
-        from django.db.models.functions import (
-            Greatest, Least, Length, Chr, LTrim, RTrim, Ord
-        )
-
-        if isinstance(expression, Avg):
-            expression.template = '%(function)s(CAST(%(expressions)s as double precision))'
-        elif isinstance(expression, Greatest):
-            expression.function = 'MAXVALUE'
-        elif isinstance(expression, Least):
-            expression.function = 'MINVALUe'
-        elif isinstance(expression, Length):
-            expression.function = 'CHARACTER_LENGTH'
-        elif isinstance(expression, Chr):
-            expression.function = 'ASCII_CHAR'
-        elif isinstance(expression, LTrim):
-            expression.template = 'TRIM(LEADING FROM %(expressions)s)'
-        elif isinstance(expression, RTrim):
-            expression.template = 'TRIM(TRAILING FROM %(expressions)s)'
-        elif isinstance(expression, Ord):
-            expression.template = 'ASCII_VAL(LEFT(%(expressions)s, 1))'
-        elif isinstance(expression, Degrees):
-            expression.template='(Cast(%%(expressions)s AS DOUBLE PRECISION) * 180 / %s)' % math.pi
-        elif isinstance(expression, (MD5, SHA1, SHA224, SHA256, SHA384, SHA512)):
-            expression.template='LOWER(HEX_ENCODE(Hash(%(expressions)s using %(function)s)))'
-        elif isinstance(expression, Value):
-            if isinstance(expression.value, datetime.datetime):
-                expression.value = str(expression.value)[:24]
+        handler = _expression_handler(type(expression))
+        if handler is not None:
+            handler(expression)
 
     def date_extract_sql(self, lookup_type, field_name):
         if lookup_type == 'iso_year':
@@ -188,6 +221,36 @@ class DatabaseOperations(BaseDatabaseOperations):
             sql = "EXTRACT(%s FROM %s)" % (lookup_type, field_name)
         return sql
 
+    _datetime_trunc_templates = {
+        'year': "EXTRACT(year FROM %(field)s)||'-01-01 00:00:00'",
+        'iso_year': "EXTRACT(year FROM %(field)s)||'-01-01 00:00:00'",
+        'quarter': "EXTRACT(year FROM %(field)s)||'-'||((EXTRACT(month FROM %(field)s) -1) / 3 * 3 + 1)||'-01 00:00:00'",
+        'month': "EXTRACT(year FROM %(field)s)||'-'||EXTRACT(month FROM %(field)s)||'-01 00:00:00'",
+        'day': (
+            "EXTRACT(year FROM %(field)s)||'-'||EXTRACT(month FROM %(field)s)||'-'||"
+            "EXTRACT(day FROM %(field)s)||' 00:00:00'"
+        ),
+        'hour': (
+            "EXTRACT(year FROM %(field)s)||'-'||EXTRACT(month FROM %(field)s)||'-'||"
+            "EXTRACT(day FROM %(field)s)||' '||EXTRACT(hour FROM %(field)s)||':00:00'"
+        ),
+        'minute': (
+            "EXTRACT(year FROM %(field)s)||'-'||EXTRACT(month FROM %(field)s)||'-'||"
+            "EXTRACT(day FROM %(field)s)||' '||EXTRACT(hour FROM %(field)s)||':'||"
+            "EXTRACT(minute FROM %(field)s)||':00'"
+        ),
+        'second': (
+            "EXTRACT(year FROM %(field)s)||'-'||EXTRACT(month FROM %(field)s)||'-'||"
+            "EXTRACT(day FROM %(field)s)||' '||EXTRACT(hour FROM %(field)s)||':'||"
+            "EXTRACT(minute FROM %(field)s)||':'||EXTRACT(second FROM %(field)s)"
+        ),
+        'week': (
+            "DATEADD(day, IIF(EXTRACT(weekday FROM %(field)s) = 0, -6, -EXTRACT(weekday FROM %(field)s)+1), "
+            "CAST(EXTRACT(year FROM %(field)s)||'-'||EXTRACT(month FROM %(field)s)||'-'||"
+            "EXTRACT(day FROM %(field)s)||' 00:00:00' AS TIMESTAMP))"
+        ),
+    }
+
     def datetime_trunc_sql(self, lookup_type, field_name, tzname):
         """
         Given a lookup_type of 'year', 'month', 'day', 'hour', 'minute' or
@@ -196,35 +259,7 @@ class DatabaseOperations(BaseDatabaseOperations):
         a tuple of parameters.
         """
         field_name = self._convert_field_to_tz(field_name, tzname)
-        year = "EXTRACT(year FROM %s)" % field_name
-        iso_year = "EXTRACT(year FROM %s)" % field_name
-        month = "EXTRACT(month FROM %s)" % field_name
-        day = "EXTRACT(day FROM %s)" % field_name
-        hh = "EXTRACT(hour FROM %s)" % field_name
-        mm = "EXTRACT(minute FROM %s)" % field_name
-        ss = "EXTRACT(second FROM %s)" % field_name
-        yearday = "EXTRACT(yearday FROM %s)" % field_name
-        weekday = "EXTRACT(weekday FROM %s)" % field_name
-        quarter = "((EXTRACT(month FROM %s) -1) / 3 * 3 + 1)" % field_name
-        if lookup_type == 'year':
-            sql = "%s||'-01-01 00:00:00'" % year
-        elif lookup_type == 'iso_year':
-            sql = "%s||'-01-01 00:00:00'" % iso_year
-        elif lookup_type == 'quarter':
-            sql = "%s||'-'||%s||'-01 00:00:00'" % (year, quarter)
-        elif lookup_type == 'month':
-            sql = "%s||'-'||%s||'-01 00:00:00'" % (year, month)
-        elif lookup_type == 'day':
-            sql = "%s||'-'||%s||'-'||%s||' 00:00:00'" % (year, month, day)
-        elif lookup_type == 'hour':
-            sql = "%s||'-'||%s||'-'||%s||' '||%s||':00:00'" % (year, month, day, hh)
-        elif lookup_type == 'minute':
-            sql = "%s||'-'||%s||'-'||%s||' '||%s||':'||%s||':00'" % (year, month, day, hh, mm)
-        elif lookup_type == 'second':
-            sql = "%s||'-'||%s||'-'||%s||' '||%s||':'||%s||':'||%s" % (year, month, day, hh, mm, ss)
-        elif lookup_type == 'week':
-            sql = "DATEADD(day, IIF(%s = 0, -6, -%s+1), CAST(%s||'-'||%s||'-'||%s||' 00:00:00' AS TIMESTAMP))" % (weekday, weekday, year, month, day)
-        return "CAST(%s AS TIMESTAMP)" % sql
+        return "CAST(%s AS TIMESTAMP)" % (self._datetime_trunc_templates[lookup_type] % {'field': field_name})
 
     def time_trunc_sql(self, lookup_type, field_name):
         fields = {
@@ -255,20 +290,89 @@ class DatabaseOperations(BaseDatabaseOperations):
         )
 
     def quote_name(self, name):
-        if not name.startswith('"') and not name.endswith('"'):
-            name = '"%s"' % truncate_name(name, self.max_name_length())
-        return name.replace(' ', '_').upper()
+        return _quote_name(name, self.max_name_length())
+
+    # Number of tables emptied by one EXECUTE BLOCK of sql_flush()
+    flush_block_size = 200
+    # Rows of a bulk insert statement
+    bulk_insert_batch_size = 200
+    # Bytes of statement text: the 64 KB limit of Firebird 2.5, conservative
+    # for Firebird 3.0 and later which accept 10 MB
+    max_statement_length = 65535
+
+    def _flush_order(self, tables):
+        """
+        Order tables so that a table comes before the tables it references.
+        """
+        from django.apps import apps
+        names = {table.upper(): table for table in tables}
+        referenced_by = {}
+        for model in apps.get_models(include_auto_created=True):
+            table = model._meta.db_table.upper()
+            if table not in names:
+                continue
+            for f in model._meta.local_fields:
+                if f.remote_field and f.remote_field.model:
+                    other = f.remote_field.model._meta.db_table.upper()
+                    if other in names and other != table:
+                        referenced_by.setdefault(other, []).append(table)
+
+        ordered = []
+        visited = set()
+
+        def visit(table):
+            if table in visited:
+                return
+            visited.add(table)
+            for referencing in referenced_by.get(table, []):
+                visit(referencing)
+            ordered.append(names[table])
+
+        for table in tables:
+            visit(table.upper())
+        return ordered
 
     def sql_flush(self, style, tables, *, reset_sequences=False, allow_cascade=False):
-        if tables:
-            sql = ['%s %s %s;' %
-                    (style.SQL_KEYWORD('DELETE'),
-                     style.SQL_KEYWORD('FROM'),
-                     style.SQL_TABLE(self.quote_name(table))
-                     ) for table in tables]
-            return sql
-        else:
+        """
+        Empty the tables in one EXECUTE BLOCK per flush_block_size tables.
+        Tables which are already empty are skipped, referencing tables are
+        emptied before the tables they reference.
+        """
+        if not tables:
             return []
+        tables = self._flush_order(tables)
+        sql = []
+        for i in range(0, len(tables), self.flush_block_size):
+            sql.append('%s\n%s\n%s' % (
+                style.SQL_KEYWORD('EXECUTE BLOCK AS BEGIN'),
+                '\n'.join('%s (%s (%s 1 %s %s)) %s %s %s;' % (
+                    style.SQL_KEYWORD('IF'),
+                    style.SQL_KEYWORD('EXISTS'),
+                    style.SQL_KEYWORD('SELECT'),
+                    style.SQL_KEYWORD('FROM'),
+                    style.SQL_TABLE(self.quote_name(table)),
+                    style.SQL_KEYWORD('THEN'),
+                    style.SQL_KEYWORD('DELETE FROM'),
+                    style.SQL_TABLE(self.quote_name(table)),
+                ) for table in tables[i:i + self.flush_block_size]),
+                style.SQL_KEYWORD('END'),
+            ))
+        if reset_sequences:
+            names = {table.upper() for table in tables}
+            sql.extend(self.sequence_reset_by_name_sql(style, [
+                sequence for sequence in self.connection.introspection.sequence_list()
+                if sequence['table'].upper() in names
+            ]))
+        return sql
+
+    def sequence_reset_by_name_sql(self, style, sequences):
+        return ['%s %s %s %s %s;' % (
+            style.SQL_KEYWORD('ALTER TABLE'),
+            style.SQL_TABLE(self.quote_name(sequence['table'])),
+            style.SQL_KEYWORD('ALTER COLUMN'),
+            style.SQL_FIELD(self.quote_name(sequence['column'])),
+            style.SQL_KEYWORD('RESTART'),
+        ) for sequence in sequences]
 
     def sequence_reset_sql(self, style, model_list):
         from django.db import models
@@ -302,6 +406,34 @@ class DatabaseOperations(BaseDatabaseOperations):
                     ))
         return output
 
+    def bulk_insert_sql(self, fields, placeholder_rows):
+        """
+        INSERT ... SELECT ... FROM RDB$DATABASE UNION ALL SELECT ..., with
+        the values cast to the column types as the literals of the first
+        row would decide the types of the union.
+        """
+        casts = [
+            field.cast_db_type(self.connection) if field is not None else None for field in fields
+        ]
+        return ' UNION ALL '.join('SELECT %s FROM RDB$DATABASE' % ', '.join(
+            'CAST(%s AS %s)' % (placeholder, cast) if cast else placeholder
+            for placeholder, cast in zip(row, casts)
+        ) for row in placeholder_rows)
+
+    def bulk_batch_size(self, fields, objs):
+        """
+        A statement has at most 255 contexts, one per SELECT of a bulk insert,
+        and the inlined values must fit in the statement text limit.
+        """
+        batch_size = min(len(objs), self.bulk_insert_batch_size)
+        if not fields or not objs:
+            return batch_size
+        row_length = max(
+            sum(len(str(getattr(obj, field.attname, ''))) + 40 for field in fields if hasattr(field, 'attname'))
+            for obj in objs
+        )
+        return max(min(batch_size, self.max_statement_length // max(row_length, 1)), 1)
+
     def max_name_length(self):
         return 63
 
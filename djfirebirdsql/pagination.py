@@ -0,0 +1,174 @@
+"""
+Keyset pagination.
+
+OFFSET n ROWS reads and discards n rows, so deep pages are slow. A keyset
+page starts after the ordering key of the last row of the previous page:
+WHERE k1 > v1 OR (k1 = v1 AND k2 > v2) ... FETCH FIRST n ROWS ONLY, which
+walks an index on the ordering columns.
+"""
+import base64
+import json
+from collections.abc import Sequence
+from functools import reduce
+from operator import or_
+
+from django.core.paginator import Paginator
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+
+def _keys(queryset, ordering=None):
+    """
+    Return [(field, descending)] for the ordering of the queryset, ending
+    with the primary key so that the key is unique.
+    """
+    opts = queryset.model._meta
+    if ordering is None:
+        ordering = queryset.query.order_by or opts.ordering
+    keys = []
+    for name in ordering:
+        if not isinstance(name, str) or '__' in name or name.lstrip('-') == '?':
+            raise ValueError('Keyset pagination needs an ordering by fields of the model: %r' % (name,))
+        descending = name.startswith('-')
+        name = name.lstrip('-')
+        field = opts.pk if name == 'pk' else opts.get_field(name)
+        keys.append((field, descending))
+    if not any(field.primary_key for field, descending in keys):
+        keys.append((opts.pk, keys[-1][1] if keys else False))
+    return keys
+
+
+def seek(queryset, after=None, ordering=None, reverse=False):
+    """
+    Return the queryset ordered by `ordering` (default: its ordering) and
+    filtered to the rows after the key values `after`, or before them if
+    reverse is True (in reverse order). Slice it to fetch a page.
+    The ordering fields must not be NULL.
+    """
+    keys = _keys(queryset, ordering)
+    order_by = [
+        ('-%s' if descending != reverse else '%s') % field.attname
+        for field, descending in keys
+    ]
+    queryset = queryset.order_by(*order_by)
+    if after is None:
+        return queryset
+    conditions = []
+    for i, (field, descending) in enumerate(keys):
+        lookup = 'lt' if descending != reverse else 'gt'
+        condition = Q(**{'%s__%s' % (field.attname, lookup): after[i]})
+        for (f, d), value in zip(keys[:i], after[:i]):
+            condition &= Q(**{f.attname: value})
+        conditions.append(condition)
+    # A bound on the first key lets the optimizer use its index
+    field, descending = keys[0]
+    lookup = 'lte' if descending != reverse else 'gte'
+    return queryset.filter(Q(**{'%s__%s' % (field.attname, lookup): after[0]}), reduce(or_, conditions))
+
+
+def encode_cursor(values, reverse=False):
+    data = json.dumps({'k': values, 'r': reverse}, cls=DjangoJSONEncoder)
+    return base64.urlsafe_b64encode(data.encode()).decode('ascii')
+
+
+def decode_cursor(cursor, keys):
+    """Return (key values, reverse) of a cursor made by encode_cursor()."""
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        values = [field.to_python(value) for (field, descending), value in zip(keys, data['k'])]
+        reverse = bool(data['r'])
+    except (ValueError, TypeError, KeyError):
+        raise ValueError('Invalid pagination cursor')
+    if len(values) != len(keys):
+        raise ValueError('Invalid pagination cursor')
+    return values, reverse
+
+
+def approximate_count(queryset):
+    """
+    Return the row count of an unfiltered queryset estimated from the
+    statistics of the unique indexes of its table (1 / selectivity at the
+    last SET STATISTICS), or count() when that isn't possible.
+    """
+    query = queryset.query
+    connection = connections[queryset.db]
+    if (
+        connection.vendor != 'firebirdsql' or query.where or query.distinct or
+        query.combinator or query.is_sliced or query.group_by
+    ):
+        return queryset.count()
+    with connection.cursor() as cursor:
+        statistics = [
+            index.statistics for index in
+            connection.introspection.get_index_list(cursor, queryset.model._meta.db_table)
+            if index.unique and index.active and index.statistics
+        ]
+    if not statistics:
+        return queryset.count()
+    return round(1 / min(statistics))
+
+
+class KeysetPage(Sequence):
+    def __init__(self, object_list, paginator, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return '<Keyset page of %d objects>' % len(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator(Paginator):
+    """
+    Paginator which also serves pages by cursor with seek_page(), and can
+    estimate count from index statistics (approximate_count=True).
+    page(number) still works with OFFSET.
+    """
+    def __init__(self, object_list, per_page, orphans=0, allow_empty_first_page=True,
+                 ordering=None, approximate_count=False):
+        super().__init__(object_list, per_page, orphans, allow_empty_first_page)
+        self.ordering = ordering
+        self.approximate_count = approximate_count
+
+    @cached_property
+    def count(self):
+        if self.approximate_count:
+            return approximate_count(self.object_list)
+        return super().count
+
+    def seek_page(self, cursor=None):
+        """Return the KeysetPage after (or before) the cursor, the first page for None."""
+        keys = _keys(self.object_list, self.ordering)
+        values, reverse = decode_cursor(cursor, keys) if cursor else (None, False)
+        ordering = [('-%s' if descending else '%s') % field.name for field, descending in keys]
+        rows = list(seek(self.object_list, values, ordering, reverse)[:self.per_page + 1])
+        more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if reverse:
+            rows.reverse()
+        has_next = more or reverse
+        has_previous = cursor is not None and (more or not reverse)
+        next_cursor = previous_cursor = None
+        if rows and has_next:
+            next_cursor = encode_cursor([getattr(rows[-1], field.attname) for field, descending in keys])
+        if rows and has_previous:
+            previous_cursor = encode_cursor([getattr(rows[0], field.attname) for field, descending in keys], True)
+        return KeysetPage(rows, self, next_cursor, previous_cursor)
@@ -0,0 +1,138 @@
+"""
+Read-through cache of the results of SELECT statements.
+
+In a DatabaseWrapper.cache_queries() block (each request with
+QueryCacheMiddleware) FirebirdCursorWrapper.execute() answers a SELECT it
+already ran in the block, with the same SQL and parameters, from the rows
+it fetched then. An INSERT, UPDATE, DELETE or MERGE executed through the
+connection drops the results which refer to its table and, unless it's an
+INSERT, to the tables with foreign keys to it, whose rows ON DELETE CASCADE
+or SET NULL changes. Any other statement (DDL, EXECUTE BLOCK, EXECUTE
+PROCEDURE, ROLLBACK TO SAVEPOINT) and a rollback drop all of them.
+
+Writes of other connections and of triggers aren't seen, so the results can
+be as old as the block. The replication heartbeat is never cached.
+"""
+import re
+from collections import OrderedDict
+from contextlib import ExitStack
+
+from django.db import connections
+
+from .replication import HEARTBEAT_TABLE
+
+_select_re = re.compile(r'\s*(SELECT|WITH)\b', re.IGNORECASE)
+# Values which change from one execution to the next and locking reads
+_volatile_re = re.compile(
+    r"\b(GEN_ID|NEXT\s+VALUE|CURRENT_\w+|LOCALTIME|LOCALTIMESTAMP|RAND|GEN_UUID|RDB\$GET_CONTEXT|"
+    r"WITH\s+LOCK|FOR\s+UPDATE)\b|'(NOW|TODAY|TOMORROW|YESTERDAY)'",
+    re.IGNORECASE
+)
+_dml_re = re.compile(
+    r'\s*(INSERT\s+INTO|UPDATE\s+OR\s+INSERT\s+INTO|UPDATE|DELETE\s+FROM|MERGE\s+INTO)\s+(?:"([^"]+)"|([\w$]+))',
+    re.IGNORECASE
+)
+_identifier_re = re.compile(r'"([^"]+)"|([A-Za-z][\w$]*)')
+
+
+def _identifiers(query):
+    "The names a statement may refer to tables with, in the case Firebird stores them."
+    return {quoted or name.upper() for quoted, name in _identifier_re.findall(query)}
+
+
+class QueryCache:
+    """
+    At most max_entries results of at most max_rows rows, keyed by the SQL
+    with the parameters inlined; the least recently used go first.
+
+    references(table) returns the names of the tables with foreign keys to
+    table, see DatabaseIntrospection._get_references().
+    """
+    # Tables which change without a write of the connection
+    uncached_tables = frozenset([HEARTBEAT_TABLE.upper()])
+
+    def __init__(self, max_entries=100, max_rows=100, references=None):
+        self.max_entries = max_entries
+        self.max_rows = max_rows
+        self.references = references
+        # query: (rows, description, identifiers)
+        self._entries = OrderedDict()
+        # table: tables whose rows a write to it can change
+        self._dependents = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, query):
+        """Return (rows, description) of a cached SELECT or None."""
+        entry = self._entries.get(query)
+        if entry is None:
+            if _select_re.match(query):
+                self.misses += 1
+            return None
+        self._entries.move_to_end(query)
+        self.hits += 1
+        return entry[0], entry[1]
+
+    def executed(self, query, rows, description):
+        """Record the result of a statement, or what it wrote."""
+        if not _select_re.match(query):
+            self.invalidate(query)
+        elif description is not None and len(rows) <= self.max_rows and not _volatile_re.search(query):
+            identifiers = _identifiers(query)
+            if identifiers & self.uncached_tables:
+                return
+            self._entries[query] = (tuple(rows), description, identifiers)
+            self._entries.move_to_end(query)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, query):
+        m = _dml_re.match(query)
+        if m is None:
+            self.clear()
+            return
+        table = m.group(2) or m.group(3).upper()
+        if not self._entries:
+            return
+        if m.group(1).split()[0].upper() == 'INSERT':
+            tables = {table}
+        else:
+            tables = self._dependent_tables(table)
+        for key in [key for key, entry in self._entries.items() if tables & entry[2]]:
+            del self._entries[key]
+
+    def _dependent_tables(self, table):
+        """table and the tables which reference it, directly or not."""
+        if self.references is None:
+            return {table}
+        if table not in self._dependents:
+            tables = {table}
+            pending = [table]
+            while pending:
+                for name in self.references(pending.pop()):
+                    name = name.strip().upper()
+                    if name not in tables:
+                        tables.add(name)
+                        pending.append(name)
+            self._dependents[table] = tables
+        return self._dependents[table]
+
+    def clear(self):
+        self._entries.clear()
+        self._dependents.clear()
+
+
+class QueryCacheMiddleware:
+    """Cache the queries of each request on the Firebird databases."""
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with ExitStack() as stack:
+            for connection in connections.all():
+                if connection.vendor == 'firebirdsql':
+                    stack.enter_context(connection.cache_queries())
+            return self.get_response(request)
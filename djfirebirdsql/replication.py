@@ -0,0 +1,189 @@
+"""
+Reads from Firebird replicas.
+
+A database alias with OPTIONS['replica_of'] = 'default' is a replica of
+'default'. ReplicaRouter sends reads to a replica which is fresh and writes
+to the primary, and keeps the reads of a thread (a request with
+ReplicaPinningMiddleware) on the primary after it runs an INSERT, UPDATE,
+DELETE, MERGE or EXECUTE statement.
+
+A replica is fresh when the heartbeat row which beat() writes on the
+primary arrived on it less than OPTIONS['max_replication_lag'] seconds ago
+(default 5). Run beat() (or the replicationheartbeat command) on the
+primary more often than that. The heartbeat and its age are both read from
+the clock of the primary server.
+"""
+import random
+import re
+import time
+from contextlib import contextmanager
+
+from asgiref.local import Local
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+HEARTBEAT_TABLE = 'djfirebirdsql_heartbeat'
+# Seconds since 1970 on the clock of the server, in the time zone of the session
+SERVER_TIME = "DATEDIFF(MILLISECOND FROM TIMESTAMP '1970-01-01 00:00:00' TO CAST(CURRENT_TIMESTAMP AS TIMESTAMP)) / 1e3"
+# Statements after which the reads are pinned to the primary
+_write_re = re.compile(r'\s*(INSERT|UPDATE|DELETE|MERGE|EXECUTE)\b', re.IGNORECASE)
+
+_local = Local()
+
+
+def pin():
+    """Send the reads of this thread to the primary."""
+    _local.pinned = True
+
+
+def unpin():
+    _local.pinned = False
+    _local.wrote = False
+
+
+def executed(query):
+    """Pin the reads of this thread when a query which a cursor ran writes."""
+    if _write_re.match(query):
+        _local.pinned = True
+        _local.wrote = True
+
+
+def pinned():
+    return getattr(_local, 'pinned', False)
+
+
+@contextmanager
+def use_primary():
+    """Send the reads in the block to the primary."""
+    old = pinned()
+    pin()
+    try:
+        yield
+    finally:
+        _local.pinned = old
+
+
+def create_heartbeat_table(using=DEFAULT_DB_ALIAS):
+    connection = connections[using]
+    if HEARTBEAT_TABLE in connection.introspection.table_names():
+        return
+    quote_name = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute('CREATE TABLE %s (%s INTEGER NOT NULL PRIMARY KEY, %s DOUBLE PRECISION NOT NULL)' % (
+            quote_name(HEARTBEAT_TABLE), quote_name('id'), quote_name('beat'),
+        ))
+
+
+def beat(using=DEFAULT_DB_ALIAS):
+    """Write the server time to the heartbeat row of the primary."""
+    connection = connections[using]
+    quote_name = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute('UPDATE OR INSERT INTO %s (%s, %s) VALUES (1, %s) MATCHING (%s)' % (
+            quote_name(HEARTBEAT_TABLE), quote_name('id'), quote_name('beat'), SERVER_TIME, quote_name('id'),
+        ))
+
+
+def replication_lag(using):
+    """
+    Return the age in seconds of the heartbeat row of a replica, or None
+    when it has none. It is at most the replication lag plus the interval
+    between beats. The age is the time of the primary server less the
+    heartbeat, so the clocks of the hosts don't matter.
+    """
+    connection = connections[using]
+    quote_name = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT %s FROM %s WHERE %s = 1' % (
+            quote_name('beat'), quote_name(HEARTBEAT_TABLE), quote_name('id'),
+        ))
+        row = cursor.fetchone()
+    if row is None:
+        return None
+    with connections[connection.settings_dict['OPTIONS']['replica_of']].cursor() as cursor:
+        cursor.execute('SELECT %s FROM RDB$DATABASE' % SERVER_TIME)
+        now = cursor.fetchone()[0]
+    return max(now - row[0], 0)
+
+
+class ReplicaRouter:
+    """
+    Database router for DATABASE_ROUTERS which reads from the fresh
+    replicas of primary_alias.
+    """
+    primary_alias = DEFAULT_DB_ALIAS
+    # Seconds a replica freshness check is reused
+    freshness_check_interval = 1.0
+
+    def __init__(self):
+        # alias: (time of the check, fresh)
+        self._freshness = {}
+
+    def replicas(self):
+        return [
+            alias for alias, settings_dict in connections.databases.items()
+            if settings_dict.get('OPTIONS', {}).get('replica_of') == self.primary_alias
+        ]
+
+    def is_fresh(self, alias):
+        now = time.monotonic()
+        checked = self._freshness.get(alias)
+        if checked is not None and now - checked[0] < self.freshness_check_interval:
+            return checked[1]
+        max_lag = connections[alias].settings_dict['OPTIONS'].get('max_replication_lag', 5)
+        try:
+            lag = replication_lag(alias)
+        except DatabaseError:
+            lag = None
+        fresh = lag is not None and lag <= max_lag
+        self._freshness[alias] = (now, fresh)
+        return fresh
+
+    def db_for_read(self, model, **hints):
+        if pinned() or connections[self.primary_alias].in_atomic_block:
+            return self.primary_alias
+        replicas = [alias for alias in self.replicas() if self.is_fresh(alias)]
+        if not replicas:
+            return self.primary_alias
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        # The reads are pinned when a write runs, see executed()
+        return self.primary_alias
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {self.primary_alias, *self.replicas()}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, **hints):
+        if db in self.replicas():
+            return False
+        return None
+
+
+class ReplicaPinningMiddleware:
+    """
+    Keep the reads of a request on the primary after a write, and of the
+    requests of the same client for pin_cookie_age seconds after it (e.g.
+    the redirect after a POST).
+    """
+    pin_cookie_name = 'djfirebirdsql_pinned'
+    pin_cookie_age = 15
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        unpin()
+        if request.COOKIES.get(self.pin_cookie_name):
+            pin()
+        try:
+            response = self.get_response(request)
+            if getattr(_local, 'wrote', False):
+                response.set_cookie(
+                    self.pin_cookie_name, '1', max_age=self.pin_cookie_age, httponly=True, samesite='Lax',
+                )
+        finally:
+            unpin()
+        return response
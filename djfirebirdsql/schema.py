@@ -1,8 +1,61 @@
+import logging
+import re
+from contextlib import contextmanager
+
 from django.db.backends.base.schema import BaseDatabaseSchemaEditor
 from django.db.backends.ddl_references import Columns
 from django.db import DatabaseError
+from django.db.transaction import TransactionManagementError
 from .cursor import _quote_value     # NOQA isort:skip
 
+logger = logging.getLogger('django.db.backends.schema')
+
+_name = r'(?:"([^"]+)"|(\w+))'
+# Statements which change the metadata of the table in the match
+_ddl_table_re = re.compile(
+    r'\s*(?:(?:RE)?CREATE|ALTER|DROP)\s+TABLE\s+%s'
+    r'|\s*CREATE\s+(?:UNIQUE\s+)?(?:ASC\w*\s+|DESC\w*\s+)?INDEX\s+%s\s+ON\s+%s' % (_name, _name, _name),
+    re.IGNORECASE,
+)
+# Statements which don't change the metadata
+_dml_re = re.compile(
+    r'\s*(?:SELECT|INSERT|UPDATE|DELETE|MERGE|SET\s+STATISTICS|ALTER\s+INDEX\s+\S+\s+(?:IN)?ACTIVE)\b', re.IGNORECASE
+)
+
+# Statements which can be run together by the deferred DDL mode
+_batch_re = re.compile(
+    r'\s*(?:ALTER\s+TABLE\s+\S+\s+(?:ADD|DROP)\s+CONSTRAINT|(?:CREATE|DROP)\s+(?:UNIQUE\s+)?INDEX)\b', re.IGNORECASE
+)
+_alter_table_re = re.compile(r'\s*ALTER\s+TABLE\s+(\S+)\s+', re.IGNORECASE)
+
+
+def _combine_ddl(statements):
+    """Merge consecutive ALTER TABLE statements of the same table."""
+    combined = []
+    last_table = None
+    for sql in statements:
+        m = _alter_table_re.match(sql)
+        table = m.group(1) if m else None
+        if table is not None and table == last_table:
+            combined[-1] += ', ' + sql[m.end():]
+        else:
+            combined.append(sql)
+        last_table = table
+    return combined
+
+
+def _ddl_table_name(sql):
+    """
+    Return the table name changed by the DDL statement, '' if it doesn't
+    change metadata and None if the table is unknown.
+    """
+    if _dml_re.match(sql):
+        return ''
+    m = _ddl_table_re.match(sql)
+    if m is None:
+        return None
+    return m.group(1) or m.group(2) or m.group(5) or m.group(6)
+
 
 class DatabaseSchemaEditor(BaseDatabaseSchemaEditor):
     sql_create_table = "RECREATE TABLE %(table)s (%(definition)s)"
@@ -22,6 +75,158 @@ class DatabaseSchemaEditor(BaseDatabaseSchemaEditor):
     sql_add_identity = "ALTER TABLE %(table)s ALTER COLUMN %(column)s SET GENERATED BY DEFAULT"
     sql_delete_identity = "ALTER TABLE %(table)s ALTER COLUMN %(column)s DROP IDENTITY"
     sql_create_index = "CREATE INDEX %(name)s ON %(table)s (%(columns)s)%(extra)s"
+    sql_deactivate_index = "ALTER INDEX %(name)s INACTIVE"
+    sql_activate_index = "ALTER INDEX %(name)s ACTIVE"
+    sql_set_statistics = "SET STATISTICS INDEX %(name)s"
+    sql_create_shadow_trigger = (
+        "CREATE TRIGGER %(name)s FOR %(table)s ACTIVE BEFORE INSERT OR UPDATE POSITION 32767 AS "
+        "BEGIN NEW.%(shadow)s = %(value)s; END"
+    )
+    sql_delete_trigger = "DROP TRIGGER %(name)s"
+
+    # Rows copied per transaction by rebuild_field()
+    rebuild_batch_size = 10000
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._ddl_batch = None
+
+    def __enter__(self):
+        self._catalog_cache = self.connection.introspection.catalog_cache()
+        self._catalog_cache.__enter__()
+        return super().__enter__()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            if exc_type is None:
+                with self.deferred_ddl():
+                    for sql in self.deferred_sql:
+                        self.execute(sql)
+                self.deferred_sql = []
+            super().__exit__(exc_type, exc_value, traceback)
+        finally:
+            self._catalog_cache.__exit__(exc_type, exc_value, traceback)
+
+    def execute(self, sql, params=()):
+        if self._ddl_batch is not None and not self.collect_sql and not params and _batch_re.match(str(sql)):
+            self._ddl_batch.append(str(sql))
+            return
+        self.flush_ddl()
+        self._execute(sql, params, [str(sql)])
+
+    def _execute(self, sql, params, statements):
+        super().execute(sql, params)
+        if not self.collect_sql:
+            for statement in statements:
+                table_name = _ddl_table_name(statement)
+                if table_name != '':
+                    self.connection.introspection.invalidate_catalog(table_name)
+                    self.connection.identity_allocator.invalidate(table_name)
+
+    @contextmanager
+    def deferred_ddl(self):
+        """
+        Collect the constraint and index statements and run them together
+        before the next other statement or on exit: the ALTER TABLE
+        statements of a table are merged and the rest is sent in an
+        EXECUTE BLOCK, which is one round trip and one metadata commit.
+        """
+        if self._ddl_batch is not None:
+            yield
+            return
+        self._ddl_batch = []
+        try:
+            yield
+            self.flush_ddl()
+        finally:
+            self._ddl_batch = None
+
+    def flush_ddl(self):
+        if not self._ddl_batch:
+            return
+        statements = _combine_ddl(self._ddl_batch)
+        self._ddl_batch = []
+        self._execute_statements(statements)
+
+    def _execute_statements(self, statements):
+        """Run the DDL statements in one transaction with as few round trips as possible."""
+        if len(statements) == 1:
+            self._execute(statements[0], (), statements)
+            return
+        # EXECUTE BLOCKs under the statement text limit
+        block_length = len('EXECUTE BLOCK AS BEGIN  END')
+        chunks = [[]]
+        length = block_length
+        for sql in statements:
+            statement = "EXECUTE STATEMENT '%s';" % sql.replace("'", "''")
+            size = len(statement.encode('utf-8')) + 1
+            if chunks[-1] and length + size > self.connection.ops.max_statement_length:
+                chunks.append([])
+                length = block_length
+            chunks[-1].append((sql, statement))
+            length += size
+        for chunk in chunks:
+            self._execute(
+                'EXECUTE BLOCK AS BEGIN %s END' % ' '.join(statement for sql, statement in chunk),
+                (), [sql for sql, statement in chunk],
+            )
+
+    @contextmanager
+    def bulk_load(self, *models):
+        """
+        Deactivate the indexes of the models' tables which don't back a
+        constraint while rows are loaded. On exit they are activated, which
+        rebuilds them, and the statistics of the other indexes are recomputed.
+
+        Index changes take effect at commit, so it can't be used inside a
+        transaction.
+        """
+        if self.connection.in_atomic_block:
+            raise TransactionManagementError("bulk_load() can't be used inside a transaction.")
+        tables = {model._meta.db_table.upper() for model in models}
+        deactivated = []
+        kept = []
+        with self.connection.cursor() as cursor:
+            for table in sorted(tables):
+                for index in self.connection.introspection.get_index_list(cursor, table):
+                    if not index.active:
+                        continue
+                    if index.constraint or index.unique:
+                        kept.append(index.name)
+                    else:
+                        deactivated.append(index.name)
+        for name in deactivated:
+            self.execute(self.sql_deactivate_index % {'name': self.quote_name(name)})
+        try:
+            yield
+        finally:
+            for name in deactivated:
+                self.execute(self.sql_activate_index % {'name': self.quote_name(name)})
+            for name in kept:
+                self.execute(self.sql_set_statistics % {'name': self.quote_name(name)})
+
+    def update_statistics(self, *models, stale_only=False, count_rows=False):
+        """
+        Recompute the statistics of the active indexes of the models' tables,
+        or of all tables if no model is given, and return the index names.
+        With stale_only only the indexes reported stale by
+        DatabaseIntrospection.get_index_statistics(count_rows=count_rows) are
+        recomputed.
+        """
+        introspection = self.connection.introspection
+        tables = sorted({model._meta.db_table.upper() for model in models}) or [None]
+        names = []
+        with self.connection.cursor() as cursor:
+            for table in tables:
+                if stale_only:
+                    names.extend(
+                        s.name for s in introspection.get_index_statistics(cursor, table, count_rows) if s.stale
+                    )
+                else:
+                    names.extend(i.name for i in introspection.get_index_list(cursor, table) if i.active)
+        for name in names:
+            self.execute(self.sql_set_statistics % {'name': self.quote_name(name)})
+        return names
 
     def quote_value(self, value):
         if isinstance(value, str):
@@ -37,10 +242,11 @@ class DatabaseSchemaEditor(BaseDatabaseSchemaEditor):
         return indexes
 
     def remove_field(self, model, field):
-        for index_name in self._get_field_indexes(model, field):
-            sql = self._delete_constraint_sql(self.sql_delete_index, model, index_name)
-            self.execute(sql)
-        super(DatabaseSchemaEditor, self).remove_field(model, field)
+        with self.deferred_ddl():
+            for index_name in self._get_field_indexes(model, field):
+                sql = self._delete_constraint_sql(self.sql_delete_index, model, index_name)
+                self.execute(sql)
+            super(DatabaseSchemaEditor, self).remove_field(model, field)
 
     def _alter_column_type_sql(self, model, old_field, new_field, new_type):
         if new_field.get_internal_type() == 'AutoField':
@@ -53,22 +259,183 @@ class DatabaseSchemaEditor(BaseDatabaseSchemaEditor):
 
     def delete_model(self, model):
         """Delete a model from the database."""
-        # delete related foreign key constraints
-        for r in self.connection.introspection._get_references(model._meta.db_table):
-            self.execute(self.sql_delete_fk % {'name': r[0], 'table': r[1].upper()})
-        with self.connection.cursor() as cursor:
-            for k, v in self.connection.introspection.get_constraints(cursor, model._meta.db_table).items():
-                if v['foreign_key']:
-                    self.execute(self.sql_delete_fk % {'name': k, 'table': model._meta.db_table.upper()})
+        with self.deferred_ddl():
+            # delete related foreign key constraints
+            dropped = set()
+            for r in sorted(self.connection.introspection._get_references(model._meta.db_table), key=lambda r: r[1]):
+                self.execute(self.sql_delete_fk % {'name': r[0], 'table': r[1].upper()})
+                dropped.add(r[0].strip().lower())
+            with self.connection.cursor() as cursor:
+                for k, v in self.connection.introspection.get_constraints(cursor, model._meta.db_table).items():
+                    if v['foreign_key'] and k not in dropped:
+                        self.execute(self.sql_delete_fk % {'name': k, 'table': model._meta.db_table.upper()})
 
-        super().delete_model(model)
+            super().delete_model(model)
 
     def alter_field(self, model, old_field, new_field, strict=False):
         try:
             super().alter_field(model, old_field, new_field, False)
-        except DatabaseError as e:
-            # TODO: something need alter field type workaround
-            raise e
+            return
+        except DatabaseError:
+            # Firebird can't convert some column types in place
+            if not self._can_rebuild_field(model, old_field, new_field):
+                raise
+        # Outside of the except block, its errors aren't chained to the ALTER's
+        self.rebuild_field(model, old_field, new_field)
+
+    def _can_rebuild_field(self, model, old_field, new_field):
+        old_type = old_field.db_parameters(connection=self.connection)['type']
+        new_type = new_field.db_parameters(connection=self.connection)['type']
+        if (
+            self.collect_sql or old_type is None or new_type is None or old_type == new_type or
+            old_field.column != new_field.column or old_field.primary_key or new_field.primary_key
+        ):
+            return False
+        # The foreign keys referencing the column would have to be rebuilt too
+        column = old_field.column.lower()
+        return not any(
+            r[4].strip().lower() == column
+            for r in self.connection.introspection._get_references(model._meta.db_table)
+        )
+
+    def rebuild_field(self, model, old_field, new_field, batch_size=None, progress=None):
+        """
+        Change the type of a column by rebuilding it: add a shadow column of
+        the new type kept in sync by a trigger, copy the rows in primary key
+        order in transactions of batch_size rows, then drop the column and
+        rename the shadow column in one transaction and recreate the
+        constraints and indexes of the column. When the copy or the swap
+        fails the trigger and the shadow column are dropped.
+
+        progress(copied, total) is called after each batch.
+        """
+        batch_size = batch_size or self.rebuild_batch_size
+        table = model._meta.db_table
+        column = new_field.column
+        shadow = self._create_index_name(table, [column], suffix='_new')
+        trigger = self._create_index_name(table, [column], suffix='_sync')
+        pk = self.quote_name(model._meta.pk.column)
+        new_type = new_field.db_parameters(connection=self.connection)['type']
+
+        self.execute(self.sql_create_column % {
+            'table': self.quote_name(table),
+            'column': self.quote_name(shadow),
+            'definition': new_type,
+        })
+        try:
+            # The trigger fills the shadow column of new rows and of the rows the
+            # copy below touches, NULLs become the default of the new field
+            value = 'CAST(NEW.%s AS %s)' % (self.quote_name(column), new_type)
+            default = self.effective_default(new_field)
+            if old_field.null and not new_field.null and default is not None:
+                value = 'COALESCE(%s, %s)' % (value, self.quote_value(default))
+            self.execute(self.sql_create_shadow_trigger % {
+                'name': self.quote_name(trigger),
+                'table': self.quote_name(table),
+                'shadow': self.quote_name(shadow),
+                'value': value,
+            })
+
+            # Copy the rows, one transaction per batch unless in an atomic block
+            with self.connection.cursor() as cursor:
+                cursor.execute('SELECT COUNT(*) FROM %s' % self.quote_name(table))
+                total = cursor.fetchone()[0]
+                copied = 0
+                last = None
+                while True:
+                    where = '' if last is None else ' WHERE %s > %%s' % pk
+                    cursor.execute('SELECT MAX(%s) FROM (SELECT %s FROM %s%s ORDER BY %s ROWS %d)' % (
+                        pk, pk, self.quote_name(table), where, pk, batch_size
+                    ), [] if last is None else [last])
+                    upto = cursor.fetchone()[0]
+                    if upto is None:
+                        break
+                    cursor.execute('UPDATE %s SET %s = %s WHERE %s%s <= %%s' % (
+                        self.quote_name(table), self.quote_name(column), self.quote_name(column),
+                        '' if last is None else '%s > %%s AND ' % pk, pk,
+                    ), ([] if last is None else [last]) + [upto])
+                    last = upto
+                    copied = min(copied + batch_size, total)
+                    logger.info('Rebuilding %s.%s: %d/%d rows', table, column, copied, total)
+                    if progress is not None:
+                        progress(copied, total)
+
+            # Swap the columns
+            statements = [self.sql_delete_trigger % {'name': self.quote_name(trigger)}]
+            with self.connection.cursor() as cursor:
+                introspection = self.connection.introspection
+                plain_indexes = {i.name for i in introspection.get_index_list(cursor, table) if not i.constraint}
+                constraints = introspection.get_constraints(cursor, table)
+            for name, c in constraints.items():
+                if column.lower() not in c['columns'] or c['primary_key']:
+                    continue
+                if name in plain_indexes:
+                    template = self.sql_delete_index
+                elif c['foreign_key']:
+                    template = self.sql_delete_fk
+                else:
+                    template = self.sql_delete_unique
+                statements.append(str(self._delete_constraint_sql(template, model, name)))
+            statements.append(self.sql_delete_column % {
+                'table': self.quote_name(table), 'column': self.quote_name(column),
+            })
+            statements.append(self.sql_rename_column % {
+                'table': self.quote_name(table),
+                'old_column': self.quote_name(shadow),
+                'new_column': self.quote_name(column),
+            })
+            self.flush_ddl()
+            self._execute_statements(statements)
+        except Exception:
+            self._drop_shadow_column(table, shadow, trigger)
+            raise
+        if self.connection.features.connection_persists_old_columns:
+            self.connection.close()
+
+        if not new_field.null:
+            self.execute(self.sql_alter_column % {
+                'table': self.quote_name(table),
+                'changes': self.sql_alter_column_not_null % {'column': self.quote_name(column)},
+            })
+        with self.deferred_ddl():
+            for sql in self._field_constraints_sql(model, new_field):
+                self.execute(sql)
+
+    def _drop_shadow_column(self, table, shadow, trigger):
+        """Drop what a failed rebuild_field() left, ignoring what's gone."""
+        for sql in (
+            self.sql_delete_trigger % {'name': self.quote_name(trigger)},
+            self.sql_delete_column % {'table': self.quote_name(table), 'column': self.quote_name(shadow)},
+        ):
+            try:
+                self._execute(sql, (), [sql])
+            except DatabaseError:
+                pass
+
+    def _field_constraints_sql(self, model, field):
+        """The statements creating the constraints and indexes which use the field."""
+        statements = []
+        if field.unique:
+            statements.append(self._create_unique_sql(model, [field.column]))
+        elif field.db_index:
+            statements.append(self._create_index_sql(model, fields=[field]))
+        if field.remote_field and field.db_constraint:
+            statements.append(self._create_fk_sql(model, field, "_fk_%(to_table)s_%(to_column)s"))
+        for field_names in model._meta.unique_together:
+            if field.name in field_names:
+                columns = [model._meta.get_field(name).column for name in field_names]
+                statements.append(self._create_unique_sql(model, columns))
+        for field_names in model._meta.index_together:
+            if field.name in field_names:
+                fields = [model._meta.get_field(name) for name in field_names]
+                statements.append(self._create_index_sql(model, fields=fields, suffix='_idx'))
+        for index in model._meta.indexes:
+            if field.name in [name.lstrip('-') for name in index.fields]:
+                statements.append(index.create_sql(model, self))
+        for constraint in model._meta.constraints:
+            if field.name in getattr(constraint, 'fields', ()):
+                statements.append(constraint.create_sql(model, self))
+        return [sql for sql in statements if sql is not None]
 
     def _index_columns(self, table, columns, col_suffixes, opclasses):
         return Columns(table, columns, self.quote_name)
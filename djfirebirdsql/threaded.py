@@ -0,0 +1,159 @@
+"""
+Awaitable wrappers of a connection which runs in a worker thread.
+
+This is not a non-blocking driver: firebirdsql speaks the wire protocol
+with blocking sockets, and each ThreadedConnection owns one worker thread
+(a single worker ThreadPoolExecutor) which runs the blocking calls. A
+coroutine awaiting its connection doesn't take a thread from the
+sync_to_async pool per query, but each open connection holds a thread.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.exceptions import EmptyResultSet
+from django.db import connections
+from django.db.utils import InterfaceError
+from django.db.models.sql.constants import GET_ITERATOR_CHUNK_SIZE
+
+from .connection import FirebirdConnection
+from .cursor import FirebirdCursorWrapper
+
+
+class ThreadedCursor:
+    def __init__(self, connection, cursor):
+        self.connection = connection
+        self.cursor = cursor
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc, value, traceback):
+        await self.close()
+
+    @property
+    def description(self):
+        return self.cursor.description
+
+    @property
+    def query(self):
+        return self.cursor.query
+
+    async def execute(self, query, params=None):
+        await self.connection._run(self.cursor.execute, query, params)
+
+    async def executemany(self, query, param_list):
+        await self.connection._run(self.cursor.executemany, query, param_list)
+
+    # Rows are buffered by execute(), fetching doesn't touch the socket.
+    async def fetchone(self):
+        return self.cursor.fetchone()
+
+    async def fetchmany(self, size=1):
+        return self.cursor.fetchmany(size)
+
+    async def fetchall(self):
+        return self.cursor.fetchall()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        r = self.cursor.fetchone()
+        if r is None:
+            raise StopAsyncIteration
+        return r
+
+    async def close(self):
+        # A closed connection has closed its cursors
+        if not self.cursor.closed and self.connection._executor is not None:
+            await self.connection._run(self.cursor.close)
+
+
+class ThreadedConnection:
+    def __init__(self, conn_params, statement_timeout=None):
+        self.conn_params = conn_params
+        self.statement_timeout = statement_timeout
+        self.connection = None
+        self._executor = ThreadPoolExecutor(max_workers=1)
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc, value, traceback):
+        await self.close()
+
+    async def _run(self, func, *args):
+        if self._executor is None:
+            raise InterfaceError('Connection is closed')
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    def _connect(self):
+        connection = FirebirdConnection(**self.conn_params)
+        connection.set_autocommit(True)
+        if self.statement_timeout is not None:
+            with connection.cursor(FirebirdCursorWrapper) as cursor:
+                cursor.execute('SET STATEMENT TIMEOUT %d MILLISECOND' % int(self.statement_timeout))
+        return connection
+
+    async def connect(self):
+        if self.connection is None:
+            self.connection = await self._run(self._connect)
+
+    async def cursor(self):
+        await self.connect()
+        cursor = await self._run(self.connection.cursor, FirebirdCursorWrapper)
+        return ThreadedCursor(self, cursor)
+
+    def cancel(self):
+        if self.connection is not None:
+            self.connection.cancel()
+
+    async def close(self):
+        if self._executor is None:
+            return
+        if self.connection is not None:
+            await self._run(self.connection.close)
+            self.connection = None
+        self._executor.shutdown(wait=False)
+        self._executor = None
+
+
+async def connect(using='default'):
+    """Open a ThreadedConnection with the settings of the `using` database."""
+    wrapper = connections[using]
+    connection = ThreadedConnection(
+        wrapper.get_connection_params(),
+        wrapper.settings_dict['OPTIONS'].get('statement_timeout'),
+    )
+    await connection.connect()
+    return connection
+
+
+async def aiter_rows(queryset, connection, chunk_size=GET_ITERATOR_CHUNK_SIZE):
+    """
+    Execute a values_list() style queryset on a ThreadedConnection and yield
+    its rows with the backend's converters applied.
+    """
+    compiler = queryset.query.get_compiler(queryset.db)
+    try:
+        sql, params = compiler.as_sql()
+    except EmptyResultSet:
+        return
+    fields = [s[0] for s in compiler.select[0:compiler.col_count]]
+    converters = compiler.get_converters(fields)
+    async with await connection.cursor() as cursor:
+        await cursor.execute(sql, params)
+        while True:
+            rows = await cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            if converters:
+                rows = compiler.apply_converters(rows, converters)
+            for row in rows:
+                yield tuple(row)
+
+
+async def aget_rows(queryset, connection):
+    return [row async for row in aiter_rows(queryset, connection)]
@@ -0,0 +1,36 @@
+import asyncio
+from contextlib import contextmanager
+
+from asgiref.sync import sync_to_async
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+async def cancellable(func, *args, using=DEFAULT_DB_ALIAS, **kwargs):
+    """
+    Run a synchronous database function from async code with sync_to_async.
+    If the awaiting task is cancelled (request timeout, client disconnect)
+    the running statement is cancelled on the server too.
+    """
+    used = []
+
+    def run():
+        used.append(connections[using])
+        return func(*args, **kwargs)
+
+    try:
+        return await sync_to_async(run)()
+    except asyncio.CancelledError:
+        if used:
+            used[0].cancel()
+        raise
+
+
+@contextmanager
+def bulk_load(*models, using=DEFAULT_DB_ALIAS):
+    """
+    Load rows into the models' tables with their plain indexes deactivated,
+    e.g. around bulk_create(). See DatabaseSchemaEditor.bulk_load().
+    """
+    with connections[using].schema_editor() as editor:
+        with editor.bulk_load(*models):
+            yield
@@ -24,5 +24,5 @@ setup(name='djfirebirdsql',
         license='BSD',
         author='Hajime Nakagami',
         author_email='nakagami@gmail.com',
-        packages = ['djfirebirdsql'],
+        packages = ['djfirebirdsql', 'djfirebirdsql.management', 'djfirebirdsql.management.commands'],
 )
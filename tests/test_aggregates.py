@@ -0,0 +1,59 @@
+from django.db import NotSupportedError, connection, models
+from django.test import SimpleTestCase, TransactionTestCase
+
+from djfirebirdsql.aggregates import List
+
+
+class Label(models.Model):
+    group = models.IntegerField()
+    name = models.CharField(max_length=20, null=True)
+
+    class Meta:
+        app_label = 'tests'
+
+
+class ListSQLTests(SimpleTestCase):
+    def test_sql(self):
+        sql, params = Label.objects.values('group').annotate(names=List('name', '; ')).query.sql_with_params()
+        self.assertIn('LIST("TESTS_LABEL"."NAME", %s)', sql)
+        self.assertIn('; ', params)
+        sql, params = Label.objects.values('group').annotate(names=List('name', distinct=True)).query.sql_with_params()
+        self.assertIn('LIST(DISTINCT "TESTS_LABEL"."NAME", %s)', sql)
+
+    def test_ordering(self):
+        with self.assertRaises(NotSupportedError):
+            List('name', ordering=('name',))
+
+
+class ListTests(TransactionTestCase):
+    available_apps = []
+
+    def setUp(self):
+        with connection.schema_editor() as editor:
+            editor.create_model(Label)
+        Label.objects.bulk_create([
+            Label(group=1, name='a'), Label(group=1, name='b'), Label(group=1, name='a'),
+            Label(group=2, name=None), Label(group=3, name='x' * 20),
+        ])
+
+    def tearDown(self):
+        with connection.schema_editor() as editor:
+            editor.delete_model(Label)
+
+    def test_list(self):
+        names = dict(Label.objects.values_list('group').annotate(names=List('name', '|')).order_by('group'))
+        self.assertEqual(sorted(names[1].split('|')), ['a', 'a', 'b'])
+        # A group of NULLs
+        self.assertEqual(names[2], '')
+        self.assertEqual(names[3], 'x' * 20)
+
+    def test_distinct(self):
+        names = Label.objects.filter(group=1).aggregate(names=List('name', distinct=True))['names']
+        self.assertEqual(sorted(names.split(',')), ['a', 'b'])
+
+    def test_filter(self):
+        names = Label.objects.aggregate(names=List('name', filter=models.Q(group=3)))['names']
+        self.assertEqual(names, 'x' * 20)
+
+    def test_empty(self):
+        self.assertEqual(Label.objects.filter(group=9).aggregate(names=List('name'))['names'], '')
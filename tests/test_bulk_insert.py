@@ -0,0 +1,74 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.db import connection, models
+from django.test import TransactionTestCase
+
+from djfirebirdsql.identity import allocate_pks
+
+
+class Row(models.Model):
+    name = models.CharField(max_length=20, null=True)
+    amount = models.DecimalField(max_digits=10, decimal_places=2, null=True)
+    text = models.TextField(null=True)
+    data = models.BinaryField(null=True)
+    count = models.IntegerField(null=True)
+
+    class Meta:
+        app_label = 'tests'
+
+
+class BulkInsertTests(TransactionTestCase):
+    available_apps = []
+
+    def setUp(self):
+        with connection.schema_editor() as editor:
+            editor.create_model(Row)
+        patcher = mock.patch.object(connection.features, 'has_bulk_insert', True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        with connection.schema_editor() as editor:
+            editor.delete_model(Row)
+
+    def values(self):
+        return [
+            (r.name, r.amount, r.text, bytes(r.data) if r.data is not None else None, r.count)
+            for r in Row.objects.order_by('pk')
+        ]
+
+    def test_round_trip(self):
+        rows = [
+            ('a', Decimal('12.34'), 'text', b'\x00\x01', 1),
+            (None, None, None, None, None),
+            ("it's", Decimal('-0.01'), 'x' * 40000, b'\xff' * 40000, -5),
+            ('ünï', Decimal('99999999.99'), '', b'', 0),
+        ]
+        Row.objects.bulk_create([
+            Row(name=name, amount=amount, text=text, data=data, count=count)
+            for name, amount, text, data, count in rows
+        ])
+        self.assertEqual(self.values(), rows)
+
+    def test_first_row_null(self):
+        # The first SELECT of the union doesn't decide the column types
+        rows = [(None, None, None, None, None), ('long name', Decimal('1.5'), 'b', b'b', 2)]
+        Row.objects.bulk_create([
+            Row(name=name, amount=amount, text=text, data=data, count=count)
+            for name, amount, text, data, count in rows
+        ])
+        self.assertEqual(self.values(), [(None, None, None, None, None), ('long name', Decimal('1.50'), 'b', b'b', 2)])
+
+    def test_batches(self):
+        Row.objects.bulk_create([Row(name=str(i), count=i) for i in range(450)])
+        self.assertEqual(list(Row.objects.order_by('pk').values_list('count', flat=True)), list(range(450)))
+
+    def test_allocated_pks(self):
+        objs = [Row(name=str(i)) for i in range(3)]
+        allocate_pks(objs)
+        Row.objects.bulk_create(objs)
+        self.assertEqual(
+            list(Row.objects.order_by('pk').values_list('pk', 'name')),
+            [(obj.pk, obj.name) for obj in objs],
+        )
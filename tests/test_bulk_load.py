@@ -0,0 +1,64 @@
+from django.db import connection, models, transaction
+from django.db.transaction import TransactionManagementError
+from django.test import TransactionTestCase
+
+from djfirebirdsql.utils import bulk_load
+
+
+class Item(models.Model):
+    code = models.CharField(max_length=10, unique=True)
+    name = models.CharField(max_length=50, db_index=True)
+
+    class Meta:
+        app_label = 'tests'
+
+
+class BulkLoadTests(TransactionTestCase):
+    available_apps = []
+
+    def setUp(self):
+        with connection.schema_editor() as editor:
+            editor.create_model(Item)
+
+    def tearDown(self):
+        with connection.schema_editor() as editor:
+            editor.delete_model(Item)
+
+    def active_indexes(self):
+        with connection.cursor() as cursor:
+            return {
+                index.name: index.active
+                for index in connection.introspection.get_index_list(cursor, Item._meta.db_table)
+            }
+
+    def test_bulk_load(self):
+        indexes = self.active_indexes()
+        self.assertTrue(all(indexes.values()))
+        with bulk_load(Item):
+            # Only the index of name, which backs no constraint, is inactive
+            inactive = [name for name, active in self.active_indexes().items() if not active]
+            self.assertEqual(len(inactive), 1)
+            self.assertIn('name', inactive[0])
+            Item.objects.bulk_create([Item(code='c%d' % i, name='n%d' % (i % 10)) for i in range(1000)])
+        self.assertEqual(self.active_indexes(), indexes)
+        self.assertEqual(Item.objects.filter(name='n3').count(), 100)
+        with connection.cursor() as cursor:
+            statistics = {
+                index.name: index.statistics
+                for index in connection.introspection.get_index_list(cursor, Item._meta.db_table)
+            }
+        # Rebuilt and recomputed on the loaded rows
+        self.assertAlmostEqual(statistics[inactive[0]], 0.1)
+
+    def test_error_reactivates(self):
+        with self.assertRaises(ZeroDivisionError):
+            with bulk_load(Item):
+                1 / 0
+        self.assertTrue(all(self.active_indexes().values()))
+
+    def test_atomic(self):
+        with transaction.atomic():
+            with self.assertRaises(TransactionManagementError):
+                with connection.schema_editor() as editor:
+                    with editor.bulk_load(Item):
+                        pass
@@ -0,0 +1,42 @@
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection
+from django.test import TransactionTestCase, override_settings
+
+
+@override_settings(CACHES={
+    'default': {
+        'BACKEND': 'djfirebirdsql.cache.DatabaseCache',
+        'LOCATION': 'test_cache_table',
+    },
+})
+class DatabaseCacheTests(TransactionTestCase):
+    available_apps = []
+
+    def setUp(self):
+        call_command('createcachetable', verbosity=0)
+        self.cache = caches['default']
+
+    def tearDown(self):
+        with connection.cursor() as cursor:
+            cursor.execute('DROP TABLE %s' % connection.ops.quote_name('test_cache_table'))
+
+    def test_set_get_delete(self):
+        self.assertIs(self.cache.set('key', {'value': 1}), None)
+        self.assertEqual(self.cache.get('key'), {'value': 1})
+        self.assertIs(self.cache.delete('key'), True)
+        self.assertIsNone(self.cache.get('key'))
+        self.assertIs(self.cache.delete('key'), False)
+
+    def test_add_touch(self):
+        self.assertIs(self.cache.add('key', 'first'), True)
+        self.assertIs(self.cache.add('key', 'second'), False)
+        self.assertEqual(self.cache.get('key'), 'first')
+        self.assertIs(self.cache.touch('key', 60), True)
+        self.assertIs(self.cache.touch('missing', 60), False)
+
+    def test_set_many_delete_many(self):
+        self.assertEqual(self.cache.set_many({'a': 1, 'b': 2}), [])
+        self.assertEqual(self.cache.get_many(['a', 'b', 'c']), {'a': 1, 'b': 2})
+        self.cache.delete_many(['a', 'b'])
+        self.assertEqual(self.cache.get_many(['a', 'b']), {})
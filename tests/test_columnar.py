@@ -0,0 +1,126 @@
+import datetime
+import struct
+from decimal import Decimal
+from unittest import mock
+
+from firebirdsql.consts import SQL_TYPE_BLOB, SQL_TYPE_DATE, SQL_TYPE_INT64, SQL_TYPE_TEXT, SQL_TYPE_TIMESTAMP
+
+from django.db import NotSupportedError, connection, models
+from django.test import SimpleTestCase, TransactionTestCase
+
+from djfirebirdsql import columnar
+from djfirebirdsql.columnar import Decimals, Strings, _column, iter_chunks, iter_sql_chunks
+
+
+class XSQLVar:
+    def __init__(self, sqltype, length, sqlscale=0, sqlsubtype=0):
+        self.sqltype = sqltype
+        self.sqlscale = sqlscale
+        self.sqlsubtype = sqlsubtype
+        self.length = length
+
+    def io_length(self):
+        return self.length
+
+
+@mock.patch.object(columnar, 'numpy', None)
+class ColumnTests(SimpleTestCase):
+    def test_decimals(self):
+        column = _column(XSQLVar(SQL_TYPE_INT64, 8, -2), 4, 'utf_8')
+        for i, value in enumerate((12345, -1, 0)):
+            column.put(i, struct.pack('>q', value))
+        column.null(2)
+        values = column.values(3)
+        self.assertIsInstance(values, Decimals)
+        self.assertEqual(values.tolist()[:2], [Decimal('123.45'), Decimal('-0.01')])
+        self.assertEqual(list(column.null_mask(3)), [0, 0, 1])
+
+    def test_dates(self):
+        column = _column(XSQLVar(SQL_TYPE_DATE, 4), 2, 'utf_8')
+        column.put(0, struct.pack('>i', 40587))
+        column.put(1, struct.pack('>i', 40588))
+        self.assertEqual(list(column.values(2)), [0, 1])
+        self.assertIsNone(column.null_mask(2))
+
+    def test_timestamps(self):
+        column = _column(XSQLVar(SQL_TYPE_TIMESTAMP, 8), 1, 'utf_8')
+        # 1970-01-02 00:00:01.5
+        column.put(0, struct.pack('>iI', 40588, 15000))
+        self.assertEqual(list(column.values(1)), [86400 * 1000000 + 1500000])
+
+    def test_strings(self):
+        column = _column(XSQLVar(SQL_TYPE_TEXT, 5), 3, 'utf_8')
+        column.put(0, 'ab   '.encode())
+        column.null(1)
+        column.put(2, 'é'.encode())
+        strings = column.values(3)
+        self.assertIsInstance(strings, Strings)
+        self.assertEqual(strings.tolist(), ['ab', '', 'é'])
+        self.assertEqual(list(strings.offsets), [0, 2, 2, 4])
+
+    def test_binary(self):
+        # OCTETS strings and binary BLOBs stay bytes
+        self.assertIsNone(_column(XSQLVar(SQL_TYPE_TEXT, 4, sqlsubtype=1), 1, 'utf_8').encoding)
+        self.assertIsNone(_column(XSQLVar(SQL_TYPE_BLOB, 8, sqlsubtype=0), 1, 'utf_8').encoding)
+        self.assertEqual(_column(XSQLVar(SQL_TYPE_BLOB, 8, sqlsubtype=1), 1, 'utf_8').encoding, 'utf_8')
+
+
+class Measure(models.Model):
+    name = models.CharField(max_length=20)
+    amount = models.DecimalField(max_digits=12, decimal_places=3, null=True)
+    taken = models.DateTimeField()
+    day = models.DateField()
+    notes = models.TextField(null=True)
+
+    class Meta:
+        app_label = 'tests'
+
+
+class ColumnarTests(TransactionTestCase):
+    available_apps = []
+
+    def setUp(self):
+        with connection.schema_editor() as editor:
+            editor.create_model(Measure)
+        Measure.objects.bulk_create([
+            Measure(
+                name='m%d' % i, amount=None if i % 7 == 0 else Decimal('%d.125' % i),
+                taken=datetime.datetime(2020, 1, 1, 12, 0, 0, 500000) + datetime.timedelta(hours=i),
+                day=datetime.date(2020, 1, 1) + datetime.timedelta(days=i), notes='n' * i,
+            )
+            for i in range(250)
+        ])
+
+    def tearDown(self):
+        with connection.schema_editor() as editor:
+            editor.delete_model(Measure)
+
+    def test_iter_chunks(self):
+        queryset = Measure.objects.order_by('pk').values_list('name', 'amount', 'day', 'notes')
+        chunks = list(iter_chunks(queryset, chunk_size=100))
+        self.assertEqual([len(chunk) for chunk in chunks], [100, 100, 50])
+        self.assertEqual(chunks[0].names, ['name', 'amount', 'day', 'notes'])
+        names = [name for chunk in chunks for name in chunk['name'].tolist()]
+        self.assertEqual(names, ['m%d' % i for i in range(250)])
+        amounts = chunks[0]['amount']
+        nulls = chunks[0].nulls[1]
+        self.assertTrue(nulls[0] and nulls[7] and not nulls[1])
+        self.assertEqual(amounts[1], Decimal('1.125'))
+        self.assertEqual(chunks[2]['notes'][49], 'n' * 249)
+        self.assertIsNone(chunks[0].nulls[0])
+
+    def test_empty(self):
+        self.assertEqual(list(iter_chunks(Measure.objects.none().values_list('name'))), [])
+        self.assertEqual(list(iter_chunks(Measure.objects.filter(name='x').values_list('name'))), [])
+
+    def test_close_early(self):
+        chunks = iter_chunks(Measure.objects.values_list('name'), chunk_size=10)
+        next(chunks)
+        chunks.close()
+        # The connection is usable
+        self.assertEqual(Measure.objects.count(), 250)
+
+    def test_not_select(self):
+        with self.assertRaises(NotSupportedError):
+            list(iter_sql_chunks('DELETE FROM %s' % connection.ops.quote_name(Measure._meta.db_table)))
+        self.assertEqual(Measure.objects.count(), 250)
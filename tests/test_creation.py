@@ -0,0 +1,54 @@
+from unittest import mock
+
+import firebirdsql
+
+from django.db import connection
+from django.test import SimpleTestCase
+
+
+def error(*gds_codes):
+    e = firebirdsql.OperationalError('error')
+    e.gds_codes = set(gds_codes)
+    return e
+
+
+class DatabaseExistsTests(SimpleTestCase):
+    def test_exists(self):
+        with mock.patch('djfirebirdsql.creation.FirebirdConnection') as connect:
+            self.assertIs(connection.creation._database_exists('/tmp/test.fdb'), True)
+        connect.return_value.close.assert_called_once_with()
+
+    def test_missing(self):
+        for code in (335544344, 335544734):
+            with mock.patch('djfirebirdsql.creation.FirebirdConnection', side_effect=error(code)):
+                self.assertIs(connection.creation._database_exists('/tmp/test.fdb'), False)
+
+    def test_other_errors_raise(self):
+        # isc_login, isc_lock_conflict
+        for code in (335544472, 335544345):
+            with mock.patch('djfirebirdsql.creation.FirebirdConnection', side_effect=error(code)):
+                with self.assertRaises(firebirdsql.OperationalError):
+                    connection.creation._database_exists('/tmp/test.fdb')
+        with mock.patch('djfirebirdsql.creation.FirebirdConnection', side_effect=ConnectionRefusedError):
+            with self.assertRaises(OSError):
+                connection.creation._database_exists('/tmp/test.fdb')
+
+
+class CloneTests(SimpleTestCase):
+    def test_clone_with_backup(self):
+        settings_dict = {**connection.settings_dict, 'NAME': '/tmp/test_db.fdb', 'HOST': 'localhost'}
+        with mock.patch.dict(connection.settings_dict, settings_dict), \
+                mock.patch.object(connection, 'close'), \
+                mock.patch('firebirdsql.services.connect') as connect:
+            connection.creation._clone_test_db('1', verbosity=0)
+        services = connect.return_value
+        services.backup_database.assert_called_once_with('/tmp/test_db.fdb', '/tmp/test_db_1.fdb.fbk', callback=None)
+        services.restore_database.assert_called_once_with(
+            '/tmp/test_db_1.fdb.fbk', '/tmp/test_db_1.fdb', replace=True, callback=None
+        )
+        services.close.assert_called_once_with()
+
+    def test_remote_server(self):
+        with mock.patch.dict(connection.settings_dict, {'HOST': 'db.example.com'}):
+            with self.assertRaises(NotImplementedError):
+                connection.creation._clone_test_db('1', verbosity=0)
@@ -0,0 +1,100 @@
+from django.db import connection
+from django.test import SimpleTestCase, TransactionTestCase
+
+from djfirebirdsql.cursor import FirebirdCursorWrapper
+
+
+class XSQLVar:
+    def __init__(self, aliasname, sqltype=448, sqlscale=0, null_ok=True):
+        self.aliasname = aliasname
+        self.sqltype = sqltype
+        self.sqlscale = sqlscale
+        self.null_ok = null_ok
+
+    def display_length(self):
+        return 10
+
+    def io_length(self):
+        return 10
+
+    def precision(self):
+        return None
+
+
+class Statement:
+    def __init__(self, xsqlda):
+        self.xsqlda = xsqlda
+
+
+class DescriptionTests(SimpleTestCase):
+    def test_description_per_statement(self):
+        cursor = FirebirdCursorWrapper(None)
+        self.assertIsNone(cursor.description)
+        cursor.stmt = Statement([XSQLVar('ID', null_ok=False), XSQLVar('NAME')])
+        description = cursor.description
+        self.assertEqual([d.name for d in description], ['id', 'name'])
+        self.assertEqual([d.null_ok for d in description], [False, True])
+        self.assertEqual(description[0][:2], ('id', 448))
+        self.assertIs(cursor.description, description)
+        # A new prepared statement
+        cursor.stmt = Statement([XSQLVar('TITLE')])
+        self.assertEqual([d.name for d in cursor.description], ['title'])
+
+    def test_cached_description(self):
+        cursor = FirebirdCursorWrapper(None)
+        cursor.stmt = Statement([XSQLVar('ID')])
+        cursor._cached_description = [('cached', 448, 10, 10, None, 0, True)]
+        self.assertEqual(cursor.description[0][0], 'cached')
+
+
+class FetchTests(SimpleTestCase):
+    def setUp(self):
+        self.cursor = FirebirdCursorWrapper(None)
+        self.cursor._set_rows([(i,) for i in range(10)])
+
+    def test_fetchmany(self):
+        self.assertEqual(self.cursor.fetchmany(), [(0,)])
+        self.assertEqual(self.cursor.fetchmany(4), [(1,), (2,), (3,), (4,)])
+        self.assertEqual(self.cursor.fetchmany(100), [(5,), (6,), (7,), (8,), (9,)])
+        self.assertEqual(self.cursor.fetchmany(4), [])
+        self.assertIsNone(self.cursor.fetchone())
+
+    def test_mixed(self):
+        self.assertEqual(self.cursor.fetchone(), (0,))
+        self.assertEqual(self.cursor.fetchmany(2), [(1,), (2,)])
+        self.assertEqual(self.cursor.fetchall(), [(i,) for i in range(3, 10)])
+        self.assertEqual(self.cursor.fetchall(), [])
+        self.assertEqual(self.cursor.fetchmany(2), [])
+
+    def test_fetchall(self):
+        rows = self.cursor._rows
+        # Not copied when nothing was fetched
+        self.assertIs(self.cursor.fetchall(), rows)
+        self.assertIsNone(self.cursor.fetchone())
+
+
+class CursorTests(TransactionTestCase):
+    available_apps = []
+
+    def test_description(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 AS ID, CAST('a' AS VARCHAR(10)) AS NAME FROM RDB$DATABASE")
+            self.assertEqual([d.name for d in cursor.description], ['id', 'name'])
+            description = cursor.description
+            cursor.execute('SELECT 2 AS N FROM RDB$DATABASE')
+            self.assertIsNot(cursor.description, description)
+            self.assertEqual([d.name for d in cursor.description], ['n'])
+
+    def test_fetchmany(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'EXECUTE BLOCK RETURNS (N INTEGER) AS BEGIN N = 0; '
+                'WHILE (N < 1000) DO BEGIN SUSPEND; N = N + 1; END END'
+            )
+            rows = []
+            while True:
+                chunk = cursor.fetchmany(300)
+                if not chunk:
+                    break
+                rows.extend(chunk)
+            self.assertEqual([r[0] for r in rows], list(range(1000)))
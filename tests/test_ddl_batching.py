@@ -0,0 +1,99 @@
+from unittest import mock
+
+from django.db import connection, models
+from django.test import SimpleTestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+
+from djfirebirdsql.schema import DatabaseSchemaEditor, _combine_ddl
+
+
+class DeferredDDLTests(SimpleTestCase):
+    def setUp(self):
+        self.editor = DatabaseSchemaEditor(connection)
+        patcher = mock.patch.object(self.editor, '_execute')
+        self.execute = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def executed(self):
+        return [c[0][0] for c in self.execute.call_args_list]
+
+    def test_combine_ddl(self):
+        self.assertEqual(_combine_ddl([
+            'ALTER TABLE "A" ADD CONSTRAINT "A_FK" FOREIGN KEY ("B_ID") REFERENCES "B" ("ID")',
+            'ALTER TABLE "A" ADD CONSTRAINT "A_UNIQ" UNIQUE ("NAME")',
+            'CREATE INDEX "A_IDX" ON "A" ("NAME")',
+            'ALTER TABLE "A" DROP CONSTRAINT "A_CHECK"',
+            'ALTER TABLE "B" DROP CONSTRAINT "B_CHECK"',
+        ]), [
+            'ALTER TABLE "A" ADD CONSTRAINT "A_FK" FOREIGN KEY ("B_ID") REFERENCES "B" ("ID"), '
+            'ADD CONSTRAINT "A_UNIQ" UNIQUE ("NAME")',
+            'CREATE INDEX "A_IDX" ON "A" ("NAME")',
+            'ALTER TABLE "A" DROP CONSTRAINT "A_CHECK"',
+            'ALTER TABLE "B" DROP CONSTRAINT "B_CHECK"',
+        ])
+
+    def test_deferred_ddl(self):
+        with self.editor.deferred_ddl():
+            self.editor.execute('CREATE INDEX "A_IDX" ON "A" ("NAME")')
+            self.editor.execute("CREATE INDEX \"B_IDX\" ON \"B\" ('X')")
+            self.assertEqual(self.executed(), [])
+            # Another statement runs the collected ones first
+            self.editor.execute('ALTER TABLE "A" ADD "X" integer')
+            self.editor.execute('CREATE INDEX "A_X_IDX" ON "A" ("X")')
+        self.assertEqual(self.executed(), [
+            'EXECUTE BLOCK AS BEGIN EXECUTE STATEMENT \'CREATE INDEX "A_IDX" ON "A" ("NAME")\'; '
+            'EXECUTE STATEMENT \'CREATE INDEX "B_IDX" ON "B" (\'\'X\'\')\'; END',
+            'ALTER TABLE "A" ADD "X" integer',
+            'CREATE INDEX "A_X_IDX" ON "A" ("X")',
+        ])
+
+    def test_statement_length(self):
+        statements = ['ALTER TABLE "T%d" ADD CONSTRAINT "C%d" CHECK ("S" <> \'é\')' % (i, i) for i in range(10)]
+        with mock.patch.object(connection.ops, 'max_statement_length', 180):
+            with self.editor.deferred_ddl():
+                for sql in statements:
+                    self.editor.execute(sql)
+        blocks = self.executed()
+        self.assertGreater(len(blocks), 1)
+        self.assertTrue(all(len(sql.encode('utf-8')) <= 180 for sql in blocks))
+        # Each block invalidates the catalog for its statements
+        self.assertEqual([sql for c in self.execute.call_args_list for sql in c[0][2]], statements)
+
+
+class Parent(models.Model):
+    name = models.CharField(max_length=50, unique=True)
+
+    class Meta:
+        app_label = 'tests'
+
+
+class Child(models.Model):
+    parent = models.ForeignKey(Parent, models.CASCADE)
+    name = models.CharField(max_length=50, db_index=True)
+    rank = models.IntegerField()
+
+    class Meta:
+        app_label = 'tests'
+        unique_together = [('parent', 'rank')]
+
+
+class DDLBatchingTests(TransactionTestCase):
+    available_apps = []
+
+    def tearDown(self):
+        with connection.schema_editor() as editor:
+            editor.delete_model(Child)
+            editor.delete_model(Parent)
+
+    def test_create_models(self):
+        with CaptureQueriesContext(connection) as queries:
+            with connection.schema_editor() as editor:
+                editor.create_model(Parent)
+                editor.create_model(Child)
+        # The deferred foreign key and indexes of Child in one block
+        self.assertEqual(len([q for q in queries if q['sql'].startswith('EXECUTE BLOCK')]), 1)
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, Child._meta.db_table)
+        self.assertTrue(any(c['foreign_key'] == ('tests_parent', 'id') for c in constraints.values()))
+        self.assertTrue(any(c['unique'] and c['columns'] == ['parent_id', 'rank'] for c in constraints.values()))
+        self.assertTrue(any(c['index'] and c['columns'] == ['name'] for c in constraints.values()))
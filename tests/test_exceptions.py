@@ -0,0 +1,32 @@
+import firebirdsql
+
+from django.test import SimpleTestCase
+
+from djfirebirdsql.exceptions import LockTimeout, QueryCancelled, QueryTimeout, translate_error
+
+
+def error(*gds_codes):
+    e = firebirdsql.OperationalError('message')
+    e.gds_codes = set(gds_codes)
+    return e
+
+
+class TranslateErrorTests(SimpleTestCase):
+    def test_statement_timeout(self):
+        self.assertIsInstance(translate_error(error(335545128, 335544794)), QueryTimeout)
+
+    def test_lock_timeout(self):
+        # isc_lock_conflict, isc_lock_timeout
+        e = translate_error(error(335544345, 335544510))
+        self.assertIsInstance(e, LockTimeout)
+        self.assertEqual(str(e), 'message')
+
+    def test_lock_conflict(self):
+        # isc_deadlock, isc_lock_conflict, isc_update_conflict
+        self.assertIsNone(translate_error(error(335544336, 335544345, 335544451)))
+
+    def test_cancelled(self):
+        self.assertIsInstance(translate_error(error(335544794)), QueryCancelled)
+
+    def test_other(self):
+        self.assertIsNone(translate_error(error(335544569)))
@@ -0,0 +1,112 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import connection, models
+from django.test import SimpleTestCase, TransactionTestCase
+
+from djfirebirdsql.introspection import IndexInfo
+from djfirebirdsql.management.commands.indexstatistics import Command as IndexStatisticsCommand
+
+
+class Cursor:
+    """Cursor answering the row count and row existence queries."""
+    def __init__(self, row_counts):
+        self.row_counts = row_counts
+        self.queries = []
+
+    def execute(self, query, params=None):
+        self.queries.append(query)
+        table = query.rsplit('"', 2)[-2].lower()
+        count = self.row_counts[table]
+        self.row = (count,) if query.startswith('SELECT COUNT') else ((1,) if count else None)
+
+    def fetchone(self):
+        return self.row
+
+
+class IndexStatisticsTests(SimpleTestCase):
+    def get_index_statistics(self, indexes, row_counts, count_rows=False):
+        cursor = Cursor(row_counts)
+        introspection = connection.introspection
+        with mock.patch.object(introspection, 'get_index_list', return_value=indexes):
+            statistics = introspection.get_index_statistics(cursor, count_rows=count_rows)
+        return {s.name: s for s in statistics}, cursor.queries
+
+    def test_computed_empty(self):
+        statistics, queries = self.get_index_statistics([
+            IndexInfo('filled', 'filled_pk', True, True, True, 0),
+            IndexInfo('empty', 'empty_pk', True, True, True, 0),
+            IndexInfo('inactive', 'inactive_idx', False, False, False, 0),
+        ], {'filled': 10, 'empty': 0})
+        self.assertIs(statistics['filled_pk'].stale, True)
+        self.assertIs(statistics['empty_pk'].stale, False)
+        self.assertNotIn('inactive_idx', statistics)
+        # One row read per table, no COUNT(*)
+        self.assertEqual(len(queries), 2)
+        self.assertFalse(any(q.startswith('SELECT COUNT') for q in queries))
+
+    def test_count_rows(self):
+        indexes = [
+            # Computed at 1000 rows
+            IndexInfo('t', 't_pk', True, True, True, 0.001),
+            IndexInfo('t', 't_idx', False, True, False, 0.5),
+        ]
+        statistics, queries = self.get_index_statistics(indexes, {'t': 1400}, count_rows=True)
+        self.assertEqual(statistics['t_pk'].row_count, 1400)
+        self.assertIs(statistics['t_pk'].stale, False)
+        self.assertEqual(len(queries), 1)
+        statistics, queries = self.get_index_statistics(indexes, {'t': 1600}, count_rows=True)
+        self.assertIs(statistics['t_pk'].stale, True)
+        self.assertIs(statistics['t_idx'].stale, True)
+
+    def test_low_selectivity(self):
+        statistics, queries = self.get_index_statistics([
+            IndexInfo('t', 't_pk', True, True, True, 0.0001),
+            IndexInfo('t', 't_flag', False, True, False, 0.5),
+            IndexInfo('t', 't_name', False, True, False, 0.001),
+            IndexInfo('small', 'small_pk', True, True, True, 0.01),
+            IndexInfo('small', 'small_flag', False, True, False, 0.5),
+        ], {})
+        self.assertIs(statistics['t_flag'].low_selectivity, True)
+        self.assertIs(statistics['t_name'].low_selectivity, False)
+        self.assertIs(statistics['t_pk'].low_selectivity, False)
+        # 100 rows
+        self.assertIs(statistics['small_flag'].low_selectivity, False)
+        self.assertEqual(queries, [])
+
+
+class Reading(models.Model):
+    sensor = models.IntegerField(db_index=True)
+
+    class Meta:
+        app_label = 'tests'
+
+
+class IndexStatisticsCommandTests(TransactionTestCase):
+    available_apps = []
+
+    def setUp(self):
+        with connection.schema_editor() as editor:
+            editor.create_model(Reading)
+
+    def tearDown(self):
+        with connection.schema_editor() as editor:
+            editor.delete_model(Reading)
+
+    def indexstatistics(self, *args):
+        out = StringIO()
+        call_command(IndexStatisticsCommand(), *args, stdout=out)
+        return [line for line in out.getvalue().splitlines() if line.startswith(Reading._meta.db_table)]
+
+    def test_stale_and_update(self):
+        Reading.objects.bulk_create([Reading(sensor=i % 4) for i in range(100)])
+        stale = self.indexstatistics('--stale')
+        # Both indexes were computed on the empty table
+        self.assertEqual(len(stale), 2)
+        self.assertTrue(all(line.endswith('stale') for line in stale))
+        with connection.schema_editor() as editor:
+            updated = editor.update_statistics(Reading, stale_only=True)
+        self.assertEqual(len(updated), 2)
+        self.assertEqual(self.indexstatistics('--stale'), [])
+        self.assertEqual(len(self.indexstatistics('--count-rows')), 2)
@@ -0,0 +1,147 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection, models
+from django.test import SimpleTestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+
+from djfirebirdsql.introspection import Catalog
+from djfirebirdsql.management.commands.inspectdb import Command as InspectDBCommand
+from djfirebirdsql.schema import _ddl_table_name
+
+
+class CatalogAuthor(models.Model):
+    name = models.CharField(max_length=50, unique=True)
+
+    class Meta:
+        app_label = 'tests'
+
+
+class CatalogBook(models.Model):
+    title = models.CharField(max_length=100, db_index=True)
+    author = models.ForeignKey(CatalogAuthor, models.CASCADE)
+
+    class Meta:
+        app_label = 'tests'
+
+
+class CatalogInvalidationTests(SimpleTestCase):
+    def test_invalidate(self):
+        catalog = Catalog()
+        # Nothing loaded, nothing to invalidate
+        catalog.invalidate('tests_book')
+        self.assertEqual(catalog.stale, set())
+        catalog.tables = {'TESTS_BOOK': None, 'TESTS_AUTHOR': None}
+        catalog.invalidate(' tests_book ')
+        self.assertEqual(catalog.stale, {'TESTS_BOOK'})
+        catalog.invalidate()
+        self.assertIsNone(catalog.tables)
+        self.assertEqual(catalog.stale, set())
+
+    def test_ddl_table_name(self):
+        self.assertEqual(_ddl_table_name('ALTER TABLE "TESTS_BOOK" ADD "X" integer'), 'TESTS_BOOK')
+        self.assertEqual(_ddl_table_name('CREATE INDEX "I" ON "TESTS_BOOK" ("X")'), 'TESTS_BOOK')
+        self.assertEqual(_ddl_table_name('DROP TABLE "TESTS_BOOK"'), 'TESTS_BOOK')
+        self.assertEqual(_ddl_table_name('UPDATE "TESTS_BOOK" SET "X" = 1'), '')
+        # Unknown tables drop the whole catalog
+        self.assertIsNone(_ddl_table_name('DROP INDEX "I"'))
+
+
+class CatalogCacheTests(TransactionTestCase):
+    available_apps = []
+
+    def setUp(self):
+        with connection.schema_editor() as editor:
+            editor.create_model(CatalogAuthor)
+            editor.create_model(CatalogBook)
+
+    def tearDown(self):
+        with connection.schema_editor() as editor:
+            editor.delete_model(CatalogBook)
+            editor.delete_model(CatalogAuthor)
+
+    def introspect(self, cursor):
+        introspection = connection.introspection
+        return [
+            (
+                introspection.get_table_description(cursor, table),
+                introspection.get_constraints(cursor, table),
+                introspection.get_key_columns(cursor, table),
+            )
+            for table in ('tests_catalogauthor', 'tests_catalogbook')
+        ]
+
+    def test_same_as_uncached(self):
+        with connection.cursor() as cursor:
+            uncached = self.introspect(cursor)
+            with connection.introspection.catalog_cache():
+                self.assertEqual(self.introspect(cursor), uncached)
+
+    def test_queries(self):
+        # The cursor is created in the context to be a debug cursor
+        with CaptureQueriesContext(connection) as queries, connection.cursor() as cursor:
+            with connection.introspection.catalog_cache():
+                self.introspect(cursor)
+                self.assertLessEqual(len(queries), 3)
+                loaded = len(queries)
+                self.introspect(cursor)
+                self.assertEqual(len(queries), loaded)
+
+    def test_schema_editor_invalidates(self):
+        field = models.IntegerField(null=True)
+        field.set_attributes_from_name('pages')
+        with connection.schema_editor() as editor:
+            with connection.cursor() as cursor:
+                columns = [d.name for d in connection.introspection.get_table_description(cursor, 'tests_catalogbook')]
+            editor.add_field(CatalogBook, field)
+            with connection.cursor() as cursor:
+                self.assertEqual(
+                    [d.name for d in connection.introspection.get_table_description(cursor, 'tests_catalogbook')],
+                    columns + ['pages'],
+                )
+            editor.remove_field(CatalogBook, field)
+            with connection.cursor() as cursor:
+                self.assertEqual(
+                    [d.name for d in connection.introspection.get_table_description(cursor, 'tests_catalogbook')],
+                    columns,
+                )
+
+
+class BulkIntrospectionTests(TransactionTestCase):
+    available_apps = []
+
+    def setUp(self):
+        with connection.schema_editor() as editor:
+            editor.create_model(CatalogAuthor)
+            editor.create_model(CatalogBook)
+
+    def tearDown(self):
+        with connection.schema_editor() as editor:
+            editor.delete_model(CatalogBook)
+            editor.delete_model(CatalogAuthor)
+
+    def test_whole_schema(self):
+        introspection = connection.introspection
+        with connection.cursor() as cursor:
+            descriptions = introspection.get_table_descriptions(cursor)
+            relations = introspection.get_all_relations(cursor)
+            constraints = introspection.get_all_constraints(cursor)
+            for table in ('tests_catalogauthor', 'tests_catalogbook'):
+                self.assertEqual(descriptions[table], introspection.get_table_description(cursor, table))
+                self.assertEqual(relations[table], introspection.get_relations(cursor, table))
+                self.assertEqual(constraints[table], introspection.get_constraints(cursor, table))
+        self.assertEqual(relations['tests_catalogbook'], {'author_id': ('id', 'tests_catalogauthor')})
+
+    def test_inspectdb(self):
+        def inspectdb(*tables):
+            out = StringIO()
+            with CaptureQueriesContext(connection) as queries:
+                call_command(InspectDBCommand(), *tables, stdout=out)
+            return out.getvalue(), len(queries)
+
+        output, one_table = inspectdb('tests_catalogauthor')
+        self.assertIn('class TestsCatalogauthor(models.Model):', output)
+        output, two_tables = inspectdb('tests_catalogauthor', 'tests_catalogbook')
+        self.assertRegex(output, r"author = models.ForeignKey\('?TestsCatalogauthor'?, models.DO_NOTHING\)")
+        # The catalog is read once for any number of tables
+        self.assertEqual(two_tables, one_table)
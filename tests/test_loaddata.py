@@ -0,0 +1,140 @@
+import json
+import os
+import tempfile
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import connection, models
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+
+from djfirebirdsql.management.commands.loaddata import Command as LoadDataCommand
+
+
+class Publisher(models.Model):
+    name = models.CharField(max_length=50)
+
+    class Meta:
+        app_label = 'tests'
+
+
+class Tag(models.Model):
+    name = models.CharField(max_length=20)
+
+    class Meta:
+        app_label = 'tests'
+
+
+class Book(models.Model):
+    title = models.CharField(max_length=100)
+    price = models.DecimalField(max_digits=8, decimal_places=2, null=True)
+    publisher = models.ForeignKey(Publisher, models.CASCADE, null=True)
+    tags = models.ManyToManyField(Tag)
+
+    class Meta:
+        app_label = 'tests'
+
+
+class BatchTests(SimpleTestCase):
+    def execute_batched(self, statements, max_statement_length=65535):
+        command = LoadDataCommand()
+        command.using = 'default'
+        cursor = mock.MagicMock()
+        fake = mock.MagicMock(ops=connection.ops)
+        fake.cursor.return_value.__enter__.return_value = cursor
+        with mock.patch('djfirebirdsql.management.commands.loaddata.connections', {'default': fake}), \
+                mock.patch.object(connection.ops, 'max_statement_length', max_statement_length):
+            command._execute_batched(Book, statements)
+        return [c[0][0] for c in cursor.execute.call_args_list]
+
+    def test_insert_sql(self):
+        command = LoadDataCommand()
+        command.using = 'default'
+        sql = command._insert_sql(Book, Book(pk=3, title="It's", price=Decimal('1.50'), publisher_id=None))
+        self.assertEqual(
+            sql,
+            'UPDATE OR INSERT INTO "TESTS_BOOK" ("ID", "TITLE", "PRICE", "PUBLISHER_ID") '
+            'VALUES (3, \'It\'\'s\', \'1.50\', NULL) MATCHING ("ID");',
+        )
+
+    def test_batches(self):
+        statements = ['INSERT INTO T VALUES (%d);' % i for i in range(450)]
+        executed = self.execute_batched(statements)
+        self.assertEqual(len(executed), 3)
+        self.assertTrue(all(sql.startswith('EXECUTE BLOCK AS BEGIN') for sql in executed))
+        self.assertEqual(sum(sql.count('INSERT') for sql in executed), 450)
+
+    def test_statement_length(self):
+        statements = ['INSERT INTO T VALUES (%d);' % i for i in range(10)]
+        executed = self.execute_batched(statements, 100)
+        self.assertTrue(all(len(sql) <= 100 for sql in executed))
+        # A single statement runs without a block
+        self.assertEqual(self.execute_batched(statements[:1]), ['INSERT INTO T VALUES (0)'])
+
+
+@override_settings(INSTALLED_APPS=['tests'])
+class FastLoadDataTests(TransactionTestCase):
+    available_apps = ['tests']
+
+    def setUp(self):
+        with connection.schema_editor() as editor:
+            for model in (Publisher, Tag, Book):
+                editor.create_model(model)
+        self.books = [
+            {'model': 'tests.book', 'pk': i, 'fields': {
+                'title': "Book's %d" % i, 'price': None if i % 3 == 0 else '%d.99' % i,
+                'publisher': None if i % 5 == 0 else i % 4 + 1, 'tags': [1, 2] if i % 2 else [],
+            }}
+            for i in range(1, 501)
+        ]
+        self.referenced = [
+            {'model': 'tests.publisher', 'pk': i, 'fields': {'name': 'p%d' % i}} for i in range(1, 5)
+        ] + [
+            {'model': 'tests.tag', 'pk': i, 'fields': {'name': 't%d' % i}} for i in range(1, 3)
+        ]
+        directory = tempfile.mkdtemp()
+        self.fixture = os.path.join(directory, 'books.json')
+        self.write_fixture(self.referenced + self.books)
+        self.addCleanup(os.rmdir, directory)
+        self.addCleanup(os.remove, self.fixture)
+
+    def write_fixture(self, objects):
+        with open(self.fixture, 'w') as f:
+            json.dump(objects, f)
+
+    def tearDown(self):
+        with connection.schema_editor() as editor:
+            for model in (Book, Tag, Publisher):
+                editor.delete_model(model)
+
+    def loaddata(self, *options):
+        call_command(LoadDataCommand(), self.fixture, *options, verbosity=0, stdout=StringIO())
+        return [
+            (b.pk, b.title, b.price, b.publisher_id, [t.pk for t in b.tags.order_by('pk')])
+            for b in Book.objects.order_by('pk').prefetch_related('tags')
+        ]
+
+    def test_same_as_loaddata(self):
+        loaded = self.loaddata()
+        Book.objects.all().delete()
+        self.assertEqual(self.loaddata('--fast'), loaded)
+        self.assertEqual(len(loaded), 500)
+        self.assertEqual(loaded[8], (9, "Book's 9", None, 2, [1, 2]))
+        self.assertEqual(loaded[9][2:4], (Decimal('10.99'), None))
+
+    def test_referenced_first(self):
+        # Firebird checks the foreign keys at each statement
+        self.write_fixture(self.books + self.referenced)
+        self.assertEqual(len(self.loaddata('--fast')), 500)
+        self.assertEqual(Book.objects.filter(publisher__name='p2').count(), 100)
+
+    def test_overwrite(self):
+        self.loaddata('--fast')
+        Book.objects.filter(pk=1).update(title='changed')
+        Book.objects.get(pk=2).tags.add(1)
+        loaded = self.loaddata('--fast')
+        self.assertEqual(loaded[0][1], "Book's 1")
+        self.assertEqual(loaded[1][4], [])
+        # The sequence was reset past the loaded keys
+        self.assertEqual(Book.objects.create(title='new').pk, 501)
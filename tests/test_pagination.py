@@ -0,0 +1,85 @@
+import datetime
+
+from django.db import connection, models
+from django.test import SimpleTestCase, TransactionTestCase
+
+from djfirebirdsql.pagination import KeysetPaginator, _keys, decode_cursor, encode_cursor, seek
+
+
+class Entry(models.Model):
+    published = models.DateField()
+    title = models.CharField(max_length=50)
+
+    class Meta:
+        app_label = 'tests'
+        ordering = ['-published']
+
+
+class KeysTests(SimpleTestCase):
+    def test_keys(self):
+        opts = Entry._meta
+        self.assertEqual(_keys(Entry.objects.all()), [(opts.get_field('published'), True), (opts.pk, True)])
+        self.assertEqual(_keys(Entry.objects.order_by('title', 'pk')), [
+            (opts.get_field('title'), False), (opts.pk, False),
+        ])
+        for ordering in (['author__name'], ['?']):
+            with self.assertRaises(ValueError):
+                _keys(Entry.objects.all(), ordering)
+
+    def test_cursor(self):
+        keys = _keys(Entry.objects.all())
+        cursor = encode_cursor([datetime.date(2020, 1, 2), 7], True)
+        self.assertEqual(decode_cursor(cursor, keys), ([datetime.date(2020, 1, 2), 7], True))
+        for cursor in ('', 'garbage', encode_cursor([7])):
+            with self.assertRaisesMessage(ValueError, 'Invalid pagination cursor'):
+                decode_cursor(cursor, keys)
+
+    def test_seek(self):
+        queryset = seek(Entry.objects.all(), [datetime.date(2020, 1, 2), 7])
+        self.assertEqual(queryset.query.order_by, ('-published', '-id'))
+        sql, params = queryset.query.sql_with_params()
+        # The bound on the first key and the OR of the key conditions
+        self.assertIn('<=', sql)
+        self.assertIn(' OR ', sql)
+        self.assertEqual(seek(Entry.objects.all(), reverse=True).query.order_by, ('published', 'id'))
+
+
+class KeysetPaginatorTests(TransactionTestCase):
+    available_apps = []
+
+    def setUp(self):
+        with connection.schema_editor() as editor:
+            editor.create_model(Entry)
+        # Three entries a day, so the key needs the primary key
+        Entry.objects.bulk_create([
+            Entry(published=datetime.date(2020, 1, 1) + datetime.timedelta(days=i // 3), title='e%02d' % i)
+            for i in range(25)
+        ])
+
+    def tearDown(self):
+        with connection.schema_editor() as editor:
+            editor.delete_model(Entry)
+
+    def test_walk(self):
+        expected = list(Entry.objects.order_by('-published', '-id'))
+        paginator = KeysetPaginator(Entry.objects.all(), 10)
+        pages = [paginator.seek_page()]
+        while pages[-1].has_next():
+            pages.append(paginator.seek_page(pages[-1].next_cursor))
+        self.assertEqual([len(page) for page in pages], [10, 10, 5])
+        self.assertEqual([entry for page in pages for entry in page], expected)
+        self.assertIs(pages[0].has_previous(), False)
+        # And back
+        page = paginator.seek_page(pages[-1].previous_cursor)
+        self.assertEqual(list(page), list(pages[1]))
+        self.assertIs(page.has_next(), True)
+        self.assertEqual(list(paginator.seek_page(page.previous_cursor)), list(pages[0]))
+
+    def test_approximate_count(self):
+        paginator = KeysetPaginator(Entry.objects.all(), 10, approximate_count=True)
+        with connection.schema_editor() as editor:
+            editor.update_statistics(Entry)
+        self.assertEqual(paginator.count, 25)
+        # Filtered querysets are counted
+        paginator = KeysetPaginator(Entry.objects.filter(title='e01'), 10, approximate_count=True)
+        self.assertEqual(paginator.count, 1)
@@ -0,0 +1,104 @@
+from firebirdsql.consts import ptype_lazy_send
+
+from django.db import DatabaseError, IntegrityError, connection, models
+from django.test import TransactionTestCase
+
+
+class PipelinedItem(models.Model):
+    name = models.CharField(max_length=20, unique=True)
+    notes = models.TextField(null=True)
+
+    class Meta:
+        app_label = 'tests'
+
+
+class PipeliningTests(TransactionTestCase):
+    available_apps = []
+
+    def setUp(self):
+        with connection.schema_editor() as editor:
+            editor.create_model(PipelinedItem)
+        settings_dict = {
+            **connection.settings_dict,
+            'OPTIONS': {**connection.settings_dict['OPTIONS'], 'pipelining': True},
+        }
+        self.pipelined = connection.__class__(settings_dict, alias='pipelined')
+        self.pipelined.ensure_connection()
+        if self.pipelined.connection.accept_type != ptype_lazy_send:
+            self.pipelined.close()
+            self.skipTest('The server does not accept lazy send.')
+
+    def tearDown(self):
+        self.pipelined.close()
+        with connection.schema_editor() as editor:
+            editor.delete_model(PipelinedItem)
+
+    def assertConnectionUsable(self):
+        with self.pipelined.cursor() as cursor:
+            cursor.execute('SELECT 1 FROM RDB$DATABASE')
+            self.assertEqual(cursor.fetchall(), [(1,)])
+
+    def test_dml(self):
+        with self.pipelined.cursor() as cursor:
+            cursor.execute('INSERT INTO "TESTS_PIPELINEDITEM" ("NAME") VALUES (%s)', ['a'])
+            cursor.execute('INSERT INTO "TESTS_PIPELINEDITEM" ("NAME") VALUES (%s)', ['b'])
+            cursor.execute('UPDATE "TESTS_PIPELINEDITEM" SET "NOTES" = %s WHERE "NAME" = %s', ['x', 'a'])
+            cursor.execute('DELETE FROM "TESTS_PIPELINEDITEM" WHERE "NAME" = %s', ['b'])
+        # Committed: another connection sees the rows
+        self.assertEqual(list(PipelinedItem.objects.values_list('name', 'notes')), [('a', 'x')])
+
+    def test_dml_in_transaction(self):
+        self.pipelined.set_autocommit(False)
+        try:
+            with self.pipelined.cursor() as cursor:
+                cursor.execute('INSERT INTO "TESTS_PIPELINEDITEM" ("NAME") VALUES (%s)', ['a'])
+                cursor.execute('SELECT "NAME" FROM "TESTS_PIPELINEDITEM"')
+                self.assertEqual(cursor.fetchall(), [('a',)])
+            self.assertEqual(PipelinedItem.objects.count(), 0)
+            self.pipelined.commit()
+        finally:
+            self.pipelined.set_autocommit(True)
+        self.assertEqual(PipelinedItem.objects.count(), 1)
+
+    def test_select(self):
+        with self.pipelined.cursor() as cursor:
+            cursor.execute(
+                'EXECUTE BLOCK AS DECLARE I INTEGER = 0; BEGIN WHILE (I < 500) DO BEGIN '
+                'INSERT INTO "TESTS_PIPELINEDITEM" ("NAME") VALUES (:I); I = I + 1; END END'
+            )
+            # More rows than one fetch returns
+            cursor.execute('SELECT "NAME" FROM "TESTS_PIPELINEDITEM" ORDER BY "ID"')
+            self.assertEqual(cursor.fetchall(), [(str(i),) for i in range(500)])
+            self.assertEqual(cursor.description[0].name, 'name')
+            cursor.execute('SELECT "NAME" FROM "TESTS_PIPELINEDITEM" WHERE "NAME" = %s', ['none'])
+            self.assertEqual(cursor.fetchall(), [])
+
+    def test_select_blob(self):
+        with self.pipelined.cursor() as cursor:
+            cursor.execute('INSERT INTO "TESTS_PIPELINEDITEM" ("NAME", "NOTES") VALUES (%s, %s)', ['a', 'x' * 100000])
+            cursor.execute('SELECT "NAME", "NOTES" FROM "TESTS_PIPELINEDITEM"')
+            rows = cursor.fetchall()
+        self.assertEqual(rows, [('a', 'x' * 100000)])
+
+    def test_returning(self):
+        with self.pipelined.cursor() as cursor:
+            cursor.execute('INSERT INTO "TESTS_PIPELINEDITEM" ("NAME") VALUES (%s) RETURNING "ID", "NAME"', ['a'])
+            pk, name = cursor.fetchone()
+        self.assertEqual(name, 'a')
+        self.assertEqual(PipelinedItem.objects.get().pk, pk)
+
+    def test_error_at_prepare(self):
+        with self.pipelined.cursor() as cursor:
+            with self.assertRaises(DatabaseError):
+                cursor.execute('SELECT "MISSING" FROM "TESTS_PIPELINEDITEM"')
+        self.assertConnectionUsable()
+
+    def test_error_after_prepare(self):
+        with self.pipelined.cursor() as cursor:
+            cursor.execute('INSERT INTO "TESTS_PIPELINEDITEM" ("NAME") VALUES (%s)', ['a'])
+            with self.assertRaises(IntegrityError):
+                cursor.execute('INSERT INTO "TESTS_PIPELINEDITEM" ("NAME") VALUES (%s)', ['a'])
+            with self.assertRaises(DatabaseError):
+                cursor.execute('SELECT CAST("NAME" AS INTEGER) FROM "TESTS_PIPELINEDITEM"')
+        self.assertConnectionUsable()
+        self.assertEqual(PipelinedItem.objects.count(), 1)
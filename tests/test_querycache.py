@@ -0,0 +1,117 @@
+from django.db import connection, models, transaction
+from django.test import SimpleTestCase, TransactionTestCase
+
+from djfirebirdsql.querycache import QueryCache
+from djfirebirdsql.replication import HEARTBEAT_TABLE
+
+DESCRIPTION = [('id', 496, 11, 4, None, 0, False)]
+
+
+class QueryCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.references = {'AUTHOR': ['BOOK'], 'BOOK': ['REVIEW'], 'REVIEW': []}
+        self.cache = QueryCache(max_entries=3, max_rows=2, references=lambda table: self.references[table])
+
+    def cached(self, *queries):
+        for query in queries:
+            self.cache.executed(query, [(1,)], DESCRIPTION)
+
+    def test_get(self):
+        self.assertIsNone(self.cache.get('SELECT 1 FROM "BOOK"'))
+        self.cached('SELECT 1 FROM "BOOK"')
+        self.assertEqual(self.cache.get('SELECT 1 FROM "BOOK"'), (((1,),), DESCRIPTION))
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_limits(self):
+        self.cache.executed('SELECT ID FROM "BOOK"', [(1,), (2,), (3,)], DESCRIPTION)
+        self.assertEqual(len(self.cache), 0)
+        self.cached('SELECT 1 FROM "A"', 'SELECT 1 FROM "B"', 'SELECT 1 FROM "C"')
+        self.cache.get('SELECT 1 FROM "A"')
+        self.cached('SELECT 1 FROM "D"')
+        # The least recently used goes first
+        self.assertIsNone(self.cache.get('SELECT 1 FROM "B"'))
+        self.assertIsNotNone(self.cache.get('SELECT 1 FROM "A"'))
+
+    def test_uncached(self):
+        self.cached(
+            'SELECT CURRENT_TIMESTAMP FROM RDB$DATABASE',
+            'SELECT GEN_ID(G, 1) FROM RDB$DATABASE',
+            'SELECT 1 FROM "BOOK" WITH LOCK',
+            "SELECT 1 FROM RDB$DATABASE WHERE CAST('NOW' AS TIMESTAMP) > X",
+            'SELECT 1 FROM "%s"' % HEARTBEAT_TABLE.upper(),
+        )
+        self.assertEqual(len(self.cache), 0)
+
+    def test_insert_invalidates_table(self):
+        self.cached('SELECT 1 FROM "AUTHOR"', 'SELECT 1 FROM "BOOK"')
+        self.cache.executed('INSERT INTO "AUTHOR" ("NAME") VALUES (\'a\')', [], None)
+        self.assertIsNone(self.cache.get('SELECT 1 FROM "AUTHOR"'))
+        self.assertIsNotNone(self.cache.get('SELECT 1 FROM "BOOK"'))
+
+    def test_delete_invalidates_references(self):
+        self.cached('SELECT 1 FROM "AUTHOR"', 'SELECT 1 FROM "REVIEW"', 'SELECT 1 FROM OTHER')
+        # ON DELETE CASCADE reaches REVIEW through BOOK
+        self.cache.executed('DELETE FROM "AUTHOR" WHERE "ID" = 1', [], None)
+        self.assertIsNone(self.cache.get('SELECT 1 FROM "AUTHOR"'))
+        self.assertIsNone(self.cache.get('SELECT 1 FROM "REVIEW"'))
+        self.assertIsNotNone(self.cache.get('SELECT 1 FROM OTHER'))
+
+    def test_other_statements_clear(self):
+        for query in ('EXECUTE BLOCK AS BEGIN END', 'ALTER TABLE "BOOK" ADD X INTEGER', 'ROLLBACK TO SAVEPOINT S'):
+            self.cached('SELECT 1 FROM "BOOK"')
+            self.cache.executed(query, [], None)
+            self.assertEqual(len(self.cache), 0, query)
+
+
+class CachedAuthor(models.Model):
+    name = models.CharField(max_length=50)
+
+    class Meta:
+        app_label = 'tests'
+
+
+class CachedBook(models.Model):
+    author = models.ForeignKey(CachedAuthor, models.CASCADE)
+
+    class Meta:
+        app_label = 'tests'
+
+
+class CacheQueriesTests(TransactionTestCase):
+    available_apps = []
+
+    def setUp(self):
+        with connection.schema_editor() as editor:
+            editor.create_model(CachedAuthor)
+            editor.create_model(CachedBook)
+        self.author = CachedAuthor.objects.create(name='a')
+        CachedBook.objects.create(author=self.author)
+
+    def tearDown(self):
+        with connection.schema_editor() as editor:
+            editor.delete_model(CachedBook)
+            editor.delete_model(CachedAuthor)
+
+    def test_cache_queries(self):
+        with connection.cache_queries() as cache:
+            self.assertEqual(CachedAuthor.objects.get(pk=self.author.pk).name, 'a')
+            self.assertEqual(CachedAuthor.objects.get(pk=self.author.pk).name, 'a')
+            self.assertEqual(cache.hits, 1)
+            self.assertEqual(CachedBook.objects.count(), 1)
+            CachedAuthor.objects.filter(pk=self.author.pk).update(name='b')
+            self.assertEqual(CachedAuthor.objects.get(pk=self.author.pk).name, 'b')
+            # Deleting the author deletes its books
+            CachedAuthor.objects.filter(pk=self.author.pk).delete()
+            self.assertEqual(CachedBook.objects.count(), 0)
+        self.assertIsNone(connection.query_cache)
+
+    def test_rollback(self):
+        with connection.cache_queries():
+            try:
+                with transaction.atomic():
+                    CachedAuthor.objects.create(name='c')
+                    self.assertEqual(CachedAuthor.objects.count(), 2)
+                    raise ValueError
+            except ValueError:
+                pass
+            self.assertEqual(CachedAuthor.objects.count(), 1)
@@ -0,0 +1,78 @@
+from unittest import mock
+
+from django.db import connection, connections
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TransactionTestCase
+
+from djfirebirdsql import replication
+
+
+class PinningTests(SimpleTestCase):
+    def tearDown(self):
+        replication.unpin()
+
+    def test_db_for_write_does_not_pin(self):
+        router = replication.ReplicaRouter()
+        self.assertEqual(router.db_for_write(None), 'default')
+        self.assertIs(replication.pinned(), False)
+
+    def test_executed(self):
+        for query in ('SELECT 1 FROM RDB$DATABASE', 'WITH X AS (SELECT 1 FROM RDB$DATABASE) SELECT * FROM X'):
+            replication.executed(query)
+            self.assertIs(replication.pinned(), False)
+        for query in ('INSERT INTO T VALUES (1)', ' update T set A = 1', 'DELETE FROM T', 'MERGE INTO T',
+                      'UPDATE OR INSERT INTO T VALUES (1)', 'EXECUTE BLOCK AS BEGIN END'):
+            replication.unpin()
+            replication.executed(query)
+            self.assertIs(replication.pinned(), True, query)
+
+    def test_middleware(self):
+        def get_response(request):
+            replication.executed(request.GET['query'])
+            return HttpResponse()
+
+        middleware = replication.ReplicaPinningMiddleware(get_response)
+        response = middleware(RequestFactory().get('/', {'query': 'SELECT 1 FROM RDB$DATABASE'}))
+        self.assertNotIn(middleware.pin_cookie_name, response.cookies)
+        response = middleware(RequestFactory().get('/', {'query': 'DELETE FROM T'}))
+        self.assertIn(middleware.pin_cookie_name, response.cookies)
+        self.assertIs(replication.pinned(), False)
+
+
+class ReplicationTests(TransactionTestCase):
+    available_apps = []
+    databases = {'default', 'other'}
+
+    def setUp(self):
+        for using in ('default', 'other'):
+            replication.create_heartbeat_table(using)
+
+    def tearDown(self):
+        replication.unpin()
+        for using in ('default', 'other'):
+            with connections[using].cursor() as cursor:
+                cursor.execute('DROP TABLE %s' % connection.ops.quote_name(replication.HEARTBEAT_TABLE))
+
+    def test_cursor_write_pins(self):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1 FROM RDB$DATABASE')
+            self.assertIs(replication.pinned(), False)
+        replication.beat()
+        self.assertIs(replication.pinned(), True)
+
+    def test_replication_lag(self):
+        replica = connections['other']
+        with mock.patch.dict(replica.settings_dict['OPTIONS'], {'replica_of': 'default'}):
+            self.assertIsNone(replication.replication_lag('other'))
+            # The heartbeat of the primary replicated 30 seconds ago
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT %s FROM RDB$DATABASE' % replication.SERVER_TIME)
+                now = cursor.fetchone()[0]
+            with replica.cursor() as cursor:
+                cursor.execute('INSERT INTO %s VALUES (1, %%s)' % connection.ops.quote_name(
+                    replication.HEARTBEAT_TABLE
+                ), [now - 30])
+            lag = replication.replication_lag('other')
+            self.assertGreaterEqual(lag, 30)
+            self.assertLess(lag, 40)
+            self.assertIs(replication.ReplicaRouter().is_fresh('other'), False)
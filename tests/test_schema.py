@@ -0,0 +1,53 @@
+from django.db import DatabaseError, connection, models
+from django.test import TransactionTestCase
+
+
+class Note(models.Model):
+    value = models.CharField(max_length=10, null=True)
+
+    class Meta:
+        app_label = 'tests'
+
+
+class RebuildFieldTests(TransactionTestCase):
+    available_apps = []
+
+    def setUp(self):
+        with connection.schema_editor() as editor:
+            editor.create_model(Note)
+
+    def tearDown(self):
+        with connection.schema_editor() as editor:
+            editor.delete_model(Note)
+
+    def test_null_to_not_null_with_default(self):
+        Note.objects.bulk_create([Note(value='1'), Note(value=None), Note(value='3')])
+        old_field = Note._meta.get_field('value')
+        new_field = models.IntegerField(default=7)
+        new_field.set_attributes_from_name('value')
+        new_field.model = Note
+        with connection.schema_editor() as editor:
+            editor.rebuild_field(Note, old_field, new_field, batch_size=2)
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT "VALUE" FROM "TESTS_NOTE" ORDER BY "ID"')
+            self.assertEqual(cursor.fetchall(), [(1,), (7,), (3,)])
+            description = connection.introspection.get_table_description(cursor, 'tests_note')
+        converter = connection.introspection.identifier_converter
+        self.assertIs({converter(d.name): d.null_ok for d in description}['value'], False)
+
+    def test_failed_copy_drops_shadow_column(self):
+        Note.objects.bulk_create([Note(value='1'), Note(value='x')])
+        old_field = Note._meta.get_field('value')
+        new_field = models.IntegerField(null=True)
+        new_field.set_attributes_from_name('value')
+        new_field.model = Note
+        with self.assertRaises(DatabaseError):
+            with connection.schema_editor() as editor:
+                editor.rebuild_field(Note, old_field, new_field)
+        with connection.cursor() as cursor:
+            columns = [d.name for d in connection.introspection.get_table_description(cursor, 'tests_note')]
+            cursor.execute("SELECT COUNT(*) FROM RDB$TRIGGERS WHERE RDB$RELATION_NAME = 'TESTS_NOTE'")
+            self.assertEqual(cursor.fetchone()[0], 0)
+            cursor.execute('SELECT "VALUE" FROM "TESTS_NOTE" ORDER BY "ID"')
+            self.assertEqual(cursor.fetchall(), [('1',), ('x',)])
+        self.assertEqual(len(columns), 2)
@@ -0,0 +1,67 @@
+import decimal
+
+from django.db import connection, models
+from django.db.utils import InterfaceError
+from django.test import SimpleTestCase, TransactionTestCase
+
+from djfirebirdsql import threaded
+
+
+class Article(models.Model):
+    title = models.CharField(max_length=100)
+    price = models.DecimalField(max_digits=10, decimal_places=2, null=True)
+    flag = models.BooleanField(default=False)
+
+    class Meta:
+        app_label = 'tests'
+
+
+class ClosedConnectionTests(SimpleTestCase):
+    async def test_calls_after_close(self):
+        conn = threaded.ThreadedConnection(connection.get_connection_params())
+        await conn.close()
+        with self.assertRaisesMessage(InterfaceError, 'Connection is closed'):
+            await conn.connect()
+        with self.assertRaisesMessage(InterfaceError, 'Connection is closed'):
+            await conn.cursor()
+        # A second close() is a no-op
+        await conn.close()
+
+
+class ThreadedTests(TransactionTestCase):
+    available_apps = []
+
+    def setUp(self):
+        with connection.schema_editor() as editor:
+            editor.create_model(Article)
+        Article.objects.bulk_create(
+            [Article(title='a%03d' % i, price=decimal.Decimal('%d.25' % i), flag=i % 2 == 0) for i in range(250)]
+            + [Article(title='empty')]
+        )
+
+    def tearDown(self):
+        with connection.schema_editor() as editor:
+            editor.delete_model(Article)
+
+    async def test_cursor(self):
+        async with await threaded.connect() as conn:
+            async with await conn.cursor() as cursor:
+                await cursor.execute('SELECT COUNT(*) FROM %s' % connection.ops.quote_name(Article._meta.db_table))
+                self.assertEqual(await cursor.fetchone(), (251,))
+        with self.assertRaises(InterfaceError):
+            await conn.cursor()
+
+    async def test_aiter_rows(self):
+        queryset = Article.objects.exclude(price=None).order_by('title').values_list('title', 'price', 'flag')
+        async with await threaded.connect() as conn:
+            rows = [row async for row in threaded.aiter_rows(queryset, conn, chunk_size=100)]
+        self.assertEqual(len(rows), 250)
+        # Converted by the backend, in the order of the queryset
+        self.assertEqual(rows[0], ('a000', decimal.Decimal('0.25'), True))
+        self.assertEqual(rows[249], ('a249', decimal.Decimal('249.25'), False))
+
+    async def test_aget_rows(self):
+        async with await threaded.connect() as conn:
+            rows = await threaded.aget_rows(Article.objects.filter(price=None).values_list('title', 'price'), conn)
+            self.assertEqual(rows, [('empty', None)])
+            self.assertEqual(await threaded.aget_rows(Article.objects.none().values_list('title'), conn), [])
@@ -0,0 +1,79 @@
+import struct
+import zlib
+from unittest import mock
+
+from firebirdsql.consts import ptype_lazy_send
+from firebirdsql.wireprotocol import WireProtocol
+
+from django.test import SimpleTestCase
+
+from djfirebirdsql.connection import FirebirdConnection, pflag_compress
+
+
+class ScriptedStream:
+    """SocketStream which replies with the scripted server bytes."""
+    _sock = None
+
+    def __init__(self, replies):
+        self.replies = replies
+        self.sent = []
+
+    def recv(self, nbytes):
+        b, self.replies = self.replies[:nbytes], self.replies[nbytes:]
+        return b
+
+    def send(self, b):
+        self.sent.append(b)
+
+    def close(self):
+        pass
+
+
+def op_accept(accept_type):
+    # Protocol version 13, arch_generic
+    return struct.pack('>IIII', WireProtocol.op_accept, 0xffff800d, 1, accept_type)
+
+
+def op_response(handle):
+    # The handle, an object id, no data and an empty status vector
+    return struct.pack('>II8sII', WireProtocol.op_response, handle, b'', 0, 0)
+
+
+class WireCompressionTests(SimpleTestCase):
+    def connect(self, replies):
+        stream = ScriptedStream(replies)
+        with mock.patch('firebirdsql.fbcore.SocketStream', return_value=stream):
+            connection = FirebirdConnection(
+                host='localhost', database='/tmp/test.fdb', user='sysdba', password='masterkey',
+                wire_compression=True,
+            )
+        self.addCleanup(connection.close)
+        return connection, stream
+
+    def offered_protocols(self, stream):
+        # The protocols are at the end of the op_connect packet
+        return list(struct.iter_unpack('>IIIII', stream.sent[0][-8 * 20:]))
+
+    def test_handshake(self):
+        compressor = zlib.compressobj()
+        # The responses of op_attach and of the op_detach of close()
+        replies = op_accept(ptype_lazy_send | pflag_compress) + b''.join(
+            compressor.compress(op_response(h)) + compressor.flush(zlib.Z_SYNC_FLUSH) for h in (7, 0)
+        )
+        connection, stream = self.connect(replies)
+        for version, _, _, ptype, _ in self.offered_protocols(stream):
+            self.assertEqual(bool(ptype & pflag_compress), (version & 0xff) >= 13)
+        self.assertIs(connection.wire_compressed, True)
+        self.assertEqual(connection.accept_type, ptype_lazy_send)
+        self.assertEqual(connection.db_handle, 7)
+        # The op_attach after the accept is compressed
+        op_attach = zlib.decompressobj().decompress(b''.join(stream.sent[1:]))
+        self.assertEqual(struct.unpack('>I', op_attach[:4])[0], WireProtocol.op_attach)
+
+    def test_refused(self):
+        # A server without zlib, or older than Firebird 3.0, accepts without pflag_compress
+        connection, stream = self.connect(op_accept(ptype_lazy_send) + op_response(7) + op_response(0))
+        self.assertIs(connection.wire_compressed, False)
+        self.assertEqual(connection.accept_type, ptype_lazy_send)
+        self.assertEqual(connection.db_handle, 7)
+        self.assertEqual(struct.unpack('>I', stream.sent[1][:4])[0], WireProtocol.op_attach)